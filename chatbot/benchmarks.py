@@ -0,0 +1,129 @@
+"""
+Benchmarks - College Information System
+Measures the data layer and recommendation engine on synthetic catalogs
+"""
+
+import contextlib
+import gc
+import io
+import time
+import tracemalloc
+from dataclasses import fields, make_dataclass
+from typing import Any, Callable, Dict, List
+
+from embedded_backend import EmbeddedBackend
+from recommendation_engine import CollegeRecommendationSystem, StudentProfile
+from query_builder import CatalogQuery, Condition, Op, OrderBy, Predicate
+from sql_builder import College, Department, Course, CollegeInfo, CollegeDataExtractor, DatabaseConfig
+from synthetic_catalog import LOCATIONS, COURSES, generate_catalog_rows
+
+# Plain (dict-backed) copies of the catalog classes, as they were before slots
+LegacyCollege = make_dataclass('LegacyCollege', [f.name for f in fields(College)])
+LegacyDepartment = make_dataclass('LegacyDepartment', [f.name for f in fields(Department)])
+LegacyCourse = make_dataclass('LegacyCourse', [f.name for f in fields(Course)])
+LegacyCollegeInfo = make_dataclass('LegacyCollegeInfo', [f.name for f in fields(CollegeInfo)])
+
+def _legacy_convert(results: List[Dict[str, Any]]) -> List[Any]:
+    """Previous conversion: a new college and department object for every course row"""
+    college_info_list = []
+    for row in results:
+        college = LegacyCollege(
+            row['CollegeId'], row['CollegeName'], row['Location'], row['Type'],
+            row['ContactNumber'] or '', row['Email'] or '', bool(row['HostelAvailability']),
+            float(row['Latitude']) if row['Latitude'] else 0.0,
+            float(row['Longitude']) if row['Longitude'] else 0.0
+        )
+        department = LegacyDepartment(row['DepartmentId'] or 0, row['DepartmentName'] or '', row['CollegeId'])
+        course = LegacyCourse(
+            row['CourseId'] or 0, row['CourseName'] or '', row['AverageCutoffRank'] or 0,
+            float(row['Fee'] or 0), row['TotalSeats'] or 0, float(row['FacultyToStudentRatio'] or 0),
+            row['PassPercentage'] or 0, bool(row['InternshipOpportunities']), row['GereralScholarship'] or 0,
+            row['SemesterScholarship'] or '', row['TotalQuotas'] or 0, row['DurationInYears'] or 4,
+            row['AdmissionProcess'] or '', float(row['Rating'] or 0), row['DepartmentId'] or 0
+        )
+        college_info_list.append(LegacyCollegeInfo(college, department, course))
+    return college_info_list
+
+def _retained_bytes(num_courses: int, convert: Callable[[List[Dict[str, Any]]], List[Any]]) -> int:
+    """Bytes still allocated after converting a fresh result set and dropping the raw rows"""
+    gc.collect()
+    tracemalloc.start()
+    rows = generate_catalog_rows(num_courses)
+    catalog = convert(rows)
+    del rows
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del catalog
+    return retained
+
+def compare_catalog_memory(num_courses: int = 100_000) -> Dict[str, float]:
+    """Compare retained memory of the per-row and the identity-mapped catalog"""
+    extractor = CollegeDataExtractor(DatabaseConfig(pool_size=0))
+    legacy = _retained_bytes(num_courses, _legacy_convert)
+    interned = _retained_bytes(num_courses, extractor._convert_to_college_info_list)
+    result = {
+        'num_courses': num_courses,
+        'legacy_mb': legacy / 2**20,
+        'interned_mb': interned / 2**20,
+        'savings_pct': 100.0 * (1 - interned / legacy)
+    }
+    print(f"Catalog memory for {num_courses:,} courses: "
+          f"per-row {result['legacy_mb']:.1f} MB -> identity-mapped {result['interned_mb']:.1f} MB "
+          f"({result['savings_pct']:.0f}% less)")
+    return result
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+def measure_query_latency(num_courses: int = 20_000, iterations: int = 200) -> Dict[str, float]:
+    """
+    Time get_colleges_by_query against the embedded backend
+
+    Each iteration filters on a different location and course so the result
+    cache does not hide the query cost; the backend runs in-process, so the
+    numbers exclude network round trips.
+    """
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(num_courses))
+    extractor = CollegeDataExtractor(DatabaseConfig(result_cache_size=0), backend=backend)
+    samples = []
+    for i in range(iterations):
+        query = CatalogQuery.build(
+            [Condition.any_of([Predicate('location', Op.CONTAINS, LOCATIONS[i % len(LOCATIONS)].split(',')[0])]),
+             Condition.any_of([Predicate('course_name', Op.CONTAINS, COURSES[i % len(COURSES)])]),
+             Condition.any_of([Predicate('fee', Op.LESS_EQUAL, 1_000_000 + 1_000 * i)])],
+            [OrderBy('rating', descending=True)], limit=20
+        )
+        start = time.perf_counter()
+        extractor.get_colleges_by_query(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    backend.close()
+
+    result = {'num_courses': num_courses, 'p50_ms': _percentile(samples, 50), 'p99_ms': _percentile(samples, 99)}
+    print(f"get_colleges_by_query over {num_courses:,} courses (embedded): "
+          f"p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    return result
+
+def measure_compare_colleges(num_courses: int = 100_000, iterations: int = 20) -> Dict[str, float]:
+    """Time compare_colleges (all three factors, top 5) on a synthetic catalog"""
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(num_courses))
+    recommender = CollegeRecommendationSystem(CollegeDataExtractor(DatabaseConfig(), backend=backend))
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender.load_data()
+    profile = StudentProfile(preferred_locations=['LALITPUR'], location_proximity=(27.7, 85.3), max_distance_km=20)
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        recommender.compare_colleges(profile, ['location', 'fee', 'pass_rate'], top_n=5)
+        samples.append((time.perf_counter() - start) * 1000)
+    backend.close()
+
+    result = {'num_courses': num_courses, 'p50_ms': _percentile(samples, 50), 'p99_ms': _percentile(samples, 99)}
+    print(f"compare_colleges over {num_courses:,} courses: p50 {result['p50_ms']:.2f} ms, p99 {result['p99_ms']:.2f} ms")
+    return result
+
+if __name__ == "__main__":
+    compare_catalog_memory()
+    measure_query_latency()
+    measure_compare_colleges()
@@ -0,0 +1,264 @@
+"""
+Catalog aggregates
+Per course name, college and location statistics kept in memory and
+updated incrementally from catalog snapshot diffs
+"""
+
+import math
+import threading
+import logging
+from collections import Counter
+from operator import attrgetter
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Grouping -> (group key, aggregated CollegeInfo attributes, distinct member key)
+GROUPINGS: Dict[str, Tuple[Callable[[Any], Hashable], Tuple[str, ...], Optional[Callable[[Any], Hashable]]]] = {
+    'course': (
+        attrgetter('course.name'),
+        ('fee', 'rating', 'pass_percentage', 'average_cutoff_rank', 'total_seats', 'general_scholarship'),
+        None
+    ),
+    'college': (
+        attrgetter('college.college_id'),
+        ('fee', 'rating', 'pass_percentage', 'total_seats'),
+        attrgetter('department.department_id')
+    ),
+    'location': (
+        attrgetter('college.location'),
+        ('fee', 'rating', 'total_seats'),
+        attrgetter('college.college_id')
+    )
+}
+
+_METRICS = {metric: attrgetter(f"course.{metric}") for _, metrics, _ in GROUPINGS.values() for metric in metrics}
+
+class RunningStats:
+    """Count, sum, min, max and sum of squares of a value stream that supports removals"""
+    __slots__ = ('count', 'total', 'sum_squares', 'minimum', 'maximum')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.sum_squares = 0.0
+        self.minimum: Optional[float] = None
+        self.maximum: Optional[float] = None
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.sum_squares += value * value
+        self.observe_extreme(value)
+
+    def remove(self, value: float) -> bool:
+        """Remove a previously added value; returns True if min/max must be recomputed"""
+        self.count -= 1
+        self.total -= value
+        self.sum_squares -= value * value
+        if self.count == 0:
+            self.total = self.sum_squares = 0.0
+            self.minimum = self.maximum = None
+            return False
+        return value == self.minimum or value == self.maximum
+
+    def observe_extreme(self, value: float):
+        if self.minimum is None or value < self.minimum:
+            self.minimum = value
+        if self.maximum is None or value > self.maximum:
+            self.maximum = value
+
+    def reset_extremes(self):
+        self.minimum = self.maximum = None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    @property
+    def std_dev(self) -> Optional[float]:
+        """Population standard deviation (SQL STDDEV)"""
+        if not self.count:
+            return None
+        mean = self.total / self.count
+        return math.sqrt(max(self.sum_squares / self.count - mean * mean, 0.0))
+
+class AggregateGroup:
+    """Running statistics for the courses sharing one group key"""
+    __slots__ = ('key', 'count', 'metrics', 'members', 'sample')
+
+    def __init__(self, key: Hashable, metrics: Iterable[str], track_members: bool):
+        self.key = key
+        self.count = 0
+        self.metrics: Dict[str, RunningStats] = {metric: RunningStats() for metric in metrics}
+        self.members: Optional[Counter] = Counter() if track_members else None
+        self.sample: Any = None   # latest CollegeInfo added, for descriptive columns
+
+class CatalogAggregates:
+    """
+    Materialized GROUP BY statistics over the catalog snapshot.
+
+    sync() diffs a new snapshot against the last one applied (by course id)
+    and only adds and removes the changed programs, so readers get the
+    aggregates without scanning the catalog. A min/max is only recomputed
+    when a removal takes out the current extreme.
+    """
+
+    def __init__(self):
+        self._groups: Dict[str, Dict[Hashable, AggregateGroup]] = {name: {} for name in GROUPINGS}
+        self._applied: Any = None
+        self._lock = threading.Lock()
+
+    def sync(self, snapshot: Any):
+        """Bring the aggregates up to date with a CatalogSnapshot"""
+        with self._lock:
+            applied = self._applied
+            if snapshot is applied or (applied is not None and snapshot.loaded_at < applied.loaded_at):
+                return
+            previous = {item.course.course_id: item for item in applied.colleges} if applied is not None else {}
+            stale: set = set()
+            added = removed = 0
+            for item in snapshot.colleges:
+                old = previous.pop(item.course.course_id, None)
+                if old is not None and old == item:
+                    continue
+                if old is not None:
+                    self._remove(old, stale)
+                    removed += 1
+                self._add(item)
+                added += 1
+            for old in previous.values():
+                self._remove(old, stale)
+                removed += 1
+            if stale:
+                self._recompute_extremes(snapshot.colleges, stale)
+            self._applied = snapshot
+        logger.info(f"Catalog aggregates updated: {added} programs added, {removed} removed.")
+
+    def on_snapshot(self, previous: Any, current: Any):
+        """CatalogSnapshotManager listener"""
+        self.sync(current)
+
+    def group(self, grouping: str, key: Hashable) -> Optional[AggregateGroup]:
+        """Return the aggregates for one course name, college id or location"""
+        return self._groups[grouping].get(key)
+
+    def course_statistics(self) -> pd.DataFrame:
+        """Same columns and order as the course statistics GROUP BY query"""
+        with self._lock:
+            rows = [{
+                'course_name': group.key,
+                'total_colleges_offering': group.count,
+                'average_fee': group.metrics['fee'].mean,
+                'min_fee': group.metrics['fee'].minimum,
+                'max_fee': group.metrics['fee'].maximum,
+                'average_rating': group.metrics['rating'].mean,
+                'average_pass_percentage': group.metrics['pass_percentage'].mean,
+                'average_cutoff_rank': group.metrics['average_cutoff_rank'].mean,
+                'best_cutoff_rank': group.metrics['average_cutoff_rank'].minimum,
+                'worst_cutoff_rank': group.metrics['average_cutoff_rank'].maximum,
+                'total_seats_available': group.metrics['total_seats'].total,
+                'average_scholarship': group.metrics['general_scholarship'].mean
+            } for group in self._groups['course'].values()]
+        rows.sort(key=lambda row: (-row['average_rating'], row['average_fee']))
+        return pd.DataFrame(rows)
+
+    def college_statistics(self) -> pd.DataFrame:
+        """Same columns and order as the college statistics GROUP BY query"""
+        with self._lock:
+            rows = [{
+                'college_name': group.sample.college.name,
+                'Location': group.sample.college.location,
+                'college_type': group.sample.college.type,
+                'total_departments': len(group.members),
+                'total_courses': group.count,
+                'average_fee': group.metrics['fee'].mean,
+                'average_rating': group.metrics['rating'].mean,
+                'average_pass_percentage': group.metrics['pass_percentage'].mean,
+                'total_seats': group.metrics['total_seats'].total,
+                'has_hostel': int(group.sample.college.hostel_availability)
+            } for group in self._groups['college'].values()]
+        rows.sort(key=lambda row: (-row['average_rating'], row['average_fee']))
+        return pd.DataFrame(rows)
+
+    def location_statistics(self) -> pd.DataFrame:
+        """Same columns and order as the location statistics GROUP BY query"""
+        with self._lock:
+            rows = [{
+                'Location': group.key,
+                'total_colleges': len(group.members),
+                'total_courses': group.count,
+                'average_fee': group.metrics['fee'].mean,
+                'average_rating': group.metrics['rating'].mean,
+                'total_seats': group.metrics['total_seats'].total
+            } for group in self._groups['location'].values()]
+        rows.sort(key=lambda row: (-row['total_colleges'], -row['average_rating']))
+        return pd.DataFrame(rows)
+
+    def fee_distribution(self) -> pd.DataFrame:
+        """Same columns and order as the fee distribution GROUP BY query"""
+        with self._lock:
+            rows = [{
+                'course_name': group.key,
+                'min_fee': group.metrics['fee'].minimum,
+                'max_fee': group.metrics['fee'].maximum,
+                'avg_fee': group.metrics['fee'].mean,
+                'fee_std_dev': group.metrics['fee'].std_dev,
+                'colleges_count': group.count
+            } for group in self._groups['course'].values()]
+        rows.sort(key=lambda row: -row['avg_fee'])
+        return pd.DataFrame(rows)
+
+    def _add(self, item: Any):
+        for name, (key_of, metrics, member_of) in GROUPINGS.items():
+            key = key_of(item)
+            group = self._groups[name].get(key)
+            if group is None:
+                group = self._groups[name][key] = AggregateGroup(key, metrics, member_of is not None)
+            group.count += 1
+            group.sample = item
+            for metric, stats in group.metrics.items():
+                stats.add(_METRICS[metric](item))
+            if member_of is not None:
+                group.members[member_of(item)] += 1
+
+    def _remove(self, item: Any, stale: set):
+        for name, (key_of, _, member_of) in GROUPINGS.items():
+            key = key_of(item)
+            group = self._groups[name][key]
+            group.count -= 1
+            if group.count == 0:
+                del self._groups[name][key]
+                stale.discard((name, key))
+                continue
+            for metric, stats in group.metrics.items():
+                if stats.remove(_METRICS[metric](item)):
+                    stale.add((name, key))
+            if member_of is not None:
+                member = member_of(item)
+                group.members[member] -= 1
+                if not group.members[member]:
+                    del group.members[member]
+            if group.sample is item:
+                group.sample = None
+                stale.add((name, key))
+
+    def _recompute_extremes(self, items: Iterable[Any], stale: set):
+        """Rebuild min/max (and the descriptive sample) of the given groups in one pass"""
+        by_grouping: Dict[str, set] = {}
+        for name, key in stale:
+            group = self._groups[name].get(key)
+            if group is not None:
+                for stats in group.metrics.values():
+                    stats.reset_extremes()
+                by_grouping.setdefault(name, set()).add(key)
+        for item in items:
+            for name, keys in by_grouping.items():
+                key = GROUPINGS[name][0](item)
+                if key in keys:
+                    group = self._groups[name][key]
+                    group.sample = item
+                    for metric, stats in group.metrics.items():
+                        stats.observe_extreme(_METRICS[metric](item))
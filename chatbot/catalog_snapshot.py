@@ -0,0 +1,158 @@
+import threading
+import time
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A running refresher whose last successful probe is older than this many
+# refresh intervals (e.g. a probe hanging on a stalled server) reports stale
+STALE_AFTER_INTERVALS = 2
+
+class CatalogUnavailable(RuntimeError):
+    """Raised to requests while the background refresher has not published a snapshot yet"""
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable copy of the College ⋈ Department ⋈ Courses join"""
+    version: Any
+    colleges: tuple
+    loaded_at: float = field(default_factory=time.time)
+
+    def __len__(self) -> int:
+        return len(self.colleges)
+
+class CatalogSnapshotManager:
+    """
+    Read-through holder for the in-process catalog snapshot.
+
+    A cheap change marker is probed on an interval; the full catalog is only
+    reloaded when the marker moves. New snapshots are published by replacing
+    a single reference, so readers never observe a half-built catalog.
+
+    Once the background refresher is started, requests never load: get()
+    raises CatalogUnavailable until the first snapshot is published. Without
+    it, the first get() loads with each statement limited to request_timeout.
+    """
+
+    def __init__(self, load: Callable[[Optional[float]], List[Any]], probe: Callable[[], Any],
+                 refresh_interval: float = 30.0, request_timeout: Optional[float] = None):
+        """
+        Args:
+            load: Returns the full list of catalog entries, called with the
+                seconds each statement may run (None for no limit)
+            probe: Returns a value that changes whenever the catalog changes
+            refresh_interval: Seconds between change-marker probes in the background
+            request_timeout: Statement limit for loads made by get() (None for no limit)
+        """
+        self._load = load
+        self._probe = probe
+        self.refresh_interval = refresh_interval
+        self.request_timeout = request_timeout
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._refresh_lock = threading.Lock()
+        self._listeners: List[Callable[[Optional[CatalogSnapshot], CatalogSnapshot], None]] = []
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_error: Optional[Exception] = None
+        self._checked_at = float('-inf')
+
+    def get(self) -> CatalogSnapshot:
+        """
+        Return the current snapshot, loading it on first use without a background refresher
+
+        Raises:
+            CatalogUnavailable: The background refresher has not published a snapshot yet
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            if self.is_running:
+                raise CatalogUnavailable("The catalog snapshot is still loading in the background")
+            self.refresh(timeout=self.request_timeout)
+            snapshot = self._snapshot
+        return snapshot
+
+    @property
+    def current(self) -> Optional[CatalogSnapshot]:
+        """The last published snapshot without triggering a load"""
+        return self._snapshot
+
+    @property
+    def is_running(self) -> bool:
+        """True while the background refresher thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def is_stale(self) -> bool:
+        """
+        True when the snapshot may be out of date: the latest refresh attempt
+        failed, or the background refresher has not completed a probe for
+        STALE_AFTER_INTERVALS refresh intervals
+        """
+        if self.last_error is not None:
+            return True
+        return self.is_running and time.monotonic() - self._checked_at > STALE_AFTER_INTERVALS * self.refresh_interval
+
+    def refresh(self, force: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Reload the catalog if the change marker moved
+
+        Args:
+            force: Reload even if the marker did not move
+            timeout: Seconds each load statement may run (None for no limit)
+
+        Returns:
+            True if a new snapshot was published
+        """
+        with self._refresh_lock:
+            try:
+                version = self._probe()
+                self._checked_at = time.monotonic()
+                previous = self._snapshot
+                if not force and previous is not None and previous.version == version:
+                    self.last_error = None
+                    return False
+                snapshot = CatalogSnapshot(version=version, colleges=tuple(self._load(timeout)))
+            except Exception as e:
+                self.last_error = e
+                raise
+            self._snapshot = snapshot
+            self.last_error = None
+        logger.info(f"Catalog snapshot refreshed: {len(snapshot)} programs (version {version}).")
+        for listener in list(self._listeners):
+            try:
+                listener(previous, snapshot)
+            except Exception as e:
+                logger.error(f"Catalog snapshot listener failed: {e}")
+        return True
+
+    def add_listener(self, callback: Callable[[Optional[CatalogSnapshot], CatalogSnapshot], None]):
+        """Register a callback invoked with (old, new) after each swap"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Start refreshing in a background daemon thread"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        # Counts as checked until the first probe has had an interval to finish
+        self._checked_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="catalog-snapshot-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the background refresher"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.refresh_interval)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last good snapshot
+                logger.warning(f"Catalog snapshot refresh failed: {e}")
+            self._stop.wait(self.refresh_interval)
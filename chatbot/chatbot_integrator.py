@@ -11,25 +11,32 @@ if parent_dir not in sys.path:
 
 from intent_entity.chatbot_pipeline import ChatbotPipeline
 from sql_builder import CollegeDataExtractor, DatabaseConfig, CollegeInfo
+from query_builder import CatalogQuery, Condition, Op, OrderBy, Predicate
 from recommendation_engine import StudentProfile, CollegeRecommendationSystem
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Intents ranked with the full multi-factor scoring instead of the selected comparison factors
+FULL_SCORING_INTENTS = ('Recommend', 'Best')
+
 class ChatbotIntegrator:
     """
     Integrates the chatbot pipeline (intent+entity) with SQL builder and recommendation engine
     to provide end-to-end college recommendation functionality.
     """
     
-    def __init__(self, pipeline_path: str = 'intent_entity', db_config: Optional[DatabaseConfig] = None):
+    def __init__(self, pipeline_path: str = 'intent_entity', db_config: Optional[DatabaseConfig] = None,
+                 snapshot_refresh_interval: Optional[float] = 30.0):
         """
         Initialize the integrator with pipeline, SQL builder, and recommendation engine
         
         Args:
             pipeline_path: Path to the intent and entity recognition models
             db_config: Database configuration for SQL queries
+            snapshot_refresh_interval: Seconds between catalog change checks for the
+                in-memory catalog snapshot (None disables the snapshot)
         """
         # Initialize chatbot pipeline for intent and entity recognition
         self.pipeline = ChatbotPipeline(
@@ -44,112 +51,85 @@ class ChatbotIntegrator:
                 database='CollegeInfoSystem',
                 user='root',
                 password='',
-                port=3306
+                port=3306,
+                statement_timeout=5.0  # keep chatbot turns bounded when MySQL stalls
             )
         self.db_extractor = CollegeDataExtractor(db_config)
+        if snapshot_refresh_interval is not None:
+            self.db_extractor.enable_catalog_snapshot(refresh_interval=snapshot_refresh_interval)
         
-        # Initialize recommendation engine
+        # Initialize recommendation engine; with the snapshot enabled its data is loaded
+        # and kept current in the background instead of on the first request
         self.recommender = CollegeRecommendationSystem(self.db_extractor)
+        if snapshot_refresh_interval is not None:
+            self.recommender.start_background_refresh(interval=snapshot_refresh_interval)
     
-    def map_intent_to_sql(self, intent: str, entities: Dict[str, List[str]]) -> Tuple[str, List[Any]]:
+    def build_intent_query(self, intent: str, entities: Dict[str, List[str]]) -> CatalogQuery:
         """
-        Map detected intent and entities to appropriate SQL query
+        Map detected intent and entities to a typed catalog query
         
         Args:
             intent: The detected intent from the pipeline
             entities: Dictionary of entity types and their values
             
         Returns:
-            Tuple of (SQL query string, parameter list)
-        """
-        # Base query - can be expanded for different intents
-        base_query = """
-        SELECT 
-            c.CollegeId, c.Name AS CollegeName, c.Location, c.Type, 
-            c.ContactNumber, c.Email, c.HostelAvailability, c.Latitude, c.Longitude,
-            d.DepartmentId, d.Name AS DepartmentName,
-            co.CourseId, co.Name AS CourseName, co.AverageCutoffRank, co.Fee, 
-            co.TotalSeats, co.FacultyToStudentRatio, co.PassPercentage, 
-            co.InternshipOpportunities, co.GereralScholarship, co.SemesterScholarship,
-            co.TotalQuotas, co.DurationInYears, co.AdmissionProcess, co.Rating
-        FROM College c
-        LEFT JOIN Department d ON c.CollegeId = d.CollegeId
-        LEFT JOIN Courses co ON d.DepartmentId = co.DepartmentId
-        WHERE co.CourseId IS NOT NULL
+            Canonical CatalogQuery (equivalent entity sets give equal queries)
         """
-        
         conditions = []
-        params = []
         
         # Process entity types and add appropriate WHERE conditions
         if 'COLLEGE' in entities:
-            college_names = entities['COLLEGE']
-            or_conditions = []
-            for name in college_names:
-                or_conditions.append("c.Name LIKE %s")
-                params.append(f"%{name}%")
-            if or_conditions:
-                conditions.append(f"({' OR '.join(or_conditions)})")
+            conditions.append(Condition.any_of(
+                Predicate('college_name', Op.CONTAINS, name) for name in entities['COLLEGE']))
         
         if 'LOCATION' in entities:
-            locations = entities['LOCATION']
-            or_conditions = []
-            for location in locations:
-                or_conditions.append("c.Location LIKE %s")
-                params.append(f"%{location}%")
-            if or_conditions:
-                conditions.append(f"({' OR '.join(or_conditions)})")
+            conditions.append(Condition.any_of(
+                Predicate('location', Op.CONTAINS, location) for location in entities['LOCATION']))
         
         if 'COURSE' in entities or 'DEPARTMENT' in entities:
-            course_dept_conditions = []
-            
-            if 'COURSE' in entities:
-                for course in entities['COURSE']:
-                    course_dept_conditions.append("co.Name LIKE %s")
-                    params.append(f"%{course}%")
-            
-            if 'DEPARTMENT' in entities:
-                for dept in entities['DEPARTMENT']:
-                    course_dept_conditions.append("d.Name LIKE %s")
-                    params.append(f"%{dept}%")
-            
-            if course_dept_conditions:
-                conditions.append(f"({' OR '.join(course_dept_conditions)})")
+            course_dept_predicates = [Predicate('course_name', Op.CONTAINS, course)
+                                      for course in entities.get('COURSE', [])]
+            course_dept_predicates += [Predicate('department_name', Op.CONTAINS, dept)
+                                       for dept in entities.get('DEPARTMENT', [])]
+            conditions.append(Condition.any_of(course_dept_predicates))
         
         if 'TYPE' in entities:
-            college_types = entities['TYPE']
-            or_conditions = []
-            for ctype in college_types:
-                or_conditions.append("c.Type = %s")
-                params.append(ctype)
-            if or_conditions:
-                conditions.append(f"({' OR '.join(or_conditions)})")
+            conditions.append(Condition.any_of(
+                Predicate('college_type', Op.EQUALS, ctype) for ctype in entities['TYPE']))
         
         if 'HOSTEL' in entities and len(entities['HOSTEL']) > 0:
             # Assuming HOSTEL entity is detected as "YES", "AVAILABLE", etc.
-            conditions.append("c.HostelAvailability = TRUE")
+            conditions.append(Condition.any_of([Predicate('hostel_availability', Op.IS_TRUE)]))
         
         if 'MAX_FEE' in entities and len(entities['MAX_FEE']) > 0:
             try:
                 max_fee = float(entities['MAX_FEE'][0])
-                conditions.append("co.Fee <= %s")
-                params.append(max_fee)
+                conditions.append(Condition.any_of([Predicate('fee', Op.LESS_EQUAL, max_fee)]))
             except (ValueError, TypeError):
                 logger.warning(f"Invalid MAX_FEE entity: {entities['MAX_FEE'][0]}")
         
-        # Add WHERE conditions to base query if any
-        if conditions:
-            base_query += " AND " + " AND ".join(conditions)
-        
         # Add ordering based on intent
         if intent == "find_affordable_college":
-            base_query += " ORDER BY co.Fee ASC"
+            order_by = [OrderBy('fee')]
         elif intent == "find_top_rated_college":
-            base_query += " ORDER BY co.Rating DESC"
+            order_by = [OrderBy('rating', descending=True)]
         else:
-            base_query += " ORDER BY c.Name, d.Name, co.Name"
+            order_by = [OrderBy('college_name'), OrderBy('department_name'), OrderBy('course_name')]
+        
+        return CatalogQuery.build(conditions, order_by)
+    
+    def map_intent_to_sql(self, intent: str, entities: Dict[str, List[str]]) -> Tuple[str, List[Any]]:
+        """
+        Map detected intent and entities to appropriate SQL query
         
-        return base_query, params
+        Args:
+            intent: The detected intent from the pipeline
+            entities: Dictionary of entity types and their values
+            
+        Returns:
+            Tuple of (SQL query string, parameter list)
+        """
+        return self.build_intent_query(intent, entities).to_sql()
     
     def build_student_profile(self, entities: Dict[str, List[str]]) -> StudentProfile:
         """
@@ -195,12 +175,13 @@ class ChatbotIntegrator:
         
         return profile
     
-    def process_query(self, user_query: str) -> Dict[str, Any]:
+    def process_query(self, user_query: str, user_location: Optional[Tuple[float, float]] = None) -> Dict[str, Any]:
         """
         Process a user query through the entire pipeline and return recommendations
         
         Args:
             user_query: Natural language query from the user
+            user_location: Optional (lat, lng) of the user, answers the Nearest intent
             
         Returns:
             Dictionary with pipeline results, SQL results, and recommendations
@@ -216,12 +197,14 @@ class ChatbotIntegrator:
         entities = pipeline_result['entities']
         confidence = pipeline_result['confidence']
         
-        # Step 2: Map intent/entities to SQL query
-        sql_query, params = self.map_intent_to_sql(intent, entities)
+        # Step 2: Map intent/entities to a catalog query
+        catalog_query = self.build_intent_query(intent, entities)
+        sql_query, params = catalog_query.to_sql()
         
         try:
-            # Step 3: Execute SQL query
-            sql_results = self.db_extractor.get_colleges_by_filters(sql_query, params)
+            # Step 3: Execute the query (served from the catalog snapshot when enabled,
+            # marked stale while the snapshot cannot be refreshed)
+            sql_results, stale = self.db_extractor.get_colleges_with_fallback(catalog_query)
             
             # Step 4: Build student profile from entities
             student_profile = self.build_student_profile(entities)
@@ -245,21 +228,36 @@ class ChatbotIntegrator:
             if not comparison_factors:
                 comparison_factors = ['location', 'fee', 'pass_rate']
             
-            # Step 6: Get recommendations based on comparison factors
-            recommendations = self.recommender.compare_colleges(
-                profile=student_profile,
-                factors=comparison_factors,
-                top_n=5
-            )
+            # Step 6: Get recommendations, from all score components for recommendation
+            # intents and from the comparison factors otherwise
+            if intent in FULL_SCORING_INTENTS:
+                scoring_mode = 'full'
+                recommendations = self.recommender.recommend_colleges(profile=student_profile, top_n=5)
+            else:
+                scoring_mode = 'factors'
+                recommendations = self.recommender.compare_colleges(
+                    profile=student_profile,
+                    factors=comparison_factors,
+                    top_n=5
+                )
+            
+            # Nearest intent: closest programs from the geo index instead of a catalog scan
+            nearest = []
+            if intent == 'Nearest' and user_location is not None:
+                nearest = self.recommender.nearest_colleges(*user_location, k=5)
             
             # Step 7: Return complete result
             return {
                 **pipeline_result,  # Include original pipeline results
                 'sql_query': sql_query,
                 'sql_params': params,
+                'query_key': catalog_query.cache_key,
                 'sql_results_count': len(sql_results),
+                'stale': stale,
                 'comparison_factors': comparison_factors,
+                'scoring_mode': scoring_mode,
                 'recommendations': [rec.to_dict() for rec in recommendations],
+                'nearest': nearest,
                 'status': 'success'
             }
             
@@ -0,0 +1,254 @@
+import threading
+import time
+import logging
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Deque, List, Optional, Tuple
+
+from mysql.connector.errors import PoolError
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class PoolStats:
+    """Counters describing how the connection pool is being used"""
+    checkouts: int = 0
+    connections_created: int = 0
+    connections_discarded: int = 0
+    health_check_failures: int = 0
+    idle_expirations: int = 0
+    total_wait_time: float = 0.0
+    max_wait_time: float = 0.0
+    statement_hits: int = 0
+    statement_misses: int = 0
+    statement_evictions: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for logging and monitoring"""
+        return {
+            'checkouts': self.checkouts,
+            'connections_created': self.connections_created,
+            'connections_discarded': self.connections_discarded,
+            'health_check_failures': self.health_check_failures,
+            'idle_expirations': self.idle_expirations,
+            'total_wait_time': self.total_wait_time,
+            'max_wait_time': self.max_wait_time,
+            'average_wait_time': self.total_wait_time / self.checkouts if self.checkouts else 0.0,
+            'statement_hits': self.statement_hits,
+            'statement_misses': self.statement_misses,
+            'statement_evictions': self.statement_evictions
+        }
+
+class StatementCache:
+    """
+    LRU of server-side prepared statements belonging to one connection.
+
+    Each entry is a prepared cursor plus the exact SQL string it was prepared
+    with; MySQL Connector only skips re-preparing when it is handed that same
+    string object again. Only the thread that has the connection checked out
+    touches the cache, so it needs no lock of its own.
+    """
+
+    def __init__(self, connection: Any, capacity: int, record: Callable[[str], None]):
+        self.connection = connection
+        self.capacity = capacity
+        self._record = record
+        self._statements: "OrderedDict[str, Tuple[Any, str]]" = OrderedDict()
+
+    def execute(self, shape_key: str, sql: str, params: Optional[List[Any]] = None) -> Any:
+        """Execute on the prepared statement for this shape, preparing it on a miss"""
+        entry = self._statements.get(shape_key)
+        if entry is not None:
+            self._statements.move_to_end(shape_key)
+            self._record('statement_hits')
+        else:
+            entry = (self.connection.cursor(prepared=True), sql)
+            self._statements[shape_key] = entry
+            self._record('statement_misses')
+            if len(self._statements) > self.capacity:
+                _, (evicted, _) = self._statements.popitem(last=False)
+                self._record('statement_evictions')
+                # Closing the cursor deallocates the statement on the server
+                evicted.close()
+        cursor, prepared_sql = entry
+        cursor.execute(prepared_sql, params or ())
+        return cursor
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+@dataclass
+class PooledConnection:
+    """A live connection owned by the pool"""
+    connection: Any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    statements: Optional[StatementCache] = None
+
+class ConnectionPool:
+    """
+    Fixed-size pool of reusable database connections.
+
+    Idle connections are kept in LIFO order so the most recently used (and
+    therefore most likely still alive) connection is handed out first.
+    """
+
+    def __init__(self, connect: Callable[[], Any], size: int = 5,
+                 idle_timeout: float = 300.0, health_check: bool = True,
+                 checkout_timeout: float = 10.0, statement_cache_size: int = 0):
+        """
+        Args:
+            connect: Factory returning a new open connection
+            size: Maximum number of connections checked out at once
+            idle_timeout: Seconds after which an idle connection is closed instead of reused
+            health_check: Ping connections on checkout and replace dead ones
+            checkout_timeout: Seconds to wait for a free connection before failing
+            statement_cache_size: Prepared statements kept per connection (0 disables)
+        """
+        if size < 1:
+            raise ValueError("Connection pool size must be at least 1")
+        self._connect = connect
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.health_check = health_check
+        self.checkout_timeout = checkout_timeout
+        self.statement_cache_size = statement_cache_size
+        self._idle: Deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self._stats = PoolStats()
+        self._closed = False
+
+    def warm_up(self, count: int = None) -> int:
+        """Open connections ahead of the first request; returns how many were opened"""
+        count = self.size if count is None else min(count, self.size)
+        opened = 0
+        with self._lock:
+            missing = count - len(self._idle)
+        for _ in range(max(0, missing)):
+            pooled = self._create()
+            with self._lock:
+                self._idle.append(pooled)
+            opened += 1
+        logger.info(f"Connection pool warmed up with {opened} connections.")
+        return opened
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection for the duration of the block"""
+        with self.checkout() as pooled:
+            yield pooled.connection
+
+    @contextmanager
+    def checkout(self):
+        """Check out a PooledConnection (with its statement cache) for the duration of the block"""
+        pooled = self._checkout()
+        healthy = True
+        try:
+            yield pooled
+        except BaseException:
+            # The connection may hold unread results (e.g. an abandoned
+            # streaming cursor) or a broken session
+            healthy = False
+            raise
+        finally:
+            self._checkin(pooled, healthy)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            data = self._stats.to_dict()
+            data['idle_connections'] = len(self._idle)
+            data['pool_size'] = self.size
+        return data
+
+    def close(self):
+        """Close every idle connection and refuse further checkouts"""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+        for pooled in idle:
+            self._close_quietly(pooled)
+
+    def _checkout(self) -> PooledConnection:
+        if self._closed:
+            raise PoolError("Connection pool is closed")
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise PoolError(f"No connection available within {self.checkout_timeout}s (pool size {self.size})")
+        waited = time.monotonic() - started
+        try:
+            pooled = self._take_idle()
+            if pooled is None:
+                pooled = self._create()
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            self._stats.checkouts += 1
+            self._stats.total_wait_time += waited
+            self._stats.max_wait_time = max(self._stats.max_wait_time, waited)
+        return pooled
+
+    def _take_idle(self):
+        """Pop the freshest usable idle connection, discarding stale or dead ones"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                pooled = self._idle.pop()
+            now = time.monotonic()
+            if self.idle_timeout and now - pooled.last_used > self.idle_timeout:
+                with self._lock:
+                    self._stats.idle_expirations += 1
+                self._discard(pooled)
+                continue
+            if self.health_check and not self._is_alive(pooled):
+                with self._lock:
+                    self._stats.health_check_failures += 1
+                self._discard(pooled)
+                continue
+            return pooled
+
+    def _checkin(self, pooled: PooledConnection, healthy: bool):
+        try:
+            if healthy and not self._closed:
+                pooled.last_used = time.monotonic()
+                with self._lock:
+                    self._idle.append(pooled)
+            else:
+                self._discard(pooled)
+        finally:
+            self._slots.release()
+
+    def _create(self) -> PooledConnection:
+        pooled = PooledConnection(self._connect())
+        if self.statement_cache_size > 0:
+            pooled.statements = StatementCache(pooled.connection, self.statement_cache_size, self._record)
+        with self._lock:
+            self._stats.connections_created += 1
+        return pooled
+
+    def _record(self, counter: str):
+        with self._lock:
+            setattr(self._stats, counter, getattr(self._stats, counter) + 1)
+
+    def _discard(self, pooled: PooledConnection):
+        with self._lock:
+            self._stats.connections_discarded += 1
+        self._close_quietly(pooled)
+
+    @staticmethod
+    def _is_alive(pooled: PooledConnection) -> bool:
+        try:
+            return pooled.connection.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(pooled: PooledConnection):
+        try:
+            pooled.connection.close()
+        except Exception as e:
+            logger.debug(f"Ignoring error while closing pooled connection: {e}")
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from typing import Dict, List, Any, Optional, Tuple
+import numpy as np
 
 # This file contains a stub implementation of data_extractor.py
 # It connects the sql_builder.py module to the recommendation_engine.py module
@@ -90,3 +91,18 @@ class CollegeDataExtractor:
         """Get colleges based on custom query from query builder"""
         # This is a stub - the actual implementation is in sql_builder.py
         pass
+        
+    def get_catalog_columns(self, timeout: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Get the full catalog join as typed column arrays keyed like CollegeInfo.to_dict()"""
+        # This is a stub - the actual implementation is in sql_builder.py
+        pass
+        
+    def get_catalog_version(self, timeout: Optional[float] = None) -> Tuple[Any, ...]:
+        """Return the current catalog change marker"""
+        # This is a stub - the actual implementation is in sql_builder.py
+        pass
+        
+    def get_snapshot_columns(self, snapshot: Any) -> Dict[str, np.ndarray]:
+        """A catalog snapshot as the typed column arrays get_catalog_columns returns"""
+        # This is a stub - the actual implementation is in sql_builder.py
+        pass
@@ -0,0 +1,380 @@
+"""
+Embedded storage backend
+Runs the extractor's queries against an in-process SQLite copy of the
+catalog, loaded from a MySQL dump (sagarmathasql.sql) or from generated
+catalog rows, so queries can be timed without a server or network
+"""
+
+import itertools
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from storage_backend import ResultSet, StorageBackend, WriteStatement
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DUMP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sagarmathasql.sql')
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# Schema the extractor queries against. NOCASE collation matches the
+# case-insensitive comparisons and ordering of MySQL's default collation.
+SCHEMA = {
+    'College': [
+        ('CollegeId', 'INTEGER PRIMARY KEY'), ('Name', 'TEXT NOT NULL COLLATE NOCASE'),
+        ('Location', 'TEXT COLLATE NOCASE'), ('Type', 'TEXT COLLATE NOCASE'),
+        ('ContactNumber', 'TEXT'), ('Email', 'TEXT'), ('HostelAvailability', 'INTEGER'),
+        ('Latitude', 'REAL'), ('Longitude', 'REAL')
+    ],
+    'Department': [
+        ('DepartmentId', 'INTEGER PRIMARY KEY'), ('Name', 'TEXT NOT NULL COLLATE NOCASE'),
+        ('CollegeId', 'INTEGER')
+    ],
+    'Courses': [
+        ('CourseId', 'INTEGER PRIMARY KEY'), ('Name', 'TEXT NOT NULL COLLATE NOCASE'),
+        ('AverageCutoffRank', 'INTEGER'), ('Fee', 'REAL'), ('TotalSeats', 'INTEGER'),
+        ('FacultyToStudentRatio', 'REAL'), ('PassPercentage', 'INTEGER'),
+        ('InternshipOpportunities', 'INTEGER'), ('GereralScholarship', 'INTEGER'),
+        ('SemesterScholarship', 'TEXT'), ('TotalQuotas', 'INTEGER'), ('DurationInYears', 'INTEGER'),
+        ('AdmissionProcess', 'TEXT'), ('Rating', 'REAL'), ('DepartmentId', 'INTEGER')
+    ]
+}
+
+INDEXES = [
+    'CREATE INDEX IX_Department_CollegeId ON Department (CollegeId)',
+    'CREATE INDEX IX_Courses_DepartmentId ON Courses (DepartmentId)',
+    'CREATE INDEX IX_Courses_Fee ON Courses (Fee)',
+    'CREATE INDEX IX_Courses_Rating ON Courses (Rating)',
+    'CREATE INDEX IX_Courses_Name ON Courses (Name)',
+    'CREATE INDEX IX_College_Location ON College (Location)'
+]
+
+# SQLite VM instructions between statement deadline checks
+PROGRESS_INTERVAL = 10_000
+
+# Seconds a write waits for open iter_chunks streams to finish before giving up
+WRITE_WAIT_TIMEOUT = 30.0
+
+# Writes to these tables change the catalog version
+_CATALOG_TABLES = re.compile(r"\b(College|Department|Courses)\b", re.IGNORECASE)
+
+# Dump column names that differ from the names the extractor queries
+COLUMN_ALIASES = {'MAXScholarshipOffered': 'GereralScholarship'}
+
+# Catalog join column -> (table, column) used when loading generated join rows
+_JOIN_COLUMNS = {
+    'College': {'CollegeId': 'CollegeId', 'CollegeName': 'Name', 'Location': 'Location', 'Type': 'Type',
+                'ContactNumber': 'ContactNumber', 'Email': 'Email', 'HostelAvailability': 'HostelAvailability',
+                'Latitude': 'Latitude', 'Longitude': 'Longitude'},
+    'Department': {'DepartmentId': 'DepartmentId', 'DepartmentName': 'Name', 'CollegeId': 'CollegeId'},
+    'Courses': {'CourseId': 'CourseId', 'CourseName': 'Name', 'AverageCutoffRank': 'AverageCutoffRank',
+                'Fee': 'Fee', 'TotalSeats': 'TotalSeats', 'FacultyToStudentRatio': 'FacultyToStudentRatio',
+                'PassPercentage': 'PassPercentage', 'InternshipOpportunities': 'InternshipOpportunities',
+                'GereralScholarship': 'GereralScholarship', 'SemesterScholarship': 'SemesterScholarship',
+                'TotalQuotas': 'TotalQuotas', 'DurationInYears': 'DurationInYears',
+                'AdmissionProcess': 'AdmissionProcess', 'Rating': 'Rating', 'DepartmentId': 'DepartmentId'}
+}
+
+_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>\#[^\n]*|--[^\n]*|/\*.*?\*/)
+  | (?P<string>'(?:[^'\\]|\\.|'')*')
+  | (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<word>`[^`]+`|[A-Za-z_][A-Za-z0-9_]*)
+  | (?P<symbol>[(),;=.])
+""", re.VERBOSE | re.DOTALL)
+
+_LITERALS = {'TRUE': 1, 'FALSE': 0, 'NULL': None}
+
+class _StdDev:
+    """Population standard deviation aggregate (MySQL STDDEV)"""
+
+    def __init__(self):
+        self.count, self.mean, self.m2 = 0, 0.0, 0.0
+
+    def step(self, value):
+        if value is None:
+            return
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def finalize(self):
+        return math.sqrt(self.m2 / self.count) if self.count else None
+
+class EmbeddedBackend(StorageBackend):
+    """
+    In-process SQLite backend holding the catalog in indexed in-memory tables.
+
+    Queries written for MySQL are adapted on the fly (%s placeholders become
+    ?, LIKE gets MySQL's backslash escape), so the extractor's methods return
+    the same columns and row shapes as against a MySQL server.
+
+    Unlike MySQL, a shared-cache SQLite database locks whole tables: a write
+    while another connection has a cursor open on the table fails with
+    "database table is locked". Writes therefore wait (up to
+    WRITE_WAIT_TIMEOUT seconds) until every open iter_chunks stream is
+    exhausted or closed, and new streams wait for a running write. A thread
+    must not write while it is itself iterating a stream; that write times out.
+    """
+
+    name = 'embedded'
+    _instances = itertools.count()
+
+    def __init__(self):
+        # A named shared-cache database lets every thread open its own connection
+        self._uri = f"file:catalog_{next(self._instances)}_{id(self)}?mode=memory&cache=shared"
+        self._local = threading.local()
+        self._anchor = self._connect()
+        self._write_lock = threading.Lock()
+        # Open iter_chunks streams and whether a write is running, guarded by _gate
+        self._gate = threading.Condition()
+        self._open_streams = 0
+        self._writing = False
+        self._version = 0
+        self._create_schema()
+
+    @classmethod
+    def from_sql_dump(cls, path: str = DEFAULT_DUMP_PATH) -> 'EmbeddedBackend':
+        """Load a MySQL dump such as sagarmathasql.sql"""
+        backend = cls()
+        with open(path, encoding='utf-8-sig') as f:
+            tables = parse_sql_dump(f.read())
+        for table, rows in tables.items():
+            backend.insert_rows(table, rows)
+        return backend
+
+    @classmethod
+    def from_catalog_rows(cls, rows: Iterable[Dict[str, Any]]) -> 'EmbeddedBackend':
+        """Load rows shaped like the catalog join (e.g. from synthetic_catalog)"""
+        backend = cls()
+        tables: Dict[str, Dict[Any, Dict[str, Any]]] = {table: {} for table in _JOIN_COLUMNS}
+        for row in rows:
+            for table, columns in _JOIN_COLUMNS.items():
+                record = {column: row.get(join_column) for join_column, column in columns.items()}
+                tables[table].setdefault(record[SCHEMA[table][0][0]], record)
+        for table, records in tables.items():
+            backend.insert_rows(table, list(records.values()))
+        return backend
+
+    def insert_rows(self, table: str, rows: List[Dict[str, Any]]):
+        """Insert rows (dicts keyed by column name) into a catalog table"""
+        columns = [name for name, _ in SCHEMA[table]]
+        placeholders = ', '.join('?' for _ in columns)
+        values = [tuple(row.get(column) for column in columns) for row in rows]
+        with self._exclusive(), self._anchor:
+            self._anchor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({placeholders})", values)
+            self._version += 1
+        logger.info(f"Embedded backend loaded {len(values)} rows into {table}.")
+
+    def execute_transaction(self, statements: List[WriteStatement]):
+        with self._exclusive(), self._anchor:
+            for query, rows in statements:
+                if rows is None:
+                    self._anchor.execute(adapt_query(query))
+                elif rows:
+                    self._anchor.executemany(adapt_query(query), rows)
+            if any(_CATALOG_TABLES.search(query) for query, _ in statements):
+                self._version += 1
+
+    @contextmanager
+    def connection(self):
+        yield self._thread_connection()
+
+    def fetch_all(self, query: str, params: List[Any] = None, timeout: Optional[float] = None) -> ResultSet:
+        connection = self._thread_connection()
+        if timeout:
+            # Abort (OperationalError: interrupted) once the deadline passes
+            deadline = time.monotonic() + timeout
+            connection.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_INTERVAL)
+        try:
+            cursor = connection.execute(adapt_query(query), tuple(params or ()))
+            rows = cursor.fetchall()
+        finally:
+            if timeout:
+                connection.set_progress_handler(None, 0)
+        return _column_names(cursor), rows
+
+    def iter_chunks(self, query: str, params: List[Any] = None, chunk_size: int = 1000,
+                    timeout: Optional[float] = None) -> Iterator[ResultSet]:
+        # A dedicated connection keeps the stream independent of other queries on this thread
+        with self._gate:
+            self._gate.wait_for(lambda: not self._writing)
+            self._open_streams += 1
+        connection = self._connect()
+        if timeout:
+            deadline = time.monotonic() + timeout
+            connection.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_INTERVAL)
+        try:
+            cursor = connection.execute(adapt_query(query), tuple(params or ()))
+            columns = _column_names(cursor)
+            empty = True
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                empty = False
+                yield columns, rows
+            if empty:
+                yield columns, []
+        finally:
+            connection.close()
+            with self._gate:
+                self._open_streams -= 1
+                self._gate.notify_all()
+
+    def catalog_version(self, version_query: str, timeout: Optional[float] = None) -> Tuple[Any, ...]:
+        """Bumped on every write; the MySQL version query does not apply here"""
+        return (self._version,)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._write_lock:
+            counts = {table: self._anchor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in SCHEMA}
+        return {'backend': self.name, 'version': self._version, **{f"{t.lower()}_rows": n for t, n in counts.items()}}
+
+    def close(self):
+        self._anchor.close()
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold the write lock once no stream has a cursor open on the tables"""
+        with self._write_lock:
+            with self._gate:
+                if not self._gate.wait_for(lambda: self._open_streams == 0, WRITE_WAIT_TIMEOUT):
+                    raise sqlite3.OperationalError(
+                        f"Write waited {WRITE_WAIT_TIMEOUT}s for {self._open_streams} open stream(s) to finish")
+                self._writing = True
+            try:
+                yield
+            finally:
+                with self._gate:
+                    self._writing = False
+                    self._gate.notify_all()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+        connection.create_aggregate('STDDEV', 1, _StdDev)
+        return connection
+
+    def _thread_connection(self) -> sqlite3.Connection:
+        connection: Optional[sqlite3.Connection] = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def _create_schema(self):
+        with self._anchor:
+            for table, columns in SCHEMA.items():
+                definition = ', '.join(f"{name} {kind}" for name, kind in columns)
+                self._anchor.execute(f"CREATE TABLE {table} ({definition})")
+            for statement in INDEXES:
+                self._anchor.execute(statement)
+        # Side tables (e.g. CatalogSearchToken) come from the same migrations as MySQL;
+        # *.mysql.sql files hold MySQL-only DDL such as the catalog version triggers
+        for name in sorted(os.listdir(MIGRATIONS_DIR)):
+            if name.endswith('.sql') and not name.endswith('.mysql.sql'):
+                with open(os.path.join(MIGRATIONS_DIR, name), encoding='utf-8') as f:
+                    self._anchor.executescript(f.read())
+
+def adapt_query(query: str) -> str:
+    """Translate MySQL-flavoured SQL with %s placeholders to SQLite"""
+    query = query.replace('%s', '?')
+    return re.sub(r"\bLIKE\s+\?", r"LIKE ? ESCAPE '\\'", query, flags=re.IGNORECASE)
+
+def parse_sql_dump(text: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Parse CREATE TABLE column lists and INSERT ... VALUES rows from a MySQL dump
+
+    Returns:
+        Dictionary mapping canonical table name to rows keyed by the
+        extractor's column names
+    """
+    tokens = [(kind, value) for kind, value in _tokenize(text) if kind not in ('space', 'comment')]
+    canonical = {name.upper(): name for name in SCHEMA}
+    columns: Dict[str, List[str]] = {}
+    tables: Dict[str, List[Dict[str, Any]]] = {name: [] for name in SCHEMA}
+
+    for statement in _split_statements(tokens):
+        words = [value.upper() for kind, value in statement[:3] if kind == 'word']
+        if words[:2] == ['CREATE', 'TABLE']:
+            table = canonical.get(_identifier(statement[2][1]).upper())
+            if table:
+                columns[table] = _column_definitions(statement[3:])
+        elif words[:2] == ['INSERT', 'INTO']:
+            table = canonical.get(_identifier(statement[2][1]).upper())
+            if table is None or table not in columns:
+                continue
+            names = [COLUMN_ALIASES.get(name, name) for name in columns[table]]
+            for values in _value_tuples(statement[3:]):
+                tables[table].append(dict(zip(names, values)))
+    return tables
+
+def _tokenize(text: str) -> Iterator[Tuple[str, str]]:
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected character in SQL dump at offset {position}: {text[position]!r}")
+        position = match.end()
+        yield match.lastgroup, match.group()
+
+def _split_statements(tokens: List[Tuple[str, str]]) -> Iterator[List[Tuple[str, str]]]:
+    statement = []
+    for token in tokens:
+        if token == ('symbol', ';'):
+            if statement:
+                yield statement
+            statement = []
+        else:
+            statement.append(token)
+    if statement:
+        yield statement
+
+def _identifier(value: str) -> str:
+    return value.strip('`')
+
+def _column_definitions(tokens: List[Tuple[str, str]]) -> List[str]:
+    """Column names from the parenthesised body of a CREATE TABLE"""
+    names, depth, expect_name = [], 0, False
+    for kind, value in tokens:
+        if value == '(':
+            depth += 1
+            expect_name = depth == 1
+        elif value == ')':
+            depth -= 1
+        elif value == ',' and depth == 1:
+            expect_name = True
+        elif expect_name and kind == 'word':
+            expect_name = False
+            if value.upper() not in ('PRIMARY', 'KEY', 'FOREIGN', 'UNIQUE', 'INDEX', 'CONSTRAINT'):
+                names.append(_identifier(value))
+    return names
+
+def _value_tuples(tokens: List[Tuple[str, str]]) -> Iterator[List[Any]]:
+    """Literal rows from the VALUES clause of an INSERT"""
+    row: Optional[List[Any]] = None
+    for kind, value in tokens:
+        if value == '(':
+            row = []
+        elif value == ')':
+            if row is not None:
+                yield row
+            row = None
+        elif row is None or value == ',':
+            continue
+        elif kind == 'string':
+            row.append(value[1:-1].replace("''", "'").replace("\\'", "'"))
+        elif kind == 'number':
+            row.append(float(value) if '.' in value else int(value))
+        elif kind == 'word':
+            row.append(_LITERALS.get(value.upper(), value))
+
+def _column_names(cursor: sqlite3.Cursor) -> Tuple[str, ...]:
+    return tuple(description[0] for description in cursor.description or ())
@@ -0,0 +1,109 @@
+"""
+Program feature matrix
+Per-column min/max/median of the numeric program columns and a min-max
+normalized float32 matrix, built once per catalog load and patched in
+place when programs change
+"""
+
+import warnings
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Numeric CollegeInfo columns, in matrix column order
+FEATURE_COLUMNS = ('fee', 'rating', 'pass_percentage', 'average_cutoff_rank', 'faculty_to_student_ratio',
+                   'general_scholarship', 'total_seats', 'latitude', 'longitude')
+
+class FeatureMatrix:
+    """
+    Normalized program features plus column statistics.
+
+    values is the row-major float32 matrix scaled to [0, 1] per column,
+    with unknown values set to the column median. The raw features are not
+    kept: they already live in the engine DataFrame, which the scorers read
+    directly and update_rows() takes the edited values from.
+    """
+
+    def __init__(self, raw: np.ndarray, columns: Sequence[str] = FEATURE_COLUMNS):
+        """
+        Args:
+            raw: (programs x columns) feature values, NaN where unknown; not retained
+            columns: Column names, in order
+        """
+        self.columns = tuple(columns)
+        self.positions: Dict[str, int] = {name: index for index, name in enumerate(self.columns)}
+        raw = np.asarray(raw, dtype=np.float64)
+        self._refresh_statistics(raw)
+        self.values = np.ascontiguousarray(self._normalize(raw), dtype=np.float32)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: Sequence[str] = FEATURE_COLUMNS) -> 'FeatureMatrix':
+        """Build from the engine DataFrame"""
+        return cls(_raw_features(df, columns), columns)
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def statistics(self, name: str) -> Dict[str, float]:
+        """min, max and median of one feature"""
+        index = self.positions[name]
+        return {'min': float(self.minimum[index]), 'max': float(self.maximum[index]),
+                'median': float(self.median[index])}
+
+    def copy(self) -> 'FeatureMatrix':
+        """Independent copy, for updating without disturbing readers of this one"""
+        clone = object.__new__(FeatureMatrix)
+        clone.__dict__.update(self.__dict__)
+        for name in ('values', 'minimum', 'maximum', 'median'):
+            setattr(clone, name, getattr(self, name).copy(order='K'))
+        return clone
+
+    def update_rows(self, positions: Sequence[int], df: pd.DataFrame):
+        """
+        Take the edited features of some programs from the engine DataFrame
+
+        Statistics are recomputed from the whole frame, but only the changed
+        rows are renormalized, plus whole columns whose min or max moved.
+
+        Args:
+            positions: Row positions that changed
+            df: Engine DataFrame already holding the new values, rows in matrix order
+        """
+        positions = np.asarray(positions, dtype=np.intp)
+        if not len(positions):
+            return
+        raw = _raw_features(df, self.columns)
+        minimum, maximum = self.minimum.copy(), self.maximum.copy()
+        self._refresh_statistics(raw)
+        moved = np.flatnonzero(~(_same(minimum, self.minimum) & _same(maximum, self.maximum)))
+        if len(moved):
+            self.values[:, moved] = self._normalize(raw[:, moved], moved)
+        self.values[positions] = self._normalize(raw[positions])
+
+    def _refresh_statistics(self, raw: np.ndarray):
+        # All-NaN columns (e.g. no coordinates at all) give NaN statistics
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.minimum = np.nanmin(raw, axis=0, initial=np.inf)
+            self.maximum = np.nanmax(raw, axis=0, initial=-np.inf)
+            self.median = np.nanmedian(raw, axis=0)
+        self.minimum[np.isinf(self.minimum)] = np.nan
+        self.maximum[np.isinf(self.maximum)] = np.nan
+
+    def _normalize(self, raw: np.ndarray, columns: np.ndarray = None) -> np.ndarray:
+        """Min-max scale raw values of the given column indexes (all columns by default)"""
+        columns = slice(None) if columns is None else columns
+        minimum, maximum, median = self.minimum[columns], self.maximum[columns], self.median[columns]
+        span = np.where(maximum > minimum, maximum - minimum, 1.0)
+        filled = np.where(np.isnan(raw), median, raw)
+        return np.nan_to_num((filled - minimum) / span, nan=0.0)
+
+def _raw_features(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """(programs x columns) float64 features of a frame; a temporary, dropped once normalized"""
+    if not len(columns):
+        return np.empty((len(df), 0))
+    return np.column_stack([df[name].to_numpy(dtype=np.float64) for name in columns])
+
+def _same(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return (a == b) | (np.isnan(a) & np.isnan(b))
@@ -0,0 +1,76 @@
+"""
+Geospatial index over program coordinates
+Radius and k-nearest lookups on a haversine BallTree, so proximity
+queries only touch the programs near the student
+"""
+
+from typing import Tuple
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371
+
+class GeoIndex:
+    """
+    BallTree (haversine metric) over the latitude/longitude columns.
+
+    Positions returned are rows of the arrays the index was built from.
+    Programs without coordinates are left out of the tree and never match.
+    """
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray, leaf_size: int = 40):
+        """
+        Args:
+            latitudes: Program latitudes in degrees (NaN if unknown)
+            longitudes: Program longitudes in degrees (NaN if unknown)
+            leaf_size: BallTree leaf size
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        known = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        self._positions = np.flatnonzero(known)
+        points = np.radians(np.column_stack([latitudes[known], longitudes[known]]))
+        self._tree = BallTree(points, metric='haversine', leaf_size=leaf_size) if len(points) else None
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def within_many(self, points, radii_km) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Radius query for several points at once
+
+        Args:
+            points: Sequence of (lat, lon) pairs
+            radii_km: One radius per point
+
+        Returns:
+            Object arrays of per-point positions and distances, each in position order
+        """
+        count = len(points)
+        if self._tree is None or count == 0:
+            empty = np.empty(count, dtype=object)
+            for row in range(count):
+                empty[row] = np.empty(0, dtype=np.intp)
+            return empty, empty.copy()
+        radii = np.asarray(radii_km, dtype=np.float64) / EARTH_RADIUS_KM
+        indices, distances = self._tree.query_radius(np.radians(np.asarray(points, dtype=np.float64)), radii,
+                                                     return_distance=True, sort_results=False)
+        for row in range(count):
+            order = np.argsort(indices[row], kind='stable')
+            indices[row] = self._positions[indices[row][order]]
+            distances[row] = distances[row][order] * EARTH_RADIUS_KM
+        return indices, distances
+
+    def nearest(self, lat: float, lon: float, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        The k programs closest to a point
+
+        Returns:
+            (positions, distances in km), nearest first
+        """
+        k = min(k, len(self._positions))
+        if k <= 0:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.float64)
+        distances, indices = self._tree.query(np.radians([[lat, lon]]), k=k)
+        return self._positions[indices[0]], distances[0] * EARTH_RADIUS_KM
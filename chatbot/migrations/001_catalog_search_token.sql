@@ -0,0 +1,16 @@
+-- Search-token side table for entity filters (query_builder.Op.HAS_TOKENS).
+-- One row per distinct upper-case word of College.Name, College.Location,
+-- Department.Name and Courses.Name. Field is the catalog field the word came
+-- from ('college_name', 'location', 'department_name', 'course_name') and
+-- EntityId the CollegeId, DepartmentId or CourseId of the row it belongs to.
+--
+-- The table is filled and kept current by CollegeDataExtractor (token_search=True):
+-- the catalog snapshot rewrites it whenever the catalog change marker moves.
+-- CollegeDataExtractor.rebuild_search_tokens() forces a rewrite.
+
+CREATE TABLE IF NOT EXISTS CatalogSearchToken (
+    Token VARCHAR(64) NOT NULL,
+    Field VARCHAR(32) NOT NULL,
+    EntityId INT NOT NULL,
+    PRIMARY KEY (Field, Token, EntityId)
+);
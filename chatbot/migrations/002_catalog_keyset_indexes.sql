@@ -0,0 +1,10 @@
+-- Composite indexes serving the keyset-paginated listings
+-- (CollegeDataExtractor.get_top_colleges_page / get_affordable_courses_page).
+-- Each matches its ORDER BY, so a page starts with an index seek
+-- wherever it is in the listing.
+
+-- Top rated: Rating DESC, PassPercentage DESC, CourseId DESC (scanned backwards)
+CREATE INDEX IX_Courses_TopRated ON Courses (Rating, PassPercentage, CourseId);
+
+-- Affordable: Fee ASC, Rating DESC, CourseId ASC
+CREATE INDEX IX_Courses_Affordable ON Courses (Fee, Rating DESC, CourseId);
@@ -0,0 +1,35 @@
+-- Catalog change marker (DEFAULT_CATALOG_VERSION_QUERY in sql_builder.py).
+-- CatalogVersion holds a single counter that these triggers bump on every
+-- insert, update or delete in College, Department and Courses, so probing
+-- for catalog changes is a primary-key lookup instead of a table scan.
+--
+-- MySQL only (single-statement trigger bodies); the embedded backend skips
+-- *.mysql.sql files and tracks its catalog version itself.
+
+CREATE TABLE IF NOT EXISTS CatalogVersion (
+    Id TINYINT NOT NULL PRIMARY KEY,
+    Version BIGINT NOT NULL
+);
+
+INSERT IGNORE INTO CatalogVersion (Id, Version) VALUES (1, 0);
+
+CREATE TRIGGER TR_College_Insert_Version AFTER INSERT ON College
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+CREATE TRIGGER TR_College_Update_Version AFTER UPDATE ON College
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+CREATE TRIGGER TR_College_Delete_Version AFTER DELETE ON College
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+
+CREATE TRIGGER TR_Department_Insert_Version AFTER INSERT ON Department
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+CREATE TRIGGER TR_Department_Update_Version AFTER UPDATE ON Department
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+CREATE TRIGGER TR_Department_Delete_Version AFTER DELETE ON Department
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+
+CREATE TRIGGER TR_Courses_Insert_Version AFTER INSERT ON Courses
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+CREATE TRIGGER TR_Courses_Update_Version AFTER UPDATE ON Courses
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
+CREATE TRIGGER TR_Courses_Delete_Version AFTER DELETE ON Courses
+    FOR EACH ROW UPDATE CatalogVersion SET Version = Version + 1 WHERE Id = 1;
@@ -0,0 +1,92 @@
+"""
+N-gram substring index
+Resolves a preference such as 'lalitpur' to the catalog rows whose text
+contains it, through trigram postings over the distinct values
+"""
+
+from functools import reduce
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+class NgramIndex:
+    """
+    Case-insensitive substring index over one text column.
+
+    Matching runs on distinct values: a term's n-grams intersect to a few
+    candidate values, which are confirmed with a plain substring test and
+    expanded to row positions. Resolved terms are cached, so a repeated
+    preference costs a dictionary lookup.
+    """
+
+    def __init__(self, values: Sequence[str], n: int = 3, cache_size: int = 1024):
+        """
+        Args:
+            values: Text of every row (e.g. the location column)
+            n: N-gram length; shorter terms fall back to scanning the distinct values
+            cache_size: Resolved terms kept before the cache is cleared
+        """
+        self.n = n
+        self.cache_size = cache_size
+        values = pd.Series(values)
+        # Distinct value id of every row; -1 for missing values, which never match
+        codes = np.full(len(values), -1, dtype=np.intp)
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Upper-case each category once and map the row codes through it
+            categories = pd.Series(values.cat.categories, dtype=object).astype(str).str.upper().to_numpy()
+            self.names, category_codes = np.unique(categories, return_inverse=True)
+            row_codes = values.cat.codes.to_numpy()
+            known = row_codes >= 0
+            codes[known] = category_codes[row_codes[known]]
+        else:
+            known = values.notna().to_numpy()
+            self.names, codes[known] = np.unique(values[known].astype(object).astype(str).str.upper().to_numpy(),
+                                                 return_inverse=True)
+        # Rows of distinct value i are rows[bounds[i]:bounds[i + 1]]; missing rows sort before bounds[0]
+        self._rows = np.argsort(codes, kind='stable')
+        self._bounds = np.searchsorted(codes[self._rows], np.arange(len(self.names) + 1))
+        postings: Dict[str, List[int]] = {}
+        for name_id, name in enumerate(self.names):
+            for gram in set(_ngrams(name, n)):
+                postings.setdefault(gram, []).append(name_id)
+        self._postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self._cache: Dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def value_ids(self, term: str) -> np.ndarray:
+        """Ids of the distinct values containing term"""
+        term = term.upper()
+        if len(term) < self.n:
+            candidates = np.arange(len(self.names))
+        else:
+            lists = [self._postings.get(gram) for gram in set(_ngrams(term, self.n))]
+            if any(ids is None for ids in lists):
+                return np.empty(0, dtype=np.int32)
+            candidates = reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), sorted(lists, key=len))
+        return np.array([i for i in candidates if term in self.names[i]], dtype=np.int32)
+
+    def rows(self, term: str) -> np.ndarray:
+        """Sorted positions of the rows containing term"""
+        key = term.upper()
+        rows = self._cache.get(key)
+        if rows is None:
+            ids = self.value_ids(key)
+            rows = np.sort(np.concatenate([self._rows[self._bounds[i]:self._bounds[i + 1]] for i in ids])) \
+                if len(ids) else np.empty(0, dtype=np.intp)
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            self._cache[key] = rows
+        return rows
+
+    def rows_any(self, terms: Iterable[str]) -> np.ndarray:
+        """Sorted positions of the rows containing at least one of the terms"""
+        matches = [self.rows(term) for term in terms]
+        if not matches:
+            return np.empty(0, dtype=np.intp)
+        return matches[0] if len(matches) == 1 else reduce(np.union1d, matches)
+
+def _ngrams(text: str, n: int) -> List[str]:
+    return [text[i:i + n] for i in range(len(text) - n + 1)]
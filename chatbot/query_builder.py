@@ -0,0 +1,356 @@
+"""
+Typed catalog query builder
+Builds College ⋈ Department ⋈ Courses queries from filters, ordering and a
+limit, and renders them to deterministic SQL with canonical cache keys
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from enum import Enum
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# SELECT/FROM shared by every catalog query (column aliases match
+# CollegeDataExtractor._convert_to_college_info_list). Inner joins, since only
+# rows with a course are selected; they also let the planner start from a
+# Courses index for ordered and keyset-paginated queries.
+CATALOG_SELECT = """
+SELECT
+    c.CollegeId, c.Name AS CollegeName, c.Location, c.Type,
+    c.ContactNumber, c.Email, c.HostelAvailability, c.Latitude, c.Longitude,
+    d.DepartmentId, d.Name AS DepartmentName,
+    co.CourseId, co.Name AS CourseName, co.AverageCutoffRank, co.Fee,
+    co.TotalSeats, co.FacultyToStudentRatio, co.PassPercentage,
+    co.InternshipOpportunities, co.GereralScholarship, co.SemesterScholarship,
+    co.TotalQuotas, co.DurationInYears, co.AdmissionProcess, co.Rating
+FROM College c
+JOIN Department d ON c.CollegeId = d.CollegeId
+JOIN Courses co ON d.DepartmentId = co.DepartmentId
+WHERE co.CourseId IS NOT NULL"""
+
+# Queryable fields: CollegeInfo.to_dict() key -> (SQL column, CollegeInfo attribute path)
+FIELDS: Dict[str, Tuple[str, str]] = {
+    'college_id': ('c.CollegeId', 'college.college_id'),
+    'college_name': ('c.Name', 'college.name'),
+    'location': ('c.Location', 'college.location'),
+    'college_type': ('c.Type', 'college.type'),
+    'hostel_availability': ('c.HostelAvailability', 'college.hostel_availability'),
+    'department_id': ('d.DepartmentId', 'department.department_id'),
+    'department_name': ('d.Name', 'department.name'),
+    'course_id': ('co.CourseId', 'course.course_id'),
+    'course_name': ('co.Name', 'course.name'),
+    'average_cutoff_rank': ('co.AverageCutoffRank', 'course.average_cutoff_rank'),
+    'fee': ('co.Fee', 'course.fee'),
+    'pass_percentage': ('co.PassPercentage', 'course.pass_percentage'),
+    'internship_opportunities': ('co.InternshipOpportunities', 'course.internship_opportunities'),
+    'rating': ('co.Rating', 'course.rating')
+}
+
+_GETTERS = {name: attrgetter(path) for name, (_, path) in FIELDS.items()}
+
+# Text fields covered by the search-token index -> field holding the id of
+# the row the text belongs to (the EntityId stored in CatalogSearchToken)
+SEARCHABLE_FIELDS: Dict[str, str] = {
+    'college_name': 'college_id',
+    'location': 'college_id',
+    'department_name': 'department_id',
+    'course_name': 'course_id'
+}
+
+# Side table created by migrations/001_catalog_search_token.sql
+SEARCH_TOKEN_TABLE = 'CatalogSearchToken'
+
+_TOKEN_PATTERN = re.compile(r"[A-Z0-9]+")
+
+class Op(Enum):
+    """Comparison operators supported in predicates"""
+    CONTAINS = 'contains'   # case-insensitive substring (LIKE '%value%')
+    EQUALS = 'eq'
+    LESS_EQUAL = 'le'
+    GREATER_EQUAL = 'ge'
+    IS_TRUE = 'is_true'
+    HAS_TOKENS = 'has_tokens'   # every word of value appears as a whole word (search-token index)
+
+@dataclass(frozen=True)
+class Predicate:
+    """A single field comparison"""
+    field: str
+    op: Op
+    value: Any = None
+
+    def __post_init__(self):
+        if self.field not in FIELDS:
+            raise ValueError(f"Unknown catalog field '{self.field}'")
+        # Canonicalise values so equivalent entities produce identical predicates.
+        # Text comparisons are case-insensitive in the catalog collation.
+        value = self.value
+        if isinstance(value, str):
+            value = ' '.join(value.split()).upper()
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        object.__setattr__(self, 'value', None if self.op is Op.IS_TRUE else value)
+        if self.op is Op.HAS_TOKENS:
+            if self.field not in SEARCHABLE_FIELDS:
+                raise ValueError(f"Field '{self.field}' is not covered by the search-token index")
+            if not tokenize(self.value):
+                raise ValueError(f"No searchable words in '{self.value}'")
+
+    @property
+    def tokens(self) -> Tuple[str, ...]:
+        """Search tokens of a HAS_TOKENS predicate's value"""
+        return tokenize(self.value)
+
+    def __lt__(self, other: 'Predicate') -> bool:
+        return self._sort_key() < other._sort_key()
+
+    def _sort_key(self) -> Tuple[str, str, str]:
+        return (self.field, self.op.value, repr(self.value))
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        """Render as a SQL condition and its parameters"""
+        column = FIELDS[self.field][0]
+        if self.op is Op.CONTAINS:
+            return f"{column} LIKE %s", [f"%{_escape_like(self.value)}%"]
+        if self.op is Op.EQUALS:
+            return f"{column} = %s", [self.value]
+        if self.op is Op.LESS_EQUAL:
+            return f"{column} <= %s", [self.value]
+        if self.op is Op.GREATER_EQUAL:
+            return f"{column} >= %s", [self.value]
+        if self.op is Op.HAS_TOKENS:
+            tokens = self.tokens
+            id_column = FIELDS[SEARCHABLE_FIELDS[self.field]][0]
+            return (f"{id_column} IN (SELECT EntityId FROM {SEARCH_TOKEN_TABLE} "
+                    f"WHERE Field = %s AND Token IN ({', '.join(['%s'] * len(tokens))}) "
+                    f"GROUP BY EntityId HAVING COUNT(*) = %s)"), [self.field, *tokens, len(tokens)]
+        return f"{column} = TRUE", []
+
+    def matches(self, item: Any) -> bool:
+        """Evaluate against a CollegeInfo object"""
+        actual = _GETTERS[self.field](item)
+        if self.op is Op.IS_TRUE:
+            return bool(actual)
+        if actual is None:
+            return False
+        if self.op is Op.CONTAINS:
+            return self.value in str(actual).upper()
+        if self.op is Op.EQUALS:
+            return (str(actual).upper() if isinstance(actual, str) else actual) == self.value
+        if self.op is Op.LESS_EQUAL:
+            return actual <= self.value
+        if self.op is Op.HAS_TOKENS:
+            return set(self.tokens).issubset(tokenize(actual))
+        return actual >= self.value
+
+@dataclass(frozen=True)
+class Condition:
+    """Predicates combined with OR"""
+    predicates: Tuple[Predicate, ...]
+
+    @classmethod
+    def any_of(cls, predicates: Iterable[Predicate]) -> 'Condition':
+        """Build a condition with duplicate predicates removed and a fixed order"""
+        return cls(tuple(sorted(set(predicates))))
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        parts, params = [], []
+        for predicate in self.predicates:
+            sql, predicate_params = predicate.to_sql()
+            parts.append(sql)
+            params.extend(predicate_params)
+        if len(parts) == 1:
+            return parts[0], params
+        return f"({' OR '.join(parts)})", params
+
+    def matches(self, item: Any) -> bool:
+        return any(predicate.matches(item) for predicate in self.predicates)
+
+@dataclass(frozen=True)
+class OrderBy:
+    """Sort key"""
+    field: str
+    descending: bool = False
+
+    def to_sql(self) -> str:
+        return f"{FIELDS[self.field][0]} {'DESC' if self.descending else 'ASC'}"
+
+@dataclass(frozen=True)
+class CatalogQuery:
+    """
+    Canonical catalog query: AND of OR-conditions, ordering and an optional limit.
+
+    Build instances with CatalogQuery.build() so that conditions are
+    deduplicated and sorted; two queries over the same entity sets then
+    render the same SQL and parameters and share cache keys.
+
+    after holds the order_by values of the last row already returned
+    (keyset pagination): only rows sorting strictly after it are selected,
+    so every page costs the same as the first. order_by must then end in a
+    unique field such as course_id.
+    """
+    conditions: Tuple[Condition, ...] = ()
+    order_by: Tuple[OrderBy, ...] = ()
+    limit: Optional[int] = None
+    after: Optional[Tuple[Any, ...]] = None
+
+    @classmethod
+    def build(cls, conditions: Iterable[Condition] = (), order_by: Iterable[OrderBy] = (),
+              limit: Optional[int] = None, after: Optional[Tuple[Any, ...]] = None) -> 'CatalogQuery':
+        canonical = sorted({c for c in conditions if c.predicates}, key=lambda c: [p._sort_key() for p in c.predicates])
+        order_by = tuple(order_by)
+        if after is not None and len(after) != len(order_by):
+            raise ValueError("Keyset values must match the order_by fields")
+        return cls(tuple(canonical), order_by, limit, tuple(after) if after is not None else None)
+
+    def to_sql(self) -> Tuple[str, List[Any]]:
+        """Render deterministic SQL and its parameter list"""
+        sql = CATALOG_SELECT
+        params: List[Any] = []
+        for condition in self.conditions:
+            condition_sql, condition_params = condition.to_sql()
+            sql += f"\nAND {condition_sql}"
+            params.extend(condition_params)
+        if self.after is not None:
+            keyset_sql, keyset_params = self._keyset_condition()
+            sql += f"\nAND {keyset_sql}"
+            params.extend(keyset_params)
+        if self.order_by:
+            sql += "\nORDER BY " + ", ".join(order.to_sql() for order in self.order_by)
+        if self.limit is not None:
+            sql += "\nLIMIT %s"
+            params.append(self.limit)
+        return sql, params
+
+    def _keyset_condition(self) -> Tuple[str, List[Any]]:
+        """Condition selecting the rows that sort after self.after, written so an index can seek to it"""
+        columns = [FIELDS[order.field][0] for order in self.order_by]
+        directions = {order.descending for order in self.order_by}
+        if len(directions) == 1:
+            # Row-value comparison: a single index range when all keys sort the same way
+            operator = '<' if self.order_by[0].descending else '>'
+            placeholders = ', '.join(['%s'] * len(columns))
+            return f"({', '.join(columns)}) {operator} ({placeholders})", list(self.after)
+        # Mixed directions need the expanded form; the redundant bound on the
+        # leading key still lets the index seek to the first candidate
+        expanded_sql, expanded_params = self._keyset_sql(0)
+        bound = '<=' if self.order_by[0].descending else '>='
+        return f"{columns[0]} {bound} %s AND {expanded_sql}", [self.after[0], *expanded_params]
+
+    def _keyset_sql(self, position: int) -> Tuple[str, List[Any]]:
+        """Expanded row comparison (a > x OR (a = x AND ...)), which works with mixed sort directions"""
+        order, value = self.order_by[position], self.after[position]
+        column = FIELDS[order.field][0]
+        beyond = f"{column} {'<' if order.descending else '>'} %s"
+        if position == len(self.order_by) - 1:
+            return beyond, [value]
+        rest_sql, rest_params = self._keyset_sql(position + 1)
+        return f"({beyond} OR ({column} = %s AND {rest_sql}))", [value, value, *rest_params]
+
+    def page_token(self, last_item: Any) -> str:
+        """Opaque continuation token for the page ending with last_item"""
+        payload = {'q': self._page_identity(), 'k': [_GETTERS[order.field](last_item) for order in self.order_by]}
+        return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode('utf-8')).decode('ascii')
+
+    def after_token(self, token: str) -> 'CatalogQuery':
+        """
+        Continue from a page_token() issued for this query
+
+        Raises:
+            ValueError: If the token is malformed or was issued for a different query
+        """
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            identity, keys = payload['q'], payload['k']
+        except (binascii.Error, UnicodeError, ValueError, KeyError, TypeError):
+            raise ValueError("Malformed page token") from None
+        if identity != self._page_identity() or len(keys) != len(self.order_by):
+            raise ValueError("Page token does not belong to this query")
+        return CatalogQuery(self.conditions, self.order_by, self.limit, tuple(keys))
+
+    def _page_identity(self) -> str:
+        """Digest of the filters and ordering a continuation token is bound to"""
+        return CatalogQuery(self.conditions, self.order_by).cache_key[:16]
+
+    @property
+    def shape_key(self) -> str:
+        """Hash of the SQL text alone, shared by queries that differ only in parameter values"""
+        return shape_key(self.to_sql()[0])
+
+    @property
+    def cache_key(self) -> str:
+        """Hash of the SQL text and parameters, identifying one result set"""
+        sql, params = self.to_sql()
+        return _digest(normalize_sql(sql) + '\0' + repr(params))
+
+    def apply(self, items: Iterable[Any], index: Any = None) -> List[Any]:
+        """
+        Evaluate the query in memory over CollegeInfo objects
+        
+        Args:
+            items: Catalog entries to filter
+            index: Optional CatalogSearchIndex built over items; HAS_TOKENS
+                conditions then narrow the candidates before the full check
+        """
+        if index is not None:
+            items = index.candidates(self.conditions)
+        results = [item for item in items if all(c.matches(item) for c in self.conditions)]
+        if self.after is not None:
+            results = [item for item in results if self._is_after(item)]
+        # Stable sorts applied from the least to the most significant key
+        for order in reversed(self.order_by):
+            getter = _GETTERS[order.field]
+            results.sort(key=lambda item: _sortable(getter(item)), reverse=order.descending)
+        if self.limit is not None:
+            results = results[:self.limit]
+        return results
+
+    def _is_after(self, item: Any) -> bool:
+        for order, bound in zip(self.order_by, self.after):
+            value, bound = _sortable(_GETTERS[order.field](item)), _sortable(bound)
+            if value != bound:
+                return value < bound if order.descending else value > bound
+        return False
+
+def rewrite_token_search(query: CatalogQuery) -> CatalogQuery:
+    """
+    Turn CONTAINS filters on searchable text fields into HAS_TOKENS lookups
+    
+    The result is answered from the search-token index instead of a
+    LIKE '%...%' scan. Matching becomes whole-word: 'lalitpur' still finds
+    'SANEPA, LALITPUR', but a word fragment such as 'lalit' no longer does.
+    """
+    conditions = []
+    for condition in query.conditions:
+        conditions.append(Condition.any_of(
+            Predicate(p.field, Op.HAS_TOKENS, p.value)
+            if p.op is Op.CONTAINS and p.field in SEARCHABLE_FIELDS and tokenize(p.value) else p
+            for p in condition.predicates
+        ))
+    return CatalogQuery.build(conditions, query.order_by, query.limit, query.after)
+
+def tokenize(text: Any) -> Tuple[str, ...]:
+    """Split text into distinct upper-case alphanumeric words, in order"""
+    if not text:
+        return ()
+    return tuple(dict.fromkeys(_TOKEN_PATTERN.findall(str(text).upper())))
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace so formatting differences do not change a query's identity"""
+    return ' '.join(sql.split())
+
+def shape_key(sql: str) -> str:
+    """Hash identifying a statement shape (SQL text with placeholders, parameters excluded)"""
+    return _digest(normalize_sql(sql))
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+def _sortable(value: Any) -> Any:
+    return value.upper() if isinstance(value, str) else value
+
+def _digest(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
@@ -0,0 +1,111 @@
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class _Flight:
+    """A load in progress that concurrent callers for the same key wait on"""
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class QueryResultCache:
+    """
+    Size-bounded LRU cache of query results with a time-to-live.
+
+    Only one load runs per key at a time: concurrent callers asking for a key
+    that is being loaded wait for that load instead of issuing their own.
+    invalidate() drops every entry and detaches loads that were started
+    before it, so a result computed against an old catalog is never stored
+    or handed to a caller that arrives after the invalidation.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 60.0):
+        """
+        Args:
+            max_entries: Maximum number of cached results
+            ttl: Seconds a result stays valid
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'waits': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling loader (once across threads) on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if time.monotonic() < expires_at:
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+                generation = self._generation
+                self._stats['misses'] += 1
+            else:
+                self._stats['waits'] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                # invalidate() may already have replaced this flight with a newer load
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if flight.error is None and generation == self._generation:
+                    self._store(key, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self):
+        """
+        Drop all cached results (e.g. after the catalog version changed)
+
+        Loads already running are detached: their callers still get them,
+        but later callers start a fresh load instead of joining an old one.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._inflight.clear()
+            self._generation += 1
+            self._stats['invalidations'] += 1
+        logger.info("Query result cache invalidated.")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            data = dict(self._stats)
+            data['entries'] = len(self._entries)
+        return data
+
+    def _store(self, key: Hashable, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats['evictions'] += 1
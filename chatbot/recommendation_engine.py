@@ -1,17 +1,102 @@
 import pandas as pd
 import numpy as np
 from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field, fields, replace
+from contextlib import contextmanager
 from enum import Enum
 import math
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.neighbors import NearestNeighbors
+import threading
+import time
+import logging
+from sklearn.neighbors import KDTree
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import from the data extractor file
-from data_extractor import CollegeInfo, CollegeDataExtractor, DatabaseConfig
+from data_extractor import CollegeInfo, CollegeDataExtractor
+from catalog_snapshot import CatalogSnapshot, CatalogUnavailable
+from feature_matrix import FeatureMatrix
+from geo_index import GeoIndex
+from ngram_index import NgramIndex
+
+logger = logging.getLogger(__name__)
+
+COLLEGE_INFO_FIELDS = tuple(f.name for f in fields(CollegeInfo))
+
+# Normalized features compared by similar_programs (coordinates stand in for location)
+SIMILARITY_FEATURES = ('fee', 'rating', 'pass_percentage', 'average_cutoff_rank', 'faculty_to_student_ratio',
+                       'general_scholarship', 'latitude', 'longitude')
+
+# Score component -> (RecommendationScore field, reasoning label)
+SCORE_FIELDS = {
+    'location': ('location_score', 'Location'),
+    'fee': ('affordability_score', 'Fee'),
+    'pass_rate': ('quality_score', 'Pass Rate'),
+    'affordability': ('affordability_score', 'Affordability'),
+    'quality': ('quality_score', 'Quality'),
+    'accessibility': ('accessibility_score', 'Accessibility'),
+    'feature': ('feature_score', 'Features')
+}
+
+# Memory budget for one chunk of a batch score matrix
+BATCH_MATRIX_BYTES = 64 * 2**20
+
+# Yes/no columns of the engine DataFrame
+BOOLEAN_COLUMNS = ('hostel_availability', 'internship_opportunities')
+
+# Numeric columns the scorers read straight from the DataFrame; float ones kept at full width
+SCORED_COLUMNS = ('fee', 'pass_percentage', 'latitude', 'longitude', 'rating',
+                  'average_cutoff_rank', 'general_scholarship')
+
+# A refresh that finds more than this share of programs edited rebuilds the state from scratch
+INCREMENTAL_REFRESH_LIMIT = 0.1
+
+# Seconds a request waits for the background refresher's first state before giving up
+READY_WAIT_TIMEOUT = 5.0
+
+def _to_python(value: Any) -> Any:
+    """Plain Python scalar for a DataFrame cell"""
+    return value.item() if isinstance(value, np.generic) else value
+
+def _fits(values: np.ndarray, dtype: Any) -> bool:
+    """True if every value survives a round trip through dtype unchanged"""
+    with np.errstate(all='ignore'):
+        return np.array_equal(values.astype(dtype).astype(values.dtype), values, equal_nan=values.dtype.kind == 'f')
+
+def _changed_rows(old: pd.DataFrame, new: pd.DataFrame) -> np.ndarray:
+    """Positions where two frames with the same rows and columns differ in any value"""
+    changed = np.zeros(len(new), dtype=bool)
+    for name in new.columns:
+        if new[name].dtype.kind in 'biuf' and old[name].dtype.kind in 'biuf':
+            before, after = old[name].to_numpy(dtype=np.float64), new[name].to_numpy(dtype=np.float64)
+            changed |= ~((before == after) | (np.isnan(before) & np.isnan(after)))
+        else:
+            before, after = old[name].to_numpy(dtype=object), new[name].to_numpy(dtype=object)
+            changed |= (before != after) & ~(pd.isna(before) & pd.isna(after))
+    return np.flatnonzero(changed)
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Positions of the k highest scores, best first, in O(n + k log k)
+    
+    Ties keep catalog order, exactly as a stable descending sort would.
+    NaN scores rank below every number.
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.intp)
+    if scores.dtype.kind == 'f':
+        # NaN compares false with the threshold and would drop out of both selections below
+        scores = np.where(np.isnan(scores), -np.inf, scores)
+    if k < n:
+        threshold = scores[np.argpartition(scores, n - k)[n - k]]
+        above = np.flatnonzero(scores > threshold)
+        tied = np.flatnonzero(scores == threshold)[:k - len(above)]
+        candidates = np.concatenate([above, tied])
+    else:
+        candidates = np.arange(n)
+    # lexsort keys run from least to most significant: position, then score descending
+    return candidates[np.lexsort((candidates, -scores[candidates]))]
 
 class Priority(Enum):
     """Priority levels for different criteria"""
@@ -77,55 +162,451 @@ class CollegeRecommendation:
         })
         return data
 
+@dataclass(frozen=True)
+class EngineState:
+    """
+    Everything derived from one catalog load
+    
+    Published with a single reference swap and never modified afterwards,
+    so a request that pinned a state reads one consistent catalog.
+    """
+    version: Any
+    df: pd.DataFrame
+    feature_matrix: FeatureMatrix
+    score_columns: Dict[str, np.ndarray]
+    geo_index: GeoIndex
+    location_index: NgramIndex
+    course_index: NgramIndex
+    course_positions: pd.Index
+    info_columns: Dict[str, np.ndarray]
+    similarity_index: Optional[KDTree]
+    loaded_at: float = field(default_factory=time.time)
+
+def _state_property(name: str, empty: Any = None) -> property:
+    """Read-only engine attribute served from the state the calling thread sees"""
+    def read(self):
+        state = self.state
+        return getattr(state, name) if state is not None else empty
+    return property(read, doc=f"{name} of the current engine state")
+
 class CollegeRecommendationSystem:
     """Advanced College Recommendation System"""
     
+    df = _state_property('df')
+    feature_matrix = _state_property('feature_matrix')
+    score_columns = _state_property('score_columns', {})
+    geo_index = _state_property('geo_index')
+    location_index = _state_property('location_index')
+    course_index = _state_property('course_index')
+    
     def __init__(self, extractor: CollegeDataExtractor):
         self.extractor = extractor
-        self.colleges_data: List[CollegeInfo] = []
-        self.df: pd.DataFrame = None
-        self.scaler = MinMaxScaler()
-        self.feature_matrix = None
+        self._state: Optional[EngineState] = None
+        self._pinned = threading.local()
+        self._refresh_lock = threading.RLock()
+        self.refresh_interval = 30.0
+        self.ready_timeout = READY_WAIT_TIMEOUT
+        self.last_error: Optional[Exception] = None
+        self._ready = threading.Event()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._listening = False
+        self._following = False
+        
+    @property
+    def state(self) -> Optional[EngineState]:
+        """The state pinned by the running call on this thread, else the latest published one"""
+        pinned = getattr(self._pinned, 'state', None)
+        return pinned if pinned is not None else self._state
         
-    def load_data(self):
-        """Load and prepare data for recommendations"""
+    def load_data(self, timeout: Optional[float] = None):
+        """Load and prepare data for recommendations (timeout in seconds per statement, None for no limit)"""
         print("Loading college data...")
-        self.colleges_data = self.extractor.get_all_colleges_info()
+        self.refresh(force=True, timeout=timeout)
+        state = self._state
+        print(f"Loaded {len(state.df) if state is not None else 0} college programs")
+    
+    def refresh(self, force: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Rebuild the engine state if the catalog changed
+        
+        The new state is built next to the current one and published with a
+        single reference swap; readers are never blocked. While the engine
+        follows the extractor's catalog snapshot (see start_background_refresh),
+        the version and rows come from the latest snapshot, so the database is
+        neither probed nor read a second time.
+        
+        Args:
+            force: Re-read the catalog even if its version did not move
+            timeout: Seconds each database statement may run (None for no limit)
+            
+        Returns:
+            True if a new state was published
+        """
+        with self._refresh_lock:
+            try:
+                snapshot = self._followed_snapshot()
+                if self._following and snapshot is None:
+                    # The snapshot's listener wakes the refresher once one is published
+                    return False
+                version = snapshot.version if snapshot is not None else self.extractor.get_catalog_version(timeout)
+                current = self._state
+                if not force and current is not None and current.version == version:
+                    self.last_error = None
+                    return False
+                state = self._next_state(current, self._load_frame(snapshot, timeout), version)
+            except Exception as e:
+                self.last_error = e
+                raise
+            self._state = state
+            self._ready.set()
+            self.last_error = None
+        logger.info(f"Recommendation data refreshed: {len(state.df)} programs (version {version}).")
+        return True
+    
+    def _followed_snapshot(self) -> Optional[CatalogSnapshot]:
+        """The extractor's latest catalog snapshot while the engine follows it, else None"""
+        if not self._following:
+            return None
+        snapshot = self.extractor.snapshot
+        if snapshot.current is None and not snapshot.is_running:
+            # Without its own refresher nothing else would ever load the snapshot
+            snapshot.refresh()
+        return snapshot.current
+    
+    # ==================== BACKGROUND REFRESH ====================
+    
+    def start_background_refresh(self, interval: float = 30.0, on_catalog_change: bool = True):
+        """
+        Keep the engine data current from a daemon thread
+        
+        The thread loads immediately, then checks the catalog version every
+        interval seconds and whenever notify_catalog_changed() is called, so
+        no request pays for a load or waits on a rebuild. Requests arriving
+        before the first state is published wait up to ready_timeout seconds
+        for it and then raise CatalogUnavailable.
+        
+        When the extractor has a catalog snapshot, the engine follows it
+        instead: each snapshot change wakes the thread, which builds the new
+        state from that snapshot's version and rows.
+        
+        Args:
+            interval: Seconds between catalog version checks
+            on_catalog_change: Follow the extractor's catalog snapshot, if it has one
+        """
+        self.refresh_interval = interval
+        snapshot = getattr(self.extractor, 'snapshot', None)
+        self._following = on_catalog_change and snapshot is not None
+        if self._following and not self._listening:
+            snapshot.add_listener(lambda previous, current: self.notify_catalog_changed())
+            self._listening = True
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="recommendation-refresh", daemon=True)
+        self._thread.start()
+    
+    def notify_catalog_changed(self):
+        """Ask the background refresher to check the catalog now"""
+        self._wake.set()
+    
+    @property
+    def is_running(self) -> bool:
+        """True while the background refresher thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+    
+    def stop_background_refresh(self):
+        """Stop the background refresher"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.refresh_interval)
+            self._thread = None
+        self._following = False
+    
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                # Keep serving the last good state
+                logger.warning(f"Recommendation data refresh failed: {e}")
+            self._wake.wait(self.refresh_interval)
+            self._wake.clear()
+    
+    @contextmanager
+    def _reading(self):
+        """Pin one state for the whole call, waiting for the first one if nothing was published yet"""
+        pinned = getattr(self._pinned, 'state', None)
+        if pinned is not None:
+            yield pinned
+            return
+        state = self._state
+        if state is None:
+            state = self._first_state()
+        self._pinned.state = state
+        try:
+            yield state
+        finally:
+            self._pinned.state = None
+    
+    def _first_state(self) -> EngineState:
+        """
+        The first published state, for a request that found none
         
-        # Convert to DataFrame for easier analysis
-        data_list = [college.to_dict() for college in self.colleges_data]
-        self.df = pd.DataFrame(data_list)
+        With the background refresher running, requests never load: they
+        wait up to ready_timeout seconds for its first state. Without it, the
+        first request loads, each statement limited to the extractor's
+        statement_timeout.
         
-        # Handle missing values
-        self.df = self._clean_data()
+        Raises:
+            CatalogUnavailable: The background refresher has not published a state in time
+        """
+        if self.is_running:
+            if not self._ready.wait(self.ready_timeout):
+                raise CatalogUnavailable("Recommendation data is still loading in the background")
+            return self._state
+        with self._refresh_lock:
+            if self._state is None:
+                self.load_data(timeout=self.extractor.db_config.statement_timeout)
+            return self._state
+    
+    # ==================== STATE BUILDING ====================
+    
+    def _next_state(self, current: Optional[EngineState], df: pd.DataFrame, version: Any) -> EngineState:
+        """
+        Derive the state for a new version from the loaded catalog frame
         
-        print(f"Loaded {len(self.colleges_data)} college programs")
+        When the same programs are loaded in the same order, only the rows
+        whose values changed are patched into the current state (up to
+        INCREMENTAL_REFRESH_LIMIT of them); otherwise everything is rebuilt.
+        """
+        if current is not None and list(df.columns) == list(current.df.columns) and \
+                np.array_equal(df['course_id'].to_numpy(), current.df['course_id'].to_numpy()):
+            positions = _changed_rows(current.df, df)
+            if not len(positions):
+                return replace(current, version=version, loaded_at=time.time())
+            if len(positions) <= INCREMENTAL_REFRESH_LIMIT * len(df):
+                logger.info(f"Patching {len(positions)} edited programs into the recommendation data.")
+                return self._patched_state(current, df, positions, version)
+        return self._build_state(df, version)
+    
+    def _load_frame(self, snapshot: Optional[CatalogSnapshot] = None,
+                    timeout: Optional[float] = None) -> pd.DataFrame:
+        """The catalog as a cleaned, compacted DataFrame, from a snapshot's rows or else the database"""
+        if snapshot is not None:
+            columns = self.extractor.get_snapshot_columns(snapshot)
+        else:
+            # Typed column arrays straight from the cursor; no per-row objects
+            columns = self.extractor.get_catalog_columns(timeout)
+        df = pd.DataFrame(columns, copy=False)
+        self._clean_data(df)
+        self._compact_data(df)
+        return df
+    
+    def _build_state(self, df: pd.DataFrame, version: Any) -> EngineState:
+        """Derive every array and index the scorers use from a loaded frame"""
+        # Compaction is lossless, so the features match the database values exactly
+        features = FeatureMatrix.from_frame(df)
+        score_columns = self._prepare_score_columns(df, features)
+        return EngineState(
+            version=version,
+            df=df,
+            feature_matrix=features,
+            score_columns=score_columns,
+            geo_index=GeoIndex(score_columns['latitude'], score_columns['longitude']),
+            location_index=NgramIndex(df['location']),
+            course_index=NgramIndex(df['course_name']),
+            course_positions=pd.Index(df['course_id']),
+            info_columns=self._prepare_info_columns(df),
+            similarity_index=self._build_similarity_index(features)
+        )
         
-    def _clean_data(self) -> pd.DataFrame:
-        """Clean and prepare data"""
-        df = self.df.copy()
+    def _clean_data(self, df: pd.DataFrame):
+        """Clean and prepare data in place"""
+        fills = {}
         
         # Fill missing numerical values
         numerical_columns = ['fee', 'rating', 'pass_percentage', 'average_cutoff_rank', 
                            'total_seats', 'faculty_to_student_ratio', 'general_scholarship']
-        
         for col in numerical_columns:
-            if col in df.columns:
-                df[col] = df[col].fillna(df[col].median())
+            if col in df.columns and df[col].hasnans:
+                fills[col] = df[col].median()
         
         # Fill missing categorical values
         categorical_columns = ['college_type', 'admission_process']
         for col in categorical_columns:
-            if col in df.columns:
-                df[col] = df[col].fillna('Unknown')
+            if col in df.columns and df[col].hasnans:
+                fills[col] = 'Unknown'
         
         # Convert boolean columns
-        boolean_columns = ['hostel_availability', 'internship_opportunities']
-        for col in boolean_columns:
-            if col in df.columns:
-                df[col] = df[col].fillna(False)
+        for col in BOOLEAN_COLUMNS:
+            if col in df.columns and df[col].hasnans:
+                fills[col] = False
         
-        return df
+        # Only columns with gaps are rewritten; the rest of the frame is untouched
+        if fills:
+            df.fillna(fills, inplace=True)
+    
+    def _compact_data(self, df: pd.DataFrame):
+        """
+        Downcast the cleaned frame in place
+        
+        Text becomes categoricals (names, locations and types repeat across
+        programs), numerics become int32/float32 only where every value
+        survives the round trip, and flag columns become real bools. Money
+        and other decimal columns (fee 1234567.89) therefore stay float64.
+        Float SCORED_COLUMNS keep their width, since the scorers read them in
+        place; integer ones become int32 like any other (exact, and every
+        scorer promotes them to float64 anyway).
+        """
+        for name in df.columns:
+            column = df[name]
+            if name in SCORED_COLUMNS and pd.api.types.is_float_dtype(column.dtype):
+                continue
+            if name in BOOLEAN_COLUMNS:
+                df[name] = column.astype(bool)
+            elif pd.api.types.is_string_dtype(column.dtype) or column.dtype == object:
+                df[name] = column.astype('category')
+            elif pd.api.types.is_integer_dtype(column.dtype):
+                if not len(column) or (column.min() >= np.iinfo(np.int32).min and column.max() <= np.iinfo(np.int32).max):
+                    df[name] = column.astype(np.int32)
+            elif pd.api.types.is_float_dtype(column.dtype) and _fits(column.to_numpy(), np.float32):
+                df[name] = column.astype(np.float32)
+    
+    def memory_report(self) -> pd.DataFrame:
+        """
+        Bytes held per engine DataFrame column and per derived array
+        
+        Returns:
+            DataFrame indexed by name with dtype and bytes, largest first
+        """
+        with self._reading() as state:
+            rows = [{'name': name, 'dtype': str(state.df[name].dtype), 'bytes': int(size)}
+                    for name, size in state.df.memory_usage(index=False, deep=True).items()]
+            features = state.feature_matrix
+            rows.append({'name': 'feature_matrix.values', 'dtype': str(features.values.dtype),
+                         'bytes': features.values.nbytes})
+            # Scored DataFrame columns are views and already counted above
+            rows.extend({'name': f"score_columns.{name}", 'dtype': str(array.dtype), 'bytes': array.nbytes}
+                        for name, array in state.score_columns.items()
+                        if name not in SCORED_COLUMNS and np.ndim(array))
+        return pd.DataFrame(rows).set_index('name').sort_values('bytes', ascending=False)
+    
+    def _prepare_score_columns(self, df: pd.DataFrame, features: FeatureMatrix) -> Dict[str, np.ndarray]:
+        """
+        Cache the cleaned columns the scorers read, and every score term that
+        does not depend on the profile, as contiguous arrays
+        
+        Rebuilt on each load and patch, so requests only combine these with
+        the profile's budget, rank, weights and preferences.
+        """
+        # Numeric columns are views of the DataFrame's own full-width columns, not copies
+        columns = {name: df[name].to_numpy() for name in SCORED_COLUMNS}
+        fee = features.statistics('fee')
+        return {
+            **columns,
+            'college_type': df['college_type'].to_numpy(dtype=object),
+            # Profile-independent score terms
+            'fee_score': 1 - columns['fee'] / (fee['max'] if fee['max'] > 0 else 1),
+            'pass_rate': columns['pass_percentage'] / 100.0,
+            'rating_score': columns['rating'] / 5.0,
+            'effective_fee': columns['fee'] * (1 - columns['general_scholarship'] / 100),
+            'default_budget': np.float64(fee['median'] * 1.2),
+            'internship_score': np.where(df['internship_opportunities'].to_numpy(dtype=bool), 1.0, 0.5),
+            'hostel_bonus': np.where(df['hostel_availability'].to_numpy(dtype=bool), 0.2, -0.1)
+        }
+    
+    def _prepare_info_columns(self, df: pd.DataFrame) -> Dict[str, np.ndarray]:
+        """CollegeInfo fields as arrays, so result objects are built without DataFrame row lookups"""
+        # Categoricals stay encoded; only the returned rows are decoded
+        return {name: df[name].array if isinstance(df[name].dtype, pd.CategoricalDtype) else df[name].to_numpy()
+                for name in COLLEGE_INFO_FIELDS}
+    
+    def _build_similarity_index(self, features: FeatureMatrix) -> Optional[KDTree]:
+        """KD-tree over the normalized similarity features (None for an empty catalog)"""
+        if not len(features):
+            return None
+        columns = [features.positions[name] for name in SIMILARITY_FEATURES]
+        return KDTree(np.ascontiguousarray(features.values[:, columns]))
+    
+    def update_programs(self, programs: List[CollegeInfo]):
+        """
+        Apply edits to already loaded programs without reloading the catalog
+        
+        Only the edited rows are renormalized in the feature matrix, and the
+        geo and name indexes are only rebuilt if coordinates or names changed.
+        The result is published as a new state. Programs that are not loaded
+        yet (new course ids) trigger a full load_data().
+        
+        Args:
+            programs: Current versions of the changed programs
+        """
+        with self._refresh_lock:
+            state = self._state
+            if state is None or not programs:
+                return
+            changed = pd.DataFrame([program.to_dict() for program in programs], columns=list(COLLEGE_INFO_FIELDS))
+            positions = state.course_positions.get_indexer(changed['course_id'])
+            if (positions < 0).any():
+                self.load_data()
+                return
+            
+            df = state.df.copy()
+            for name in COLLEGE_INFO_FIELDS:
+                if name not in df.columns:
+                    continue
+                values = changed[name]
+                if isinstance(df[name].dtype, pd.CategoricalDtype):
+                    new = values[~values.isin(df[name].cat.categories)].dropna().unique()
+                    if len(new):
+                        df[name] = df[name].cat.add_categories(new)
+                else:
+                    dtype = df[name].dtype
+                    if values.dtype.kind in 'iuf' and dtype.kind in 'iuf' and not _fits(values.to_numpy(), dtype):
+                        # Widen the compacted column rather than round the edited values
+                        df[name] = df[name].astype(np.result_type(dtype, values.dtype))
+                    values = values.astype(df[name].dtype)
+                df.iloc[positions, df.columns.get_loc(name)] = values.to_numpy()
+            self._state = self._patched_state(state, df, np.sort(positions), state.version)
+    
+    def _patched_state(self, state: EngineState, df: pd.DataFrame, positions: np.ndarray,
+                       version: Any) -> EngineState:
+        """
+        The state for a frame that differs from state.df only at some rows
+        
+        Only those rows are renormalized in the feature matrix, and the geo
+        and name indexes are reused unless coordinates or names changed there.
+        
+        Args:
+            state: State the frame was derived from (same programs, same order)
+            df: Cleaned, compacted frame holding the new values
+            positions: Rows whose values changed
+            version: Catalog version of the new state
+        """
+        renamed = {name for name in ('location', 'course_name')
+                   if not np.array_equal(state.df[name].to_numpy(dtype=object)[positions],
+                                         df[name].to_numpy(dtype=object)[positions])}
+        coordinates = ['latitude', 'longitude']
+        moved = not np.array_equal(state.df[coordinates].to_numpy(dtype=np.float64)[positions],
+                                   df[coordinates].to_numpy(dtype=np.float64)[positions], equal_nan=True)
+        features = state.feature_matrix.copy()
+        features.update_rows(positions, df)
+        score_columns = self._prepare_score_columns(df, features)
+        return replace(
+            state,
+            version=version,
+            df=df,
+            feature_matrix=features,
+            score_columns=score_columns,
+            info_columns=self._prepare_info_columns(df),
+            similarity_index=self._build_similarity_index(features),
+            geo_index=GeoIndex(score_columns['latitude'], score_columns['longitude']) if moved else state.geo_index,
+            location_index=NgramIndex(df['location']) if 'location' in renamed else state.location_index,
+            course_index=NgramIndex(df['course_name']) if 'course_name' in renamed else state.course_index,
+            loaded_at=time.time()
+        )
     
     def _calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
         """Calculate distance between two coordinates using Haversine formula"""
@@ -151,7 +632,7 @@ class CollegeRecommendationSystem:
         
         # If no budget specified, use median fee as reference
         if profile.budget_max is None:
-            budget_max = self.df['fee'].median() * 1.2
+            budget_max = self.feature_matrix.statistics('fee')['median'] * 1.2
         else:
             budget_max = profile.budget_max
         
@@ -252,6 +733,130 @@ class CollegeRecommendationSystem:
         
         return min(1.0, max(0.0, score))
     
+    def _location_score_matrix(self, profiles: List[StudentProfile]) -> np.ndarray:
+        """Vectorized _calculate_location_score: one row of program scores per profile"""
+        columns = self.score_columns
+        
+        # Each preferred location resolves once, through the n-gram index, to the rows it matches
+        scores = np.full((len(profiles), len(columns['fee'])), 0.5)
+        for row, profile in enumerate(profiles):
+            if profile.preferred_locations:
+                scores[row, self.location_index.rows_any(profile.preferred_locations)] = 0.9
+        
+        nearby = [row for row, profile in enumerate(profiles) if profile.location_proximity and profile.max_distance_km]
+        if nearby:
+            # Only programs inside each radius are touched; everything else is out of range
+            positions, distances = self.geo_index.within_many(
+                [profiles[row].location_proximity for row in nearby],
+                [profiles[row].max_distance_km for row in nearby])
+            for row, within, distance in zip(nearby, positions, distances):
+                max_distance = profiles[row].max_distance_km
+                in_range = np.maximum(scores[row, within], 1 - (distance / max_distance) * 0.5)
+                np.minimum(scores[row], 0.3, out=scores[row])
+                scores[row, within] = in_range
+        
+        return np.clip(scores, 0.0, 1.0)
+    
+    def _score_components(self, profiles: List[StudentProfile], factors: list) -> Dict[str, np.ndarray]:
+        """
+        Per-factor scores (location, fee, pass_rate) for every program
+        
+        Profile-dependent factors are (profiles x programs) matrices; the
+        others are single program vectors that broadcast across profiles.
+        """
+        columns = self.score_columns
+        components = {}
+        if 'location' in factors:
+            components['location'] = self._location_score_matrix(profiles)
+        if 'fee' in factors:
+            components['fee'] = columns['fee_score']
+        if 'pass_rate' in factors:
+            components['pass_rate'] = columns['pass_rate']
+        return components
+    
+    def _full_components(self, profiles: List[StudentProfile]) -> Dict[str, np.ndarray]:
+        """
+        All five component scores as (profiles x programs) matrices
+        
+        Column expressions equivalent to _calculate_affordability_score,
+        _calculate_quality_score, _calculate_accessibility_score,
+        _calculate_location_score and _calculate_feature_score.
+        """
+        return {
+            'affordability': self._affordability_score_matrix(profiles),
+            'quality': self._quality_score_matrix(profiles),
+            'accessibility': self._accessibility_score_matrix(profiles),
+            'location': self._location_score_matrix(profiles),
+            'feature': self._feature_score_matrix(profiles)
+        }
+    
+    def _affordability_score_matrix(self, profiles: List[StudentProfile]) -> np.ndarray:
+        """Vectorized _calculate_affordability_score"""
+        columns = self.score_columns
+        budget = np.array([[profile.budget_max if profile.budget_max is not None else columns['default_budget']]
+                           for profile in profiles], dtype=np.float64)
+        effective_fee = columns['effective_fee']
+        with np.errstate(divide='ignore', invalid='ignore'):
+            within = np.where(budget > 0, 1 - (effective_fee / budget) * 0.7, 1.0)
+            over = np.maximum(0, 1 - ((effective_fee - budget) / budget))
+        return np.clip(np.where(effective_fee <= budget, within, over), 0.0, 1.0)
+    
+    def _quality_score_matrix(self, profiles: List[StudentProfile]) -> np.ndarray:
+        """Vectorized _calculate_quality_score"""
+        columns = self.score_columns
+        weights = np.array([[profile.rating_priority.value / 4.0, profile.pass_percentage_priority.value / 4.0,
+                             profile.internship_priority.value / 4.0] for profile in profiles])
+        rating_weight, pass_weight, internship_weight = (weights[:, [i]] for i in range(3))
+        quality = (columns['rating_score'] * rating_weight +
+                   columns['pass_rate'] * pass_weight +
+                   columns['internship_score'] * internship_weight) / weights.sum(axis=1, keepdims=True)
+        return np.clip(quality, 0.0, 1.0)
+    
+    def _accessibility_score_matrix(self, profiles: List[StudentProfile]) -> np.ndarray:
+        """Vectorized _calculate_accessibility_score"""
+        cutoff = self.score_columns['average_cutoff_rank']
+        rank = np.array([[profile.entrance_rank if profile.entrance_rank is not None else np.nan]
+                         for profile in profiles], dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            admitted = np.minimum(1.0, 0.7 + ((cutoff - rank) / cutoff) * 0.3)
+            short = np.maximum(0.0, 0.5 - ((rank - cutoff) / cutoff) * 0.5)
+        scores = np.where(rank <= cutoff, admitted, short)
+        return np.where(np.isnan(rank) | (cutoff == 0), 0.5, scores)
+    
+    def _feature_score_matrix(self, profiles: List[StudentProfile]) -> np.ndarray:
+        """Vectorized _calculate_feature_score"""
+        columns = self.score_columns
+        scores = np.full((len(profiles), len(columns['fee'])), 0.5)
+        for row, profile in enumerate(profiles):
+            if profile.preferred_college_type:
+                scores[row] += np.where(columns['college_type'] == profile.preferred_college_type, 0.2, 0.0)
+            if profile.preferred_courses:
+                scores[row, self.course_index.rows_any(profile.preferred_courses)] += 0.2
+            if profile.hostel_required:
+                scores[row] += columns['hostel_bonus']
+        return np.clip(scores, 0.0, 1.0)
+    
+    def _component_weights(self, profiles: List[StudentProfile]) -> Dict[str, np.ndarray]:
+        """
+        Full-mode weight of each component per profile, as (profiles x 1) columns summing to 1
+        
+        Priorities come from the profile: quality follows the rating and pass
+        percentage priorities, affordability the scholarship priority (HIGH
+        with a budget), and the other components are HIGH/MEDIUM when the
+        profile states a preference and LOW otherwise.
+        """
+        priorities = np.array([[
+            (Priority.HIGH if profile.budget_max is not None else profile.scholarship_priority).value,
+            max(profile.rating_priority.value, profile.pass_percentage_priority.value),
+            (Priority.HIGH if profile.entrance_rank is not None else Priority.LOW).value,
+            (Priority.HIGH if profile.preferred_locations or profile.location_proximity else Priority.LOW).value,
+            (Priority.MEDIUM if profile.preferred_courses or profile.preferred_college_type or profile.hostel_required
+             else Priority.LOW).value
+        ] for profile in profiles], dtype=np.float64)
+        priorities /= priorities.sum(axis=1, keepdims=True)
+        return {component: priorities[:, [i]]
+                for i, component in enumerate(('affordability', 'quality', 'accessibility', 'location', 'feature'))}
+    
     def _calculate_feature_score(self, college_info: Dict, profile: StudentProfile) -> float:
         """Calculate feature score based on student preferences"""
         score = 0.5  # Start with neutral
@@ -274,60 +879,179 @@ class CollegeRecommendationSystem:
 
     def get_field_result(self, field: str) -> List[Dict[str, Any]]:
         """Return direct results for an individual field across all colleges"""
-        if self.df is None:
-            self.load_data()
-        if field not in self.df.columns:
+        with self._reading() as state:
+            df = state.df
+        if field not in df.columns:
             raise ValueError(f"Field '{field}' not found in college data.")
-        results = self.df[['Name', field]].sort_values(by=field, ascending=False).to_dict(orient='records')
+        results = df[['Name', field]].sort_values(by=field, ascending=False).to_dict(orient='records')
         return results
 
     def get_field_result(self, field: str) -> List[Dict[str, any]]:
         """Return direct results for an individual field across all colleges"""
-        if self.df is None:
-            self.load_data()
-        if field not in self.df.columns:
+        with self._reading() as state:
+            df = state.df
+        if field not in df.columns:
             raise ValueError(f"Field '{field}' not found in college data.")
-        results = self.df[['Name', field]].sort_values(by=field, ascending=False).to_dict(orient='records')
+        results = df[['Name', field]].sort_values(by=field, ascending=False).to_dict(orient='records')
         return results
 
     def compare_colleges(self, profile: StudentProfile, factors: list, top_n: int = 5) -> List[CollegeRecommendation]:
         """Compare colleges based on selected factors (location, fee, pass_rate)"""
-        if self.df is None:
-            self.load_data()
+        return self.compare_colleges_batch([profile], factors, top_n)[0]
+    
+    def compare_colleges_batch(self, profiles: List[StudentProfile], factors: list, top_n: int = 5,
+                               max_matrix_bytes: int = BATCH_MATRIX_BYTES) -> List[List[CollegeRecommendation]]:
+        """
+        Compare colleges for many student profiles in one pass
+        
+        Scores form a (profiles x programs) matrix computed with broadcasting,
+        in chunks of profiles sized so each chunk's matrices stay under
+        max_matrix_bytes.
+        
+        Args:
+            profiles: Student profiles to score
+            factors: Comparison factors (location, fee, pass_rate), weighted equally
+            top_n: Recommendations returned per profile
+            max_matrix_bytes: Memory budget for one chunk's score matrices
+            
+        Returns:
+            Top recommendations for each profile, in the order of profiles
+        """
         factor_weights = {f: 1.0/len(factors) for f in factors}  # Equal weights
+        # The overall matrix plus the location matrix when that factor is used
+        matrices = 2 if 'location' in factors else 1
+        return self._rank_batch(profiles, lambda chunk: (self._score_components(chunk, factors), factor_weights),
+                                top_n, max_matrix_bytes, matrices)
+    
+    def recommend_colleges(self, profile: StudentProfile, top_n: int = 5) -> List[CollegeRecommendation]:
+        """Recommend colleges using all five components (full scoring mode)"""
+        return self.recommend_colleges_batch([profile], top_n)[0]
+    
+    def recommend_colleges_batch(self, profiles: List[StudentProfile], top_n: int = 5,
+                                 max_matrix_bytes: int = BATCH_MATRIX_BYTES) -> List[List[CollegeRecommendation]]:
+        """
+        Full scoring mode for many profiles
+        
+        Affordability, quality, accessibility, location and feature scores are
+        computed as column expressions for every program and combined with
+        each profile's priority weights (see _component_weights).
+        
+        Args:
+            profiles: Student profiles to score
+            top_n: Recommendations returned per profile
+            max_matrix_bytes: Memory budget for one chunk's score matrices
+            
+        Returns:
+            Top recommendations for each profile, in the order of profiles
+        """
+        # Five component matrices plus the overall matrix
+        return self._rank_batch(profiles, lambda chunk: (self._full_components(chunk), self._component_weights(chunk)),
+                                top_n, max_matrix_bytes, 6)
+    
+    def _rank_batch(self, profiles: List[StudentProfile], score_chunk, top_n: int,
+                    max_matrix_bytes: int, matrices: int) -> List[List[CollegeRecommendation]]:
+        """
+        Score profiles chunk by chunk and keep the top_n programs of each
+        
+        Args:
+            profiles: Student profiles to score
+            score_chunk: Maps a list of profiles to (components, weights); components are
+                (profiles x programs) matrices or program vectors, weights scalars or (profiles x 1) columns
+            top_n: Recommendations returned per profile
+            max_matrix_bytes: Memory budget for one chunk's score matrices
+            matrices: (profiles x programs) float64 matrices alive per chunk
+        """
+        with self._reading() as state:
+            row_bytes = max(1, len(state.df)) * np.dtype(np.float64).itemsize * matrices
+            chunk_size = max(1, max_matrix_bytes // row_bytes)
+            
+            results = []
+            for start in range(0, len(profiles), chunk_size):
+                chunk = profiles[start:start + chunk_size]
+                components, weights = score_chunk(chunk)
+                overall = np.zeros((len(chunk), len(state.df)))
+                for component, values in components.items():
+                    overall += values * weights[component]
+                for row in range(len(chunk)):
+                    row_components = {component: values[row] if values.ndim == 2 else values
+                                      for component, values in components.items()}
+                    results.append(self._build_recommendations(overall[row], row_components, top_n))
+        return results
+    
+    def _build_recommendations(self, overall: np.ndarray, components: Dict[str, np.ndarray],
+                               top_n: int) -> List[CollegeRecommendation]:
+        """Result objects and reasoning text for the top_n programs only"""
         recommendations = []
-        for idx, row in self.df.iterrows():
-            college_info = row.to_dict()
-            score_sum = 0.0
+        for rank, position in enumerate(top_k_indices(overall, top_n), start=1):
+            component_scores = dict.fromkeys(('affordability_score', 'quality_score', 'accessibility_score',
+                                              'location_score', 'feature_score'), 0.0)
             reasoning_parts = []
-            if 'location' in factors:
-                location_score = self._calculate_location_score(college_info, profile)
-                score_sum += location_score * factor_weights['location']
-                reasoning_parts.append(f"Location: {location_score:.2f}")
-            if 'fee' in factors:
-                fee_score = 1 - (college_info.get('fee', 0) / (self.df['fee'].max() if self.df['fee'].max() > 0 else 1))
-                score_sum += fee_score * factor_weights['fee']
-                reasoning_parts.append(f"Fee: {fee_score:.2f}")
-            if 'pass_rate' in factors:
-                pass_rate_score = college_info.get('pass_percentage', 0) / 100.0
-                score_sum += pass_rate_score * factor_weights['pass_rate']
-                reasoning_parts.append(f"Pass Rate: {pass_rate_score:.2f}")
+            for component, values in components.items():
+                field, label = SCORE_FIELDS[component]
+                component_scores[field] = float(values[position])
+                reasoning_parts.append(f"{label}: {values[position]:.2f}")
+            score_sum = float(overall[position])
             score = RecommendationScore(
                 overall_score=score_sum,
-                affordability_score=fee_score if 'fee' in factors else 0.0,
-                quality_score=pass_rate_score if 'pass_rate' in factors else 0.0,
-                accessibility_score=0.0,
-                location_score=location_score if 'location' in factors else 0.0,
-                feature_score=0.0,
-                reasoning=", ".join(reasoning_parts)
+                reasoning=", ".join(reasoning_parts),
+                **component_scores
             )
             recommendations.append(CollegeRecommendation(
-                college_info=college_info,
+                college_info=self._college_info_at(position),
                 score=score,
-                rank=0,
+                rank=rank,
                 match_percentage=score_sum * 100
             ))
-        recommendations.sort(key=lambda x: x.score.overall_score, reverse=True)
-        for i, rec in enumerate(recommendations):
-            rec.rank = i + 1
-        return recommendations[:top_n]
\ No newline at end of file
+        return recommendations
+    
+    def nearest_colleges(self, latitude: float, longitude: float, k: int = 5,
+                         max_distance_km: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Programs closest to a point, for the Nearest intent
+        
+        Args:
+            latitude: Student latitude
+            longitude: Student longitude
+            k: Number of programs to return
+            max_distance_km: Optional radius; programs further away are dropped
+            
+        Returns:
+            Program dictionaries with a distance_km key, nearest first
+        """
+        with self._reading() as state:
+            positions, distances = state.geo_index.nearest(latitude, longitude, k)
+            if max_distance_km is not None:
+                keep = distances <= max_distance_km
+                positions, distances = positions[keep], distances[keep]
+            return [{**self._college_info_at(position).to_dict(), 'distance_km': float(distance)}
+                    for position, distance in zip(positions, distances)]
+    
+    def similar_programs(self, course_id: int, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Programs most like a given one ("more like this")
+        
+        Programs are compared on their normalized fee, rating, pass percentage,
+        cutoff, faculty ratio, scholarship and location.
+        
+        Args:
+            course_id: Program to match
+            k: Number of similar programs to return
+            
+        Returns:
+            Program dictionaries with a similarity_distance key, most similar first
+        """
+        with self._reading() as state:
+            if course_id not in state.course_positions:
+                raise ValueError(f"Course '{course_id}' not found in college data.")
+            position = state.course_positions.get_loc(course_id)
+            tree = state.similarity_index
+            count = min(k + 1, len(state.df))
+            distances, positions = tree.query(tree.data[position:position + 1], k=count)
+            matches = [(other, distance) for other, distance in zip(positions[0], distances[0]) if other != position][:k]
+            return [{**self._college_info_at(other).to_dict(), 'similarity_distance': float(distance)}
+                    for other, distance in matches]
+    
+    def _college_info_at(self, position: int) -> CollegeInfo:
+        """Build the CollegeInfo for one row of the loaded catalog"""
+        values = {name: column[position] for name, column in self.state.info_columns.items()}
+        return CollegeInfo(**{name: _to_python(value) for name, value in values.items()})
@@ -0,0 +1,197 @@
+import itertools
+import threading
+import time
+import logging
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from storage_backend import BACKEND_ERRORS, ResultSet, StorageBackend, WriteStatement
+
+logger = logging.getLogger(__name__)
+
+ROUND_ROBIN = 'round_robin'
+LEAST_LATENCY = 'least_latency'
+
+# Weight of the newest sample in a replica's latency average
+LATENCY_SMOOTHING = 0.2
+
+# Seconds a replica that failed a read is tried only after every healthy one
+REPLICA_COOL_OFF = 30.0
+
+class ReplicaRouter(StorageBackend):
+    """
+    Sends reads to read replicas and everything else to the primary.
+
+    Reads go to replicas round-robin or to the one with the lowest recent
+    latency. With hedge_after set, a read still running after that many
+    seconds is also sent to a second replica and whichever answers first
+    is returned. A replica that fails is skipped for the rest of the read,
+    falling back to the primary when no replica succeeds, and for
+    REPLICA_COOL_OFF seconds afterwards it is only tried once every healthy
+    replica has failed (its latency average is not updated by failures, so
+    least_latency routing would otherwise keep picking it first).
+    """
+
+    name = 'replicated'
+
+    def __init__(self, primary: StorageBackend, replicas: List[StorageBackend],
+                 routing: str = ROUND_ROBIN, hedge_after: Optional[float] = None):
+        """
+        Args:
+            primary: Backend for writes, change-marker probes and raw connections
+            replicas: Backends serving reads (the primary is used if empty)
+            routing: 'round_robin' or 'least_latency'
+            hedge_after: Seconds before a slow read is hedged to another replica (None disables)
+        """
+        if routing not in (ROUND_ROBIN, LEAST_LATENCY):
+            raise ValueError(f"Unknown read routing '{routing}'")
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.routing = routing
+        self.hedge_after = hedge_after
+        self._next = itertools.count()
+        self._latency: List[Optional[float]] = [None] * len(self.replicas)
+        self._reads = [0] * len(self.replicas)
+        self._errors = [0] * len(self.replicas)
+        self._down_until = [float('-inf')] * len(self.replicas)
+        self._lock = threading.Lock()
+        self._counters = {'hedges': 0, 'hedge_wins': 0, 'failovers': 0, 'primary_reads': 0}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if hedge_after is not None and len(self.replicas) > 1:
+            self._executor = ThreadPoolExecutor(max_workers=4 * len(self.replicas),
+                                                thread_name_prefix="replica-read")
+
+    @contextmanager
+    def connection(self):
+        with self.primary.connection() as connection:
+            yield connection
+
+    def fetch_all(self, query: str, params: List[Any] = None, timeout: Optional[float] = None) -> ResultSet:
+        order = self._read_order()
+        if not order:
+            return self._read_primary(query, params, timeout)
+        if self._executor is not None and len(order) > 1:
+            return self._hedged_fetch(order, query, params, timeout)
+        for index in order:
+            try:
+                return self._timed_fetch(index, query, params, timeout)
+            except BACKEND_ERRORS as e:
+                logger.warning(f"Read replica {index} failed, trying the next one: {e}")
+                self._count('failovers')
+        return self._read_primary(query, params, timeout)
+
+    def iter_chunks(self, query: str, params: List[Any] = None, chunk_size: int = 1000,
+                    timeout: Optional[float] = None) -> Iterator[ResultSet]:
+        # Streams stay on one replica; chunks cannot be merged across servers
+        order = self._read_order()
+        backend = self.replicas[order[0]] if order else self.primary
+        yield from backend.iter_chunks(query, params, chunk_size, timeout)
+
+    def execute_transaction(self, statements: List[WriteStatement]):
+        self.primary.execute_transaction(statements)
+
+    def catalog_version(self, version_query: str, timeout: Optional[float] = None) -> Tuple[Any, ...]:
+        return self.primary.catalog_version(version_query, timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """Router counters, per-replica reads/errors/latency and each backend's own stats"""
+        now = time.monotonic()
+        with self._lock:
+            data: Dict[str, Any] = dict(self._counters)
+            data['replicas'] = [
+                {'reads': self._reads[i], 'errors': self._errors[i],
+                 'latency_ms': self._latency[i] * 1000 if self._latency[i] is not None else None,
+                 'cooling_off': self._down_until[i] > now,
+                 **replica.stats()}
+                for i, replica in enumerate(self.replicas)
+            ]
+        data['backend'] = self.name
+        data['routing'] = self.routing
+        data['primary'] = self.primary.stats()
+        return data
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        for backend in [self.primary, *self.replicas]:
+            backend.close()
+
+    def _read_order(self) -> List[int]:
+        """Replica indexes in the order a read should try them"""
+        count = len(self.replicas)
+        if count == 0:
+            return []
+        if self.routing == LEAST_LATENCY:
+            with self._lock:
+                # Unmeasured replicas sort first so each gets sampled
+                order = sorted(range(count), key=lambda i: -1.0 if self._latency[i] is None else self._latency[i])
+        else:
+            start = next(self._next) % count
+            order = [(start + offset) % count for offset in range(count)]
+        now = time.monotonic()
+        with self._lock:
+            # Stable: replicas cooling off after a failure keep their relative order at the end
+            return sorted(order, key=lambda i: self._down_until[i] > now)
+
+    def _timed_fetch(self, index: int, query: str, params: List[Any], timeout: Optional[float]) -> ResultSet:
+        start = time.perf_counter()
+        try:
+            result = self.replicas[index].fetch_all(query, params, timeout)
+        except BaseException:
+            with self._lock:
+                self._errors[index] += 1
+                self._down_until[index] = time.monotonic() + REPLICA_COOL_OFF
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self._reads[index] += 1
+            previous = self._latency[index]
+            self._latency[index] = elapsed if previous is None else (
+                LATENCY_SMOOTHING * elapsed + (1 - LATENCY_SMOOTHING) * previous)
+        return result
+
+    def _hedged_fetch(self, order: List[int], query: str, params: List[Any],
+                      timeout: Optional[float]) -> ResultSet:
+        """Start on the first replica, add the next one if it is slow or fails, return the first answer"""
+        remaining = list(order)
+        pending = {}
+
+        def launch():
+            index = remaining.pop(0)
+            pending[self._executor.submit(self._timed_fetch, index, query, params, timeout)] = index
+
+        launch()
+        first = next(iter(pending))
+        while pending:
+            # At most one hedge in flight; further replicas are only tried after failures
+            can_hedge = remaining and len(pending) < 2
+            done, _ = wait(pending, timeout=self.hedge_after if can_hedge else None, return_when=FIRST_COMPLETED)
+            if not done:
+                # Still waiting after hedge_after: race another replica
+                self._count('hedges')
+                launch()
+                continue
+            for future in done:
+                index = pending.pop(future)
+                try:
+                    result = future.result()
+                except BACKEND_ERRORS as e:
+                    logger.warning(f"Read replica {index} failed: {e}")
+                    self._count('failovers')
+                    if remaining:
+                        launch()
+                    continue
+                if future is not first:
+                    self._count('hedge_wins')
+                # Slower duplicates finish in the background and release their connections
+                return result
+        return self._read_primary(query, params, timeout)
+
+    def _read_primary(self, query: str, params: List[Any], timeout: Optional[float]) -> ResultSet:
+        self._count('primary_reads')
+        return self.primary.fetch_all(query, params, timeout)
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
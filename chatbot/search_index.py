@@ -0,0 +1,85 @@
+"""
+Catalog search-token index
+Whole-word postings over college, location, department and course names,
+kept in memory for the catalog snapshot and in the CatalogSearchToken
+side table for SQL queries
+"""
+
+from collections import defaultdict
+from functools import reduce
+from operator import attrgetter
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from query_builder import FIELDS, SEARCHABLE_FIELDS, SEARCH_TOKEN_TABLE, Condition, Op, Predicate, tokenize
+
+# Statements that rewrite the side table from a list of (Token, Field, EntityId) rows
+DELETE_SEARCH_TOKENS = f"DELETE FROM {SEARCH_TOKEN_TABLE}"
+INSERT_SEARCH_TOKEN = f"INSERT INTO {SEARCH_TOKEN_TABLE} (Token, Field, EntityId) VALUES (%s, %s, %s)"
+
+_TEXT = {field: attrgetter(FIELDS[field][1]) for field in SEARCHABLE_FIELDS}
+_ENTITY_ID = {field: attrgetter(FIELDS[id_field][1]) for field, id_field in SEARCHABLE_FIELDS.items()}
+_EMPTY = np.empty(0, dtype=np.int32)
+
+class CatalogSearchIndex:
+    """
+    Inverted index from (field, token) to positions in a catalog snapshot.
+
+    Each posting list is a sorted int32 array, so a HAS_TOKENS predicate is
+    an intersection of its tokens' postings and an OR-condition the union of
+    its predicates' matches.
+    """
+
+    def __init__(self, items: Sequence[Any]):
+        """
+        Args:
+            items: CollegeInfo entries (e.g. CatalogSnapshot.colleges); kept by reference
+        """
+        self.items = items
+        postings: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        token_cache: Dict[str, Tuple[str, ...]] = {}
+        for position, item in enumerate(items):
+            for field, text_of in _TEXT.items():
+                text = text_of(item)
+                tokens = token_cache.get(text)
+                if tokens is None:
+                    tokens = token_cache[text] = tokenize(text)
+                for token in tokens:
+                    postings[(field, token)].append(position)
+        self._postings = {key: np.array(positions, dtype=np.int32) for key, positions in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self._postings)
+
+    def positions(self, predicate: Predicate) -> np.ndarray:
+        """Positions of the items matching a HAS_TOKENS predicate"""
+        lists = [self._postings.get((predicate.field, token), _EMPTY) for token in predicate.tokens]
+        return reduce(lambda a, b: np.intersect1d(a, b, assume_unique=True), sorted(lists, key=len))
+
+    def candidates(self, conditions: Iterable[Condition]) -> Sequence[Any]:
+        """
+        Narrow the items by every condition made only of HAS_TOKENS predicates
+
+        Other conditions are left to the caller, so the result is a superset
+        of the query's matches.
+        """
+        selected = None
+        for condition in conditions:
+            if not condition.predicates or any(p.op is not Op.HAS_TOKENS for p in condition.predicates):
+                continue
+            matched = reduce(np.union1d, (self.positions(p) for p in condition.predicates))
+            selected = matched if selected is None else np.intersect1d(selected, matched, assume_unique=True)
+        if selected is None:
+            return self.items
+        return [self.items[position] for position in selected]
+
+def search_token_rows(items: Iterable[Any]) -> List[Tuple[str, str, int]]:
+    """Distinct (Token, Field, EntityId) rows of the CatalogSearchToken side table"""
+    rows = set()
+    for item in items:
+        for field, text_of in _TEXT.items():
+            entity_id = _ENTITY_ID[field](item)
+            for token in tokenize(text_of(item)):
+                rows.add((token, field, entity_id))
+    return sorted(rows)
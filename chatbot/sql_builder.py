@@ -1,17 +1,88 @@
-import mysql.connector
-from mysql.connector import Error
 import pandas as pd
-from typing import List, Dict, Any, Optional, Tuple
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 import logging
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
 from dataclasses import dataclass
+import copy
 import json
+import csv
+
+from mysql.connector import errorcode
+
+from storage_backend import BACKEND_ERRORS, MySQLBackend, StorageBackend
+from replica_router import ROUND_ROBIN, ReplicaRouter
+from catalog_snapshot import CatalogSnapshot, CatalogSnapshotManager, CatalogUnavailable
+from catalog_aggregates import CatalogAggregates
+from query_builder import CATALOG_SELECT, CatalogQuery, Condition, Op, OrderBy, Predicate, normalize_sql, rewrite_token_search
+from query_cache import QueryResultCache
+from search_index import DELETE_SEARCH_TOKENS, INSERT_SEARCH_TOKEN, CatalogSearchIndex, search_token_rows
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-@dataclass
+# Change marker for the catalog tables: a counter that the triggers in
+# migrations/003_catalog_version.mysql.sql bump on every write, so a probe is a
+# primary-key lookup and edits that keep row counts (a new fee) still move it.
+# information_schema.TABLES.UPDATE_TIME is not usable: MySQL 8 caches it for
+# information_schema_stats_expiry seconds (a day by default).
+DEFAULT_CATALOG_VERSION_QUERY = "SELECT Version FROM CatalogVersion WHERE Id = 1"
+
+# Exact but reads the three tables in full; only used until the migration above is applied
+CATALOG_CHECKSUM_QUERY = "CHECKSUM TABLE College, Department, Courses"
+
+# Keyset orderings for paginated listings; each ends in the unique CourseId
+TOP_RATED_ORDER = (OrderBy('rating', descending=True), OrderBy('pass_percentage', descending=True),
+                   OrderBy('course_id', descending=True))
+AFFORDABLE_ORDER = (OrderBy('fee'), OrderBy('rating', descending=True), OrderBy('course_id'))
+
+# Rows fetched per round trip by the streaming API
+DEFAULT_STREAM_CHUNK_SIZE = 1000
+
+# Full College ⋈ Department ⋈ Courses join
+CATALOG_QUERY = CATALOG_SELECT + """
+ORDER BY c.Name, d.Name, co.Name
+"""
+
+# Result column -> (CollegeInfo.to_dict() key, NumPy dtype, value used for NULL).
+# Fill values mirror _convert_to_college_info_list so both paths agree.
+CATALOG_COLUMNS: Dict[str, Tuple[str, Any, Any]] = {
+    'CollegeId': ('college_id', np.int64, 0),
+    'CollegeName': ('college_name', object, ''),
+    'Location': ('location', object, ''),
+    'Type': ('college_type', object, ''),
+    'ContactNumber': ('contact_number', object, ''),
+    'Email': ('email', object, ''),
+    'HostelAvailability': ('hostel_availability', np.bool_, False),
+    'Latitude': ('latitude', np.float64, 0.0),
+    'Longitude': ('longitude', np.float64, 0.0),
+    'DepartmentId': ('department_id', np.int64, 0),
+    'DepartmentName': ('department_name', object, ''),
+    'CourseId': ('course_id', np.int64, 0),
+    'CourseName': ('course_name', object, ''),
+    'AverageCutoffRank': ('average_cutoff_rank', np.int64, 0),
+    'Fee': ('fee', np.float64, 0.0),
+    'TotalSeats': ('total_seats', np.int64, 0),
+    'FacultyToStudentRatio': ('faculty_to_student_ratio', np.float64, 0.0),
+    'PassPercentage': ('pass_percentage', np.int64, 0),
+    'InternshipOpportunities': ('internship_opportunities', np.bool_, False),
+    'GereralScholarship': ('general_scholarship', np.int64, 0),
+    'SemesterScholarship': ('semester_scholarship', object, ''),
+    'TotalQuotas': ('total_quotas', np.int64, 0),
+    'DurationInYears': ('duration_in_years', np.int64, 4),
+    'AdmissionProcess': ('admission_process', object, ''),
+    'Rating': ('rating', np.float64, 0.0)
+}
+
+def _intern(value: Any) -> Any:
+    """Intern text values that repeat across many catalog rows"""
+    return sys.intern(value) if isinstance(value, str) else value
+
+@dataclass(slots=True)
 class College:
     """Data class for College information"""
     college_id: int
@@ -24,14 +95,14 @@ class College:
     latitude: float
     longitude: float
 
-@dataclass
+@dataclass(slots=True)
 class Department:
     """Data class for Department information"""
     department_id: int
     name: str
     college_id: int
 
-@dataclass
+@dataclass(slots=True)
 class Course:
     """Data class for Course information"""
     course_id: int
@@ -50,9 +121,9 @@ class Course:
     rating: float
     department_id: int
 
-@dataclass
+@dataclass(slots=True)
 class CollegeInfo:
-    """Combined college information"""
+    """Combined college information (college and department are shared by all their courses)"""
     college: College
     department: Department
     course: Course
@@ -87,57 +158,167 @@ class CollegeInfo:
             'rating': self.course.rating
         }
 
+@dataclass
+class CatalogPage:
+    """One page of a ranked listing and the token for the next page (None on the last page)"""
+    items: List[CollegeInfo]
+    next_token: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'items': [item.to_dict() for item in self.items], 'next_token': self.next_token}
+
 class DatabaseConfig:
-    """Database configuration class"""
+    """
+    Database configuration class
+
+    Connection pooling is enabled when pool_size > 0; set it to 0 to open a
+    fresh connection per query. Pooled connections keep up to
+    statement_cache_size server-side prepared statements each. Once the
+    catalog snapshot is enabled, query results are cached for
+    result_cache_ttl seconds and dropped on every catalog change
+    (result_cache_size = 0 disables); without the snapshot nothing would
+    notice catalog edits, so results are never cached.
+    With token_search, name and location filters are answered from the
+    search-token index (run migrations/001_catalog_search_token.sql first
+    when querying MySQL; the token table is then rebuilt by the catalog
+    snapshot whenever the catalog changes).
+    
+    host/port name the primary. replicas lists read replicas as 'host' or
+    'host:port'; reads are routed to them by read_routing ('round_robin'
+    or 'least_latency') and hedged to a second replica after hedge_after
+    seconds. Writes and change-marker probes stay on the primary.
+    
+    catalog_version_query reads the catalog change marker; the default
+    needs migrations/003_catalog_version.mysql.sql and falls back to
+    CHECKSUM TABLE until it is applied.
+    
+    statement_timeout bounds each query's execution time in seconds
+    (None for no limit) and also caps pool_checkout_timeout, so waiting
+    for a connection never outlasts the statement budget; connect_timeout
+    bounds opening a connection.
+    """
     def __init__(self, host: str = 'localhost', database: str = 'CollegeInfoSystem',
-                 user: str = 'root', password: str = '', port: int = 3306):
+                 user: str = 'root', password: str = '', port: int = 3306,
+                 pool_size: int = 5, pool_idle_timeout: float = 300.0,
+                 pool_health_check: bool = True, pool_warmup: bool = True,
+                 pool_checkout_timeout: float = 10.0, statement_cache_size: int = 32,
+                 result_cache_size: int = 256, result_cache_ttl: float = 60.0,
+                 catalog_version_query: str = DEFAULT_CATALOG_VERSION_QUERY,
+                 token_search: bool = False, replicas: Optional[List[str]] = None,
+                 read_routing: str = ROUND_ROBIN, hedge_after: Optional[float] = None,
+                 statement_timeout: Optional[float] = None, connect_timeout: int = 10):
         self.host = host
         self.database = database
         self.user = user
         self.password = password
         self.port = port
+        self.pool_size = pool_size
+        self.pool_idle_timeout = pool_idle_timeout
+        self.pool_health_check = pool_health_check
+        self.pool_warmup = pool_warmup
+        self.pool_checkout_timeout = pool_checkout_timeout
+        self.statement_cache_size = statement_cache_size
+        self.result_cache_size = result_cache_size
+        self.result_cache_ttl = result_cache_ttl
+        self.catalog_version_query = catalog_version_query
+        self.token_search = token_search
+        self.replicas = list(replicas or [])
+        self.read_routing = read_routing
+        self.hedge_after = hedge_after
+        self.statement_timeout = statement_timeout
+        self.connect_timeout = connect_timeout
+    
+    def replica_configs(self) -> List['DatabaseConfig']:
+        """One config per read replica, identical to this one apart from host and port"""
+        configs = []
+        for replica in self.replicas:
+            host, _, port = replica.partition(':')
+            config = copy.copy(self)
+            config.host, config.port, config.replicas = host, int(port) if port else self.port, []
+            configs.append(config)
+        return configs
 
 class CollegeDataExtractor:
     """Main data extraction class for College Information System"""
     
-    def __init__(self, db_config: DatabaseConfig):
+    def __init__(self, db_config: DatabaseConfig, backend: Optional[StorageBackend] = None):
+        """
+        Args:
+            db_config: Database configuration
+            backend: Where queries run; defaults to the MySQL server in db_config
+                (pass an EmbeddedBackend to run against an in-process catalog)
+        """
         self.db_config = db_config
         self.connection = None
+        self.backend = backend if backend is not None else self._create_backend(db_config)
+        self.snapshot: Optional[CatalogSnapshotManager] = None
+        self.aggregates: Optional[CatalogAggregates] = None
+        self.search_index: Optional[CatalogSearchIndex] = None
+        self._search_index_lock = threading.Lock()
+        self._search_tokens_lock = threading.Lock()
+        self._search_token_rows: Optional[frozenset] = None
+        # Catalog version the token table was last written for (None: unknown)
+        self._search_tokens_version: Optional[Tuple[Any, ...]] = None
+        # Created by enable_catalog_snapshot, whose version changes are what invalidate it
+        self.result_cache: Optional[QueryResultCache] = None
+        self._catalog_version_query = db_config.catalog_version_query
         
+    @staticmethod
+    def _create_backend(db_config: DatabaseConfig) -> StorageBackend:
+        """MySQL primary, behind a replica router when read replicas are configured"""
+        primary = MySQLBackend(db_config)
+        if not db_config.replicas:
+            return primary
+        replicas = [MySQLBackend(config) for config in db_config.replica_configs()]
+        return ReplicaRouter(primary, replicas, db_config.read_routing, db_config.hedge_after)
+    
     @contextmanager
     def get_connection(self):
         """Context manager for database connections"""
-        connection = None
-        try:
-            connection = mysql.connector.connect(
-                host=self.db_config.host,
-                database=self.db_config.database,
-                user=self.db_config.user,
-                password=self.db_config.password,
-                port=self.db_config.port,
-                autocommit=True
-            )
+        with self.backend.connection() as connection:
             yield connection
-        except Error as e:
-            logger.error(f"Database connection error: {e}")
-            raise
-        finally:
-            if connection and connection.is_connected():
-                connection.close()
     
-    def execute_query(self, query: str, params: List[Any] = None) -> List[Dict[str, Any]]:
-        """Execute a query and return results as list of dictionaries"""
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Return connection pool checkout counts and wait times (empty when pooling is off)"""
+        return self.backend.stats()
+    
+    def close(self):
+        """Stop the snapshot refresher and release backend connections"""
+        if self.snapshot is not None:
+            self.snapshot.stop()
+        self.backend.close()
+    
+    def execute_query(self, query: str, params: List[Any] = None, use_cache: bool = True,
+                      timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Execute a query and return results as list of dictionaries
+        
+        Results are served from the result cache when it is enabled; concurrent
+        callers with the same (normalized SQL, params) share a single database
+        fetch. Pass use_cache=False to always read from the database.
+        
+        The statement is aborted after timeout seconds (default
+        DatabaseConfig.statement_timeout; 0 for no limit) and the backend's
+        error is raised.
+        """
+        if timeout is None:
+            timeout = self.db_config.statement_timeout
+        if self.result_cache is not None and use_cache:
+            key = (normalize_sql(query), tuple(params or ()))
+            return list(self.result_cache.get_or_load(key, lambda: self._execute_query(query, params, timeout)))
+        return self._execute_query(query, params, timeout)
+    
+    def _execute_query(self, query: str, params: List[Any] = None,
+                       timeout: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Run a query against the backend"""
         try:
-            with self.get_connection() as connection:
-                cursor = connection.cursor(dictionary=True)
-                cursor.execute(query, params or [])
-                results = cursor.fetchall()
-                cursor.close()
-                
-                logger.info(f"Query executed successfully. Retrieved {len(results)} records.")
-                return results
+            columns, rows = self.backend.fetch_all(query, params, timeout)
+            results = [dict(zip(columns, row)) for row in rows]
+            
+            logger.info(f"Query executed successfully. Retrieved {len(results)} records.")
+            return results
                 
-        except Error as e:
+        except BACKEND_ERRORS as e:
             logger.error(f"Error executing query: {e}")
             logger.error(f"Query: {query}")
             logger.error(f"Params: {params}")
@@ -146,34 +327,251 @@ class CollegeDataExtractor:
     def execute_query_to_dataframe(self, query: str, params: List[Any] = None) -> pd.DataFrame:
         """Execute query and return results as pandas DataFrame"""
         try:
-            with self.get_connection() as connection:
-                df = pd.read_sql(query, connection, params=params)
-                logger.info(f"Query executed successfully. Retrieved {len(df)} records.")
-                return df
+            columns, rows = self.backend.fetch_all(query, params, self.db_config.statement_timeout)
+            df = pd.DataFrame.from_records(rows, columns=list(columns), coerce_float=True)
+            logger.info(f"Query executed successfully. Retrieved {len(df)} records.")
+            return df
                 
-        except Error as e:
+        except BACKEND_ERRORS as e:
             logger.error(f"Error executing query to DataFrame: {e}")
             raise
     
-    def get_all_colleges_info(self) -> List[CollegeInfo]:
-        """Get complete information for all colleges with their departments and courses"""
-        query = """
-        SELECT 
-            c.CollegeId, c.Name AS CollegeName, c.Location, c.Type, 
-            c.ContactNumber, c.Email, c.HostelAvailability, c.Latitude, c.Longitude,
-            d.DepartmentId, d.Name AS DepartmentName,
-            co.CourseId, co.Name AS CourseName, co.AverageCutoffRank, co.Fee, 
-            co.TotalSeats, co.FacultyToStudentRatio, co.PassPercentage, 
-            co.InternshipOpportunities, co.GereralScholarship, co.SemesterScholarship,
-            co.TotalQuotas, co.DurationInYears, co.AdmissionProcess, co.Rating
-        FROM College c
-        LEFT JOIN Department d ON c.CollegeId = d.CollegeId
-        LEFT JOIN Courses co ON d.DepartmentId = co.DepartmentId
-        WHERE co.CourseId IS NOT NULL
-        ORDER BY c.Name, d.Name, co.Name
+    # ==================== STREAMING ====================
+    
+    def stream_query_chunks(self, query: str, params: List[Any] = None,
+                            chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+                            timeout: Optional[float] = None) -> Iterator[Tuple[Tuple[str, ...], List[tuple]]]:
+        """
+        Stream a result set in fixed-size chunks from an unbuffered cursor
+        
+        Rows are read from the server as they are fetched, so only one chunk is
+        held in memory at a time. The connection stays checked out until the
+        generator is exhausted or closed.
+        
+        Args:
+            query: SQL query string with placeholders
+            params: List of parameters for the query placeholders
+            chunk_size: Number of rows fetched per round trip
+            timeout: Seconds the statement may run (None for no limit)
+            
+        Yields:
+            Tuples of (column names, list of row tuples)
+        """
+        total = 0
+        for columns, rows in self.backend.iter_chunks(query, params, chunk_size, timeout):
+            total += len(rows)
+            yield columns, rows
+        logger.info(f"Streamed query completed. Retrieved {total} records.")
+    
+    def stream_query(self, query: str, params: List[Any] = None,
+                     chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+        """Yield result rows one at a time as dictionaries, fetched in chunks"""
+        for columns, rows in self.stream_query_chunks(query, params, chunk_size):
+            for row in rows:
+                yield dict(zip(columns, row))
+    
+    def stream_to_csv(self, query: str, filename: str, params: List[Any] = None,
+                      chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> int:
+        """Write query results to CSV in constant memory; returns the number of rows written"""
+        written = 0
+        try:
+            with open(filename, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.writer(f)
+                header_written = False
+                for columns, rows in self.stream_query_chunks(query, params, chunk_size):
+                    if not header_written:
+                        writer.writerow(columns)
+                        header_written = True
+                    writer.writerows(rows)
+                    written += len(rows)
+            logger.info(f"Streamed {written} rows to {filename}")
+            return written
+        except Exception as e:
+            logger.error(f"Error streaming to CSV: {e}")
+            raise
+    
+    def stream_to_jsonl(self, query: str, filename: str, params: List[Any] = None,
+                        chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE) -> int:
+        """Write query results as JSON Lines in constant memory; returns the number of rows written"""
+        written = 0
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                for columns, rows in self.stream_query_chunks(query, params, chunk_size):
+                    f.writelines(json.dumps(dict(zip(columns, row)), default=str) + '\n' for row in rows)
+                    written += len(rows)
+            logger.info(f"Streamed {written} rows to {filename}")
+            return written
+        except Exception as e:
+            logger.error(f"Error streaming to JSONL: {e}")
+            raise
+    
+    # ==================== COLUMNAR RESULTS ====================
+    
+    def fetch_columnar(self, query: str, params: List[Any] = None,
+                       chunk_size: int = DEFAULT_STREAM_CHUNK_SIZE,
+                       timeout: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """
+        Execute a query and return one typed NumPy array per result column
+        
+        Cursor tuples are transposed chunk by chunk straight into arrays, without
+        building per-row dictionaries or CollegeInfo objects. Columns listed in
+        CATALOG_COLUMNS are renamed to their CollegeInfo.to_dict() keys and cast
+        to their declared dtype; any other column is returned as an object array
+        under its result name.
+        
+        Args:
+            query: SQL query string with placeholders
+            params: List of parameters for the query placeholders
+            chunk_size: Number of rows fetched per round trip
+            timeout: Seconds the statement may run (None for no limit)
+            
+        Returns:
+            Dictionary mapping column name to a 1-D array (all of equal length,
+            zero-length but still keyed when the query returns no rows)
+        """
+        columns: Tuple[str, ...] = ()
+        parts: List[List[np.ndarray]] = []
+        for columns, rows in self.stream_query_chunks(query, params, chunk_size, timeout):
+            if not parts:
+                parts = [[] for _ in columns]
+            for i, values in enumerate(zip(*rows)):
+                parts[i].append(self._to_array(columns[i], values))
+        
+        result = {}
+        for i, name in enumerate(columns):
+            key, dtype, _ = CATALOG_COLUMNS.get(name, (name, object, None))
+            result[key] = np.concatenate(parts[i]) if parts[i] else np.empty(0, dtype=dtype)
+        return result
+    
+    def get_catalog_columns(self, timeout: Optional[float] = None) -> Dict[str, np.ndarray]:
+        """Get the full catalog join as typed column arrays (timeout in seconds, None for no limit)"""
+        return self.fetch_columnar(CATALOG_QUERY, timeout=timeout)
+    
+    @staticmethod
+    def _to_array(name: str, values: Tuple[Any, ...]) -> np.ndarray:
+        """Convert one column of a chunk to a typed array, substituting the NULL fill value"""
+        _, dtype, fill = CATALOG_COLUMNS.get(name, (name, object, None))
+        if dtype is object:
+            array = np.empty(len(values), dtype=object)
+            array[:] = [fill if v is None else v for v in values] if fill is not None else values
+            return array
+        if dtype is np.float64:
+            return np.fromiter((fill if v is None else float(v) for v in values), dtype=dtype, count=len(values))
+        return np.fromiter((fill if v is None else v for v in values), dtype=dtype, count=len(values))
+    
+    # ==================== CATALOG SNAPSHOT ====================
+    
+    def enable_catalog_snapshot(self, refresh_interval: float = 30.0,
+                                background: bool = True) -> CatalogSnapshotManager:
         """
+        Serve full-catalog reads from an in-process snapshot
         
-        results = self.execute_query(query)
+        With background refresh, requests never load the catalog: until the
+        first snapshot is published they query the database directly, each
+        statement bounded by DatabaseConfig.statement_timeout.
+        
+        Also maintains in-memory aggregates from snapshot diffs, which the
+        statistics methods then read instead of running GROUP BY queries, and
+        turns on the query result cache, cleared on every catalog change.
+        
+        Args:
+            refresh_interval: Seconds between change-marker probes
+            background: Refresh in a daemon thread instead of only on demand
+            
+        Returns:
+            The snapshot manager (call refresh() on it to force a reload)
+        """
+        if self.snapshot is None:
+            self.snapshot = CatalogSnapshotManager(
+                load=self._load_all_colleges_info,
+                probe=self.get_catalog_version,
+                refresh_interval=refresh_interval,
+                request_timeout=self.db_config.statement_timeout
+            )
+            self.snapshot.add_listener(self._on_catalog_changed)
+            self.aggregates = CatalogAggregates()
+            self.snapshot.add_listener(self.aggregates.on_snapshot)
+            if self.db_config.result_cache_size > 0:
+                self.result_cache = QueryResultCache(self.db_config.result_cache_size,
+                                                     self.db_config.result_cache_ttl)
+        if background:
+            self.snapshot.start()
+        return self.snapshot
+    
+    def get_catalog_version(self, timeout: Optional[float] = None) -> Tuple[Any, ...]:
+        """
+        Return the current catalog change marker
+        
+        The probe is bounded like execute_query: timeout seconds, defaulting
+        to DatabaseConfig.statement_timeout (MySQL only enforces it on the
+        SELECT of the version row, not on the CHECKSUM TABLE fallback).
+        """
+        if timeout is None:
+            timeout = self.db_config.statement_timeout
+        query = self._catalog_version_query
+        try:
+            return self.backend.catalog_version(query, timeout)
+        except BACKEND_ERRORS as e:
+            if query != DEFAULT_CATALOG_VERSION_QUERY or getattr(e, 'errno', None) != errorcode.ER_NO_SUCH_TABLE:
+                raise
+        logger.warning("CatalogVersion table missing (run migrations/003_catalog_version.mysql.sql); "
+                       "probing catalog changes with CHECKSUM TABLE instead.")
+        self._catalog_version_query = CATALOG_CHECKSUM_QUERY
+        return self.backend.catalog_version(CATALOG_CHECKSUM_QUERY, timeout)
+    
+    def _on_catalog_changed(self, previous: Optional[CatalogSnapshot], current: CatalogSnapshot):
+        """Drop cached query results computed against an older catalog version and resync the token table"""
+        if self.result_cache is not None:
+            self.result_cache.invalidate()
+        if self.db_config.token_search:
+            self._sync_search_tokens(current.colleges, current.version)
+    
+    def get_catalog_aggregates(self) -> Optional[CatalogAggregates]:
+        """Return aggregates current with the catalog snapshot, or None if no snapshot is available"""
+        snapshot = self._request_snapshot()
+        if snapshot is None:
+            return None
+        self.aggregates.sync(snapshot)
+        return self.aggregates
+    
+    def get_result_cache_stats(self) -> Dict[str, Any]:
+        """Return result cache hit/miss counters (empty when the cache is off)"""
+        return self.result_cache.stats() if self.result_cache is not None else {}
+    
+    def get_catalog_snapshot(self) -> Optional[CatalogSnapshot]:
+        """Return the current catalog snapshot, or None if snapshots are disabled or still loading"""
+        return self._request_snapshot()
+    
+    def get_snapshot_columns(self, snapshot: CatalogSnapshot) -> Dict[str, np.ndarray]:
+        """
+        A catalog snapshot as the typed column arrays get_catalog_columns returns
+        
+        Lets listeners of snapshot changes rebuild from the rows the snapshot
+        already loaded instead of running the catalog join again.
+        """
+        records = [info.to_dict() for info in snapshot.colleges]
+        return {key: self._to_array(name, tuple(record[key] for record in records))
+                for name, (key, _, _) in CATALOG_COLUMNS.items()}
+    
+    def _request_snapshot(self) -> Optional[CatalogSnapshot]:
+        """Snapshot to answer a request from, or None to query the database instead"""
+        if self.snapshot is None:
+            return None
+        try:
+            return self.snapshot.get()
+        except CatalogUnavailable:
+            return None
+    
+    def get_all_colleges_info(self) -> List[CollegeInfo]:
+        """Get complete information for all colleges with their departments and courses"""
+        snapshot = self._request_snapshot()
+        if snapshot is not None:
+            return list(snapshot.colleges)
+        return self._load_all_colleges_info(self.db_config.statement_timeout)
+    
+    def _load_all_colleges_info(self, timeout: Optional[float] = None) -> List[CollegeInfo]:
+        """Run the full catalog join against the database (timeout in seconds, None for no limit)"""
+        results = self.execute_query(CATALOG_QUERY, use_cache=False, timeout=timeout or 0)
         return self._convert_to_college_info_list(results)
     
     def get_colleges_by_filters(self, query: str, params: List[Any] = None) -> List[CollegeInfo]:
@@ -190,40 +588,143 @@ class CollegeDataExtractor:
         results = self.execute_query(query, params)
         return self._convert_to_college_info_list(results)
     
+    def get_colleges_by_query(self, query: CatalogQuery) -> List[CollegeInfo]:
+        """
+        Get colleges matching a typed catalog query
+        
+        Answered in memory from the catalog snapshot once one is published,
+        otherwise rendered to SQL and run against the database. With
+        DatabaseConfig.token_search, name and location filters are rewritten
+        into search-token lookups first; in SQL only once the token table has
+        been written for the current snapshot version, LIKE filters until then.
+        """
+        snapshot = self._request_snapshot()
+        if snapshot is not None:
+            if not self.db_config.token_search:
+                return query.apply(snapshot.colleges)
+            return rewrite_token_search(query).apply(snapshot.colleges, self._get_search_index(snapshot))
+        if self.db_config.token_search and self._search_tokens_current():
+            query = rewrite_token_search(query)
+        sql, params = query.to_sql()
+        return self.get_colleges_by_filters(sql, params)
+    
+    def get_colleges_with_fallback(self, query: CatalogQuery) -> Tuple[List[CollegeInfo], bool]:
+        """
+        Get colleges matching a catalog query, flagging answers that may be out of date
+        
+        With the catalog snapshot enabled the query is answered in memory, so a
+        database incident never reaches the caller once a snapshot is loaded;
+        while the snapshot cannot be refreshed its answers are flagged stale.
+        Without a snapshot the query runs against the database.
+        
+        Returns:
+            (matching colleges, True if they may be out of date)
+            
+        Raises:
+            The backend error when no snapshot has been loaded yet (or snapshots are disabled)
+        """
+        results = self.get_colleges_by_query(query)
+        return results, self.snapshot is not None and self.snapshot.is_stale
+    
+    def _get_search_index(self, snapshot: CatalogSnapshot) -> CatalogSearchIndex:
+        """Return the in-memory search index for a snapshot, building it on first use"""
+        index = self.search_index
+        if index is not None and index.items is snapshot.colleges:
+            return index
+        with self._search_index_lock:
+            if self.search_index is None or self.search_index.items is not snapshot.colleges:
+                self.search_index = CatalogSearchIndex(snapshot.colleges)
+                logger.info(f"Search index built: {len(self.search_index)} postings.")
+            return self.search_index
+    
+    def rebuild_search_tokens(self) -> int:
+        """
+        Rewrite the CatalogSearchToken side table from the current catalog
+        
+        With token_search and the catalog snapshot enabled this also happens
+        automatically on every snapshot change. Without a snapshot nothing
+        notices catalog edits, so SQL queries keep using LIKE filters.
+        
+        Returns:
+            Number of token rows written
+        """
+        snapshot = self._request_snapshot()
+        if snapshot is None:
+            return self._sync_search_tokens(self._load_all_colleges_info(self.db_config.statement_timeout),
+                                            None, force=True)
+        return self._sync_search_tokens(snapshot.colleges, snapshot.version, force=True)
+    
+    def _sync_search_tokens(self, colleges: List[CollegeInfo], version: Optional[Tuple[Any, ...]],
+                            force: bool = False) -> int:
+        """Rewrite the token table for a catalog version unless it already holds exactly these rows"""
+        rows = search_token_rows(colleges)
+        with self._search_tokens_lock:
+            current = frozenset(rows)
+            # The write itself moves the embedded backend's version; skip the identical rewrite it triggers
+            if not force and current == self._search_token_rows:
+                self._search_tokens_version = version
+                return 0
+            self._search_tokens_version = None
+            self.backend.execute_transaction([(DELETE_SEARCH_TOKENS, None), (INSERT_SEARCH_TOKEN, rows)])
+            self._search_token_rows = current
+            self._search_tokens_version = version
+        if self.result_cache is not None:
+            self.result_cache.invalidate()
+        logger.info(f"Search token table rebuilt: {len(rows)} rows.")
+        return len(rows)
+    
+    def _search_tokens_current(self) -> bool:
+        """True if the token table was written for the latest catalog version the snapshot has seen"""
+        snapshot = self.snapshot.current if self.snapshot is not None else None
+        return snapshot is not None and self._search_tokens_version == snapshot.version
+    
     def get_colleges_dataframe(self, query: str, params: List[Any] = None) -> pd.DataFrame:
         """Get colleges as pandas DataFrame for analysis"""
         return self.execute_query_to_dataframe(query, params)
     
     def _convert_to_college_info_list(self, results: List[Dict[str, Any]]) -> List[CollegeInfo]:
-        """Convert database results to CollegeInfo objects"""
+        """
+        Convert database results to CollegeInfo objects
+        
+        Colleges and departments are identity-mapped, so each one is built once
+        and shared by all of its courses, and repeated text values are interned.
+        """
         college_info_list = []
+        colleges: Dict[int, College] = {}
+        departments: Dict[Tuple[int, int], Department] = {}
         
         for row in results:
             # Handle case where some fields might be None
             if row.get('CollegeId') is None:
                 continue
-                
-            college = College(
-                college_id=row['CollegeId'],
-                name=row['CollegeName'],
-                location=row['Location'],
-                type=row['Type'],
-                contact_number=row['ContactNumber'] or '',
-                email=row['Email'] or '',
-                hostel_availability=bool(row['HostelAvailability']),
-                latitude=float(row['Latitude']) if row['Latitude'] else 0.0,
-                longitude=float(row['Longitude']) if row['Longitude'] else 0.0
-            )
             
-            department = Department(
-                department_id=row['DepartmentId'] or 0,
-                name=row['DepartmentName'] or '',
-                college_id=row['CollegeId']
-            )
+            college_id = row['CollegeId']
+            college = colleges.get(college_id)
+            if college is None:
+                college = colleges[college_id] = College(
+                    college_id=college_id,
+                    name=_intern(row['CollegeName']),
+                    location=_intern(row['Location']),
+                    type=_intern(row['Type']),
+                    contact_number=row['ContactNumber'] or '',
+                    email=row['Email'] or '',
+                    hostel_availability=bool(row['HostelAvailability']),
+                    latitude=float(row['Latitude']) if row['Latitude'] else 0.0,
+                    longitude=float(row['Longitude']) if row['Longitude'] else 0.0
+                )
+            
+            department_id = row['DepartmentId'] or 0
+            department = departments.get((college_id, department_id))
+            if department is None:
+                department = departments[(college_id, department_id)] = Department(
+                    department_id=department_id,
+                    name=_intern(row['DepartmentName'] or ''),
+                    college_id=college_id
+                )
             
             course = Course(
                 course_id=row.get('CourseId', 0) or 0,
-                name=row.get('CourseName', '') or '',
+                name=_intern(row.get('CourseName', '') or ''),
                 average_cutoff_rank=row.get('AverageCutoffRank', 0) or 0,
                 fee=float(row.get('Fee', 0) or 0),
                 total_seats=row.get('TotalSeats', 0) or 0,
@@ -231,12 +732,12 @@ class CollegeDataExtractor:
                 pass_percentage=row.get('PassPercentage', 0) or 0,
                 internship_opportunities=bool(row.get('InternshipOpportunities', False)),
                 general_scholarship=row.get('GereralScholarship', 0) or 0,
-                semester_scholarship=row.get('SemesterScholarship', '') or '',
+                semester_scholarship=_intern(row.get('SemesterScholarship', '') or ''),
                 total_quotas=row.get('TotalQuotas', 0) or 0,
                 duration_in_years=row.get('DurationInYears', 4) or 4,
-                admission_process=row.get('AdmissionProcess', '') or '',
+                admission_process=_intern(row.get('AdmissionProcess', '') or ''),
                 rating=float(row.get('Rating', 0) or 0),
-                department_id=row['DepartmentId'] or 0
+                department_id=department_id
             )
             
             college_info_list.append(CollegeInfo(college, department, course))
@@ -247,6 +748,9 @@ class CollegeDataExtractor:
     
     def get_course_statistics(self) -> pd.DataFrame:
         """Get statistical summary of courses"""
+        aggregates = self.get_catalog_aggregates()
+        if aggregates is not None:
+            return aggregates.course_statistics()
         query = """
         SELECT 
             co.Name AS course_name,
@@ -269,6 +773,9 @@ class CollegeDataExtractor:
     
     def get_college_statistics(self) -> pd.DataFrame:
         """Get statistical summary of colleges"""
+        aggregates = self.get_catalog_aggregates()
+        if aggregates is not None:
+            return aggregates.college_statistics()
         query = """
         SELECT 
             c.Name as college_name,
@@ -292,6 +799,9 @@ class CollegeDataExtractor:
     
     def get_location_statistics(self) -> pd.DataFrame:
         """Get statistics by location"""
+        aggregates = self.get_catalog_aggregates()
+        if aggregates is not None:
+            return aggregates.location_statistics()
         query = """
         SELECT 
             c.Location,
@@ -311,6 +821,9 @@ class CollegeDataExtractor:
     
     def get_fee_distribution(self) -> pd.DataFrame:
         """Get fee distribution analysis"""
+        aggregates = self.get_catalog_aggregates()
+        if aggregates is not None:
+            return aggregates.fee_distribution()
         query = """
         SELECT 
             co.Name as course_name,
@@ -325,6 +838,37 @@ class CollegeDataExtractor:
         """
         return self.execute_query_to_dataframe(query)
     
+    def get_statistics_bundle(self, max_workers: int = 4) -> Dict[str, pd.DataFrame]:
+        """
+        Get course, college, location and fee statistics in one call
+        
+        The four queries run concurrently, each on its own pooled connection,
+        so the call takes about as long as the slowest query. When the
+        statistics come from in-memory aggregates they are read directly.
+        
+        Args:
+            max_workers: Upper bound on concurrent queries (also capped by the pool size)
+            
+        Returns:
+            Dictionary with 'course_statistics', 'college_statistics',
+            'location_statistics' and 'fee_distribution' DataFrames
+        """
+        methods = {
+            'course_statistics': self.get_course_statistics,
+            'college_statistics': self.get_college_statistics,
+            'location_statistics': self.get_location_statistics,
+            'fee_distribution': self.get_fee_distribution
+        }
+        if self.aggregates is not None:
+            return {name: method() for name, method in methods.items()}
+        
+        workers = min(max_workers, len(methods))
+        if self.db_config.pool_size > 0:
+            workers = min(workers, self.db_config.pool_size)
+        with ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="statistics") as executor:
+            futures = {name: executor.submit(method) for name, method in methods.items()}
+            return {name: future.result() for name, future in futures.items()}
+    
     def get_top_colleges_by_rating(self, limit: int = 10) -> List[CollegeInfo]:
         """Get top colleges by rating"""
         query = """
@@ -367,6 +911,54 @@ class CollegeDataExtractor:
         results = self.execute_query(query, [max_fee, limit])
         return self._convert_to_college_info_list(results)
     
+    def get_top_colleges_page(self, page_size: int = 10, page_token: Optional[str] = None) -> CatalogPage:
+        """
+        Get one page of programs ranked by rating and pass percentage (ties by newest course id)
+        
+        Args:
+            page_size: Programs per page
+            page_token: next_token of the previous page (None for the first page)
+        """
+        return self.get_catalog_page(CatalogQuery.build(order_by=TOP_RATED_ORDER), page_size, page_token)
+    
+    def get_affordable_courses_page(self, max_fee: float, page_size: int = 10,
+                                    page_token: Optional[str] = None) -> CatalogPage:
+        """
+        Get one page of programs under max_fee ranked by fee, rating and course id
+        
+        Args:
+            max_fee: Maximum fee
+            page_size: Programs per page
+            page_token: next_token of the previous page (None for the first page)
+        """
+        query = CatalogQuery.build([Condition.any_of([Predicate('fee', Op.LESS_EQUAL, max_fee)])], AFFORDABLE_ORDER)
+        return self.get_catalog_page(query, page_size, page_token)
+    
+    def get_catalog_page(self, query: CatalogQuery, page_size: int = 10,
+                         page_token: Optional[str] = None) -> CatalogPage:
+        """
+        Get one page of a catalog query using keyset pagination
+        
+        Each page continues strictly after the last row of the previous one
+        instead of using OFFSET, so later pages cost the same as the first.
+        
+        Args:
+            query: Filters and ordering; the ordering must end in a unique field (course_id)
+            page_size: Programs per page
+            page_token: next_token of the previous page (None for the first page)
+            
+        Raises:
+            ValueError: If page_token is malformed or belongs to a different query
+        """
+        page_query = query.after_token(page_token) if page_token else query
+        # One extra row tells whether another page follows
+        items = self.get_colleges_by_query(CatalogQuery(page_query.conditions, page_query.order_by,
+                                                        page_size + 1, page_query.after))
+        if len(items) <= page_size:
+            return CatalogPage(items)
+        items = items[:page_size]
+        return CatalogPage(items, query.page_token(items[-1]))
+    
     def export_to_json(self, data: List[CollegeInfo], filename: str):
         """Export college info to JSON file"""
         try:
@@ -379,14 +971,9 @@ class CollegeDataExtractor:
             raise
     
     def export_to_csv(self, query: str, filename: str, params: List[Any] = None):
-        """Export query results directly to CSV"""
-        try:
-            df = self.execute_query_to_dataframe(query, params)
-            df.to_csv(filename, index=False)
-            logger.info(f"Data exported to {filename}")
-        except Exception as e:
-            logger.error(f"Error exporting to CSV: {e}")
-            raise
+        """Export query results directly to CSV (streamed, so memory use is independent of result size)"""
+        self.stream_to_csv(query, filename, params)
+        logger.info(f"Data exported to {filename}")
 
 # ==================== USAGE EXAMPLES ====================
 
@@ -410,14 +997,13 @@ def example_usage():
         all_colleges = extractor.get_all_colleges_info()
         print(f"Total records: {len(all_colleges)}")
         
-        # Example 2: Get statistics
+        # Example 2: Get statistics (queried concurrently)
+        statistics = extractor.get_statistics_bundle()
         print("\n=== Course Statistics ===")
-        course_stats = extractor.get_course_statistics()
-        print(course_stats.head())
+        print(statistics['course_statistics'].head())
         
         print("\n=== College Statistics ===")
-        college_stats = extractor.get_college_statistics()
-        print(college_stats.head())
+        print(statistics['college_statistics'].head())
         
         # Example 3: Get top colleges
         print("\n=== Top 5 Colleges by Rating ===")
@@ -440,6 +1026,12 @@ def example_usage():
             "college_data.csv"
         )
         
+        # Example 7: Stream the full catalog to JSON Lines in constant memory
+        extractor.stream_to_jsonl(
+            "SELECT * FROM College c LEFT JOIN Department d ON c.CollegeId = d.CollegeId LEFT JOIN Courses co ON d.DepartmentId = co.DepartmentId", 
+            "college_data.jsonl"
+        )
+        
     except Exception as e:
         logger.error(f"Error in example usage: {e}")
 
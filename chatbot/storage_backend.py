@@ -0,0 +1,239 @@
+import re
+import sqlite3
+import logging
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import mysql.connector
+from mysql.connector import Error
+
+from connection_pool import ConnectionPool
+from query_builder import shape_key
+
+logger = logging.getLogger(__name__)
+
+# Errors any backend may raise while executing a statement
+BACKEND_ERRORS = (Error, sqlite3.Error)
+
+# Result of a query: column names and row tuples
+ResultSet = Tuple[Tuple[str, ...], List[tuple]]
+
+# First keyword of a SELECT, where MySQL accepts optimizer hints
+_SELECT = re.compile(r"^\s*SELECT\b", re.IGNORECASE)
+
+# A write statement and its parameter rows (None runs the statement once without parameters)
+WriteStatement = Tuple[str, Optional[Sequence[Sequence[Any]]]]
+
+class StorageBackend(ABC):
+    """
+    Where CollegeDataExtractor's SQL runs.
+
+    Backends accept MySQL-flavoured SQL with %s placeholders (as produced by
+    query_builder and the extractor) and return rows as tuples alongside
+    the result's column names.
+    """
+
+    name = 'backend'
+
+    @abstractmethod
+    @contextmanager
+    def connection(self):
+        """Context manager yielding a DB-API connection"""
+
+    @abstractmethod
+    def fetch_all(self, query: str, params: List[Any] = None, timeout: Optional[float] = None) -> ResultSet:
+        """
+        Execute a query and return (column names, all rows)
+
+        Args:
+            query: SQL with %s placeholders
+            params: Placeholder values
+            timeout: Seconds the statement may run before the backend aborts it (None for no limit)
+        """
+
+    @abstractmethod
+    def iter_chunks(self, query: str, params: List[Any] = None, chunk_size: int = 1000,
+                    timeout: Optional[float] = None) -> Iterator[ResultSet]:
+        """
+        Execute a query and yield (column names, rows) chunks of at most chunk_size rows
+
+        An empty result yields one (column names, []) chunk, so callers
+        always learn the columns. timeout is as for fetch_all.
+        """
+
+    def execute_transaction(self, statements: List[WriteStatement]):
+        """Run write statements (executemany over their parameter rows) in one transaction"""
+        raise NotImplementedError(f"The {self.name} backend is read-only")
+
+    def catalog_version(self, version_query: str, timeout: Optional[float] = None) -> Tuple[Any, ...]:
+        """Return a value that changes whenever the catalog tables change (timeout as for fetch_all)"""
+        _, rows = self.fetch_all(version_query, timeout=timeout)
+        return tuple(tuple(row) for row in rows)
+
+    def stats(self) -> Dict[str, Any]:
+        """Backend-specific usage counters"""
+        return {}
+
+    def close(self):
+        """Release connections held by the backend"""
+
+class MySQLBackend(StorageBackend):
+    """MySQL server backend with pooled connections and prepared statements"""
+
+    name = 'mysql'
+
+    def __init__(self, db_config: Any):
+        """
+        Args:
+            db_config: DatabaseConfig with connection and pool settings
+        """
+        self.db_config = db_config
+        self.pool: Optional[ConnectionPool] = None
+
+        if db_config.pool_size > 0:
+            self.pool = ConnectionPool(
+                self._connect,
+                size=db_config.pool_size,
+                idle_timeout=db_config.pool_idle_timeout,
+                health_check=db_config.pool_health_check,
+                checkout_timeout=pool_checkout_limit(db_config),
+                statement_cache_size=db_config.statement_cache_size
+            )
+            if db_config.pool_warmup:
+                try:
+                    self.pool.warm_up()
+                except Error as e:
+                    # The server may come up later; connections are then opened on demand
+                    logger.warning(f"Connection pool warm-up failed: {e}")
+
+    def _connect(self):
+        """Open a new connection using the configured credentials"""
+        return mysql.connector.connect(
+            host=self.db_config.host,
+            database=self.db_config.database,
+            user=self.db_config.user,
+            password=self.db_config.password,
+            port=self.db_config.port,
+            connection_timeout=self.db_config.connect_timeout,
+            autocommit=True
+        )
+
+    @contextmanager
+    def connection(self):
+        """Context manager for database connections (pooled when enabled)"""
+        if self.pool is not None:
+            try:
+                with self.pool.connection() as connection:
+                    yield connection
+            except Error as e:
+                logger.error(f"Database connection error: {e}")
+                raise
+            return
+
+        connection = None
+        try:
+            connection = self._connect()
+            yield connection
+        except Error as e:
+            logger.error(f"Database connection error: {e}")
+            raise
+        finally:
+            # Unconditional: is_connected() pings the server, which fails on a
+            # connection an abandoned stream left with unread rows
+            if connection is not None:
+                connection.close()
+
+    def fetch_all(self, query: str, params: List[Any] = None, timeout: Optional[float] = None) -> ResultSet:
+        if timeout:
+            query = with_execution_limit(query, timeout)
+        if self.pool is not None and self.pool.statement_cache_size > 0:
+            return self._fetch_prepared(query, params)
+        with self.connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(query, params or [])
+            rows = cursor.fetchall()
+            columns = tuple(cursor.column_names)
+            cursor.close()
+            return columns, rows
+
+    def _fetch_prepared(self, query: str, params: List[Any] = None) -> ResultSet:
+        """Run a query on the checked-out connection's prepared statement for its shape"""
+        try:
+            with self.pool.checkout() as pooled:
+                cursor = pooled.statements.execute(shape_key(query), query, params)
+                rows = cursor.fetchall()
+                return tuple(cursor.column_names), rows
+        except Error as e:
+            logger.error(f"Database connection error: {e}")
+            raise
+
+    def iter_chunks(self, query: str, params: List[Any] = None, chunk_size: int = 1000,
+                    timeout: Optional[float] = None) -> Iterator[ResultSet]:
+        if timeout:
+            query = with_execution_limit(query, timeout)
+        with self.connection() as connection:
+            cursor = connection.cursor(buffered=False)
+            cursor.execute(query, params or [])
+            columns = tuple(cursor.column_names)
+            empty = True
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                empty = False
+                yield columns, rows
+            if empty:
+                yield columns, []
+            # Only reached once the result set is fully read. An abandoned stream
+            # raises GeneratorExit at the yield instead: the pool discards the
+            # connection, and without a pool connection() closes it
+            cursor.close()
+
+    def execute_transaction(self, statements: List[WriteStatement]):
+        with self.connection() as connection:
+            connection.start_transaction()
+            cursor = connection.cursor()
+            try:
+                for query, rows in statements:
+                    if rows is None:
+                        cursor.execute(query)
+                    elif rows:
+                        cursor.executemany(query, rows)
+                connection.commit()
+            except Error:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Connection pool checkout counts and wait times (empty when pooling is off)"""
+        return self.pool.stats() if self.pool is not None else {}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+def with_execution_limit(query: str, timeout: float) -> str:
+    """
+    Add a MAX_EXECUTION_TIME optimizer hint to a SELECT
+
+    The server aborts the statement (error 3024) once it has run for
+    timeout seconds. Other statements are returned unchanged.
+    """
+    milliseconds = max(1, int(timeout * 1000))
+    return _SELECT.sub(f"SELECT /*+ MAX_EXECUTION_TIME({milliseconds}) */", query, count=1)
+
+def pool_checkout_limit(db_config: Any) -> float:
+    """
+    Seconds a query may wait for a pooled connection
+
+    pool_checkout_timeout, capped at statement_timeout when one is set, so
+    a caller with a statement budget is not left waiting longer for a
+    connection than its query may run.
+    """
+    timeout = db_config.pool_checkout_timeout
+    if db_config.statement_timeout:
+        timeout = min(timeout, db_config.statement_timeout)
+    return timeout
@@ -0,0 +1,80 @@
+"""
+Synthetic Catalog Generator
+Builds large College ⋈ Department ⋈ Courses result sets for benchmarks
+"""
+
+import random
+from typing import Any, Dict, List
+
+LOCATIONS = [
+    'SANEPA, LALITPUR', 'BALKHU, KATHMANDU', 'CHYASAL, LALITPUR', 'TALCHHIKHEL, LALITPUR',
+    'KALIMATI, KATHMANDU', 'BANESHWOR, KATHMANDU', 'DHULIKHEL, KAVRE', 'PULCHOWK, LALITPUR',
+    'LAKESIDE, POKHARA', 'TRAFFIC CHOWK, BUTWAL', 'DHARAN, SUNSARI', 'BHARATPUR, CHITWAN'
+]
+
+COURSES = [
+    'COMPUTER ENGINEERING', 'CIVIL ENGINEERING', 'ELECTRICAL ENGINEERING',
+    'ELECTRONICS ENGINEERING', 'MECHANICAL ENGINEERING', 'ARCHITECTURE',
+    'SOFTWARE ENGINEERING', 'INFORMATION TECHNOLOGY'
+]
+
+ADMISSION_PROCESSES = ['IOE ENTRANCE RESULT', 'KU ENTRANCE RESULT', 'PU ENTRANCE RESULT']
+
+def _decoded(value: str) -> str:
+    """Return a new string object, as a driver decoding wire bytes would"""
+    return value.encode('utf-8').decode('utf-8')
+
+def generate_catalog_rows(num_courses: int = 100_000, departments_per_college: int = 5,
+                          courses_per_department: int = 4, seed: int = 42) -> List[Dict[str, Any]]:
+    """
+    Generate rows shaped like the catalog join returned by execute_query
+
+    Every string is built per row, as a database driver would decode it, so
+    memory measurements reflect what a real result set costs.
+
+    Args:
+        num_courses: Number of course rows to generate
+        departments_per_college: Departments created for each college
+        courses_per_department: Courses offered by each department
+        seed: Random seed for reproducible catalogs
+
+    Returns:
+        List of dictionaries keyed by the catalog query's column names
+    """
+    rng = random.Random(seed)
+    rows = []
+    courses_per_college = departments_per_college * courses_per_department
+
+    for course_id in range(1, num_courses + 1):
+        college_id = (course_id - 1) // courses_per_college + 1
+        department_id = (course_id - 1) // courses_per_department + 1
+        location = LOCATIONS[college_id % len(LOCATIONS)]
+        course_name = COURSES[course_id % len(COURSES)]
+        rows.append({
+            'CollegeId': college_id,
+            'CollegeName': f"COLLEGE OF ENGINEERING {college_id}",
+            'Location': _decoded(location),
+            'Type': _decoded('PRIVATE' if college_id % 4 else 'PUBLIC'),
+            'ContactNumber': f"01{5000000 + college_id}",
+            'Email': f"info@college{college_id}.edu.np",
+            'HostelAvailability': college_id % 3 == 0,
+            'Latitude': 27.6 + (college_id % 100) * 0.002,
+            'Longitude': 85.2 + (college_id % 97) * 0.002,
+            'DepartmentId': department_id,
+            'DepartmentName': f"DEPARTMENT OF {COURSES[department_id % len(COURSES)]}",
+            'CourseId': course_id,
+            'CourseName': _decoded(course_name),
+            'AverageCutoffRank': rng.randint(500, 12000),
+            'Fee': float(rng.randrange(500_000, 2_000_000, 10_000)),
+            'TotalSeats': rng.choice([48, 96]),
+            'FacultyToStudentRatio': rng.choice([0.01, 0.02, 0.03]),
+            'PassPercentage': rng.randint(60, 98),
+            'InternshipOpportunities': rng.random() < 0.8,
+            'GereralScholarship': rng.randint(0, 70),
+            'SemesterScholarship': _decoded(rng.choice(['TOP 5%', 'TOP 10%', 'NONE'])),
+            'TotalQuotas': rng.randint(0, 10),
+            'DurationInYears': 4,
+            'AdmissionProcess': _decoded(ADMISSION_PROCESSES[college_id % len(ADMISSION_PROCESSES)]),
+            'Rating': round(rng.uniform(3.0, 5.0), 1)
+        })
+    return rows
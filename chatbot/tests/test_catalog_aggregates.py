@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+from embedded_backend import EmbeddedBackend
+from sql_builder import CollegeDataExtractor, DatabaseConfig
+from synthetic_catalog import generate_catalog_rows
+
+# Statistics method -> columns identifying a row (ties in the ORDER BY may come back in any order)
+STATISTICS = {
+    'get_course_statistics': ['course_name'],
+    'get_college_statistics': ['college_name'],
+    'get_location_statistics': ['Location'],
+    'get_fee_distribution': ['course_name'],
+}
+
+EDITS = {
+    'fee and rating updates': [
+        ("UPDATE Courses SET Fee = Fee * 2, Rating = 5.0 WHERE CourseId % 7 = 0", None),
+        ("UPDATE Courses SET TotalSeats = TotalSeats + 10, PassPercentage = 99 WHERE CourseId % 5 = 1", None),
+    ],
+    'deletes': [
+        # Removes the current fee extremes, so min/max must be recomputed
+        ("DELETE FROM Courses WHERE Fee = (SELECT MAX(Fee) FROM Courses)", None),
+        ("DELETE FROM Courses WHERE Fee = (SELECT MIN(Fee) FROM Courses)", None),
+        ("DELETE FROM Courses WHERE CourseId % 9 = 0", None),
+    ],
+    'location move': [
+        ("UPDATE College SET Location = (SELECT Location FROM College WHERE CollegeId = 2) WHERE CollegeId = 1", None),
+    ],
+}
+
+@pytest.fixture
+def extractors():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(300))
+    from_sql = CollegeDataExtractor(DatabaseConfig(result_cache_size=0), backend=backend)
+    from_aggregates = CollegeDataExtractor(DatabaseConfig(result_cache_size=0), backend=backend)
+    snapshot = from_aggregates.enable_catalog_snapshot(background=False)
+    return backend, snapshot, from_sql, from_aggregates
+
+def _canonical(frame, keys):
+    return frame.sort_values(keys).reset_index(drop=True)
+
+def _assert_statistics_match(from_sql, from_aggregates):
+    for method, keys in STATISTICS.items():
+        expected = _canonical(getattr(from_sql, method)(), keys)
+        actual = _canonical(getattr(from_aggregates, method)(), keys)
+        # SUM comes back as an integer from the GROUP BY and as a float from the running totals
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False, rtol=1e-9)
+
+def test_aggregates_match_group_by_queries(extractors):
+    _, _, from_sql, from_aggregates = extractors
+    assert from_aggregates.get_catalog_aggregates() is not None
+    _assert_statistics_match(from_sql, from_aggregates)
+
+@pytest.mark.parametrize('edit', list(EDITS))
+def test_aggregates_follow_catalog_edits(extractors, edit):
+    backend, snapshot, from_sql, from_aggregates = extractors
+    from_aggregates.get_course_statistics()
+    backend.execute_transaction(EDITS[edit])
+    snapshot.refresh()
+    _assert_statistics_match(from_sql, from_aggregates)
+
+def test_statistics_bundle_runs_every_query(extractors):
+    _, _, from_sql, from_aggregates = extractors
+    bundle = from_sql.get_statistics_bundle()
+    assert set(bundle) == {'course_statistics', 'college_statistics', 'location_statistics', 'fee_distribution'}
+    for method, keys in STATISTICS.items():
+        name = method[len('get_'):]
+        pd.testing.assert_frame_equal(_canonical(bundle[name], keys), _canonical(getattr(from_sql, method)(), keys))
+    # The aggregate-backed bundle holds the same statistics
+    for name, frame in from_aggregates.get_statistics_bundle().items():
+        keys = STATISTICS[f"get_{name}"]
+        pd.testing.assert_frame_equal(_canonical(frame, keys), _canonical(bundle[name], keys),
+                                      check_dtype=False, rtol=1e-9)
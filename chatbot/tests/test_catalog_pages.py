@@ -0,0 +1,72 @@
+import base64
+import json
+
+import pytest
+
+from embedded_backend import EmbeddedBackend
+from sql_builder import TOP_RATED_ORDER, CatalogQuery, CollegeDataExtractor, DatabaseConfig
+from synthetic_catalog import generate_catalog_rows
+
+@pytest.fixture(scope='module')
+def extractor():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(120))
+    return CollegeDataExtractor(DatabaseConfig(result_cache_size=0), backend=backend)
+
+def _course_ids(items):
+    return [item.course.course_id for item in items]
+
+def _all_pages(fetch):
+    pages, token = [], None
+    while True:
+        page = fetch(token)
+        pages.append(page)
+        token = page.next_token
+        if token is None:
+            return pages
+
+@pytest.mark.parametrize('snapshot', [False, True])
+def test_pages_cover_the_ordered_listing_once(snapshot):
+    extractor = CollegeDataExtractor(DatabaseConfig(result_cache_size=0),
+                                     backend=EmbeddedBackend.from_catalog_rows(generate_catalog_rows(120)))
+    if snapshot:
+        extractor.enable_catalog_snapshot(background=False)
+    expected = _course_ids(extractor.get_colleges_by_query(CatalogQuery.build(order_by=TOP_RATED_ORDER)))
+
+    pages = _all_pages(lambda token: extractor.get_top_colleges_page(page_size=7, page_token=token))
+
+    assert all(len(page.items) == 7 for page in pages[:-1])
+    assert _course_ids([item for page in pages for item in page.items]) == expected
+
+def test_affordable_pages_stay_under_the_fee(extractor):
+    pages = _all_pages(lambda token: extractor.get_affordable_courses_page(1200000, page_size=5, page_token=token))
+    fees = [item.course.fee for page in pages for item in page.items]
+    assert fees == sorted(fees) and all(fee <= 1200000 for fee in fees) and len(fees) > 5
+
+def test_page_token_round_trip(extractor):
+    query = CatalogQuery.build(order_by=TOP_RATED_ORDER)
+    last = extractor.get_colleges_by_query(query)[3]
+    resumed = query.after_token(query.page_token(last))
+    assert resumed.after == (last.course.rating, last.course.pass_percentage, last.course.course_id)
+    assert resumed.conditions == query.conditions and resumed.order_by == query.order_by
+
+@pytest.mark.parametrize('token', ['not a token', '!!!', base64.urlsafe_b64encode(b'[1, 2]').decode(),
+                                   base64.urlsafe_b64encode(b'{"q": "x"}').decode()])
+def test_malformed_token_is_rejected(extractor, token):
+    with pytest.raises(ValueError):
+        extractor.get_top_colleges_page(page_token=token)
+
+def test_token_from_another_query_is_rejected(extractor):
+    token = extractor.get_affordable_courses_page(1200000, page_size=2).next_token
+    assert token is not None
+    with pytest.raises(ValueError, match='does not belong'):
+        extractor.get_affordable_courses_page(900000, page_size=2, page_token=token)
+    with pytest.raises(ValueError, match='does not belong'):
+        extractor.get_top_colleges_page(page_size=2, page_token=token)
+
+def test_token_with_wrong_key_count_is_rejected(extractor):
+    query = CatalogQuery.build(order_by=TOP_RATED_ORDER)
+    payload = json.loads(base64.urlsafe_b64decode(query.page_token(extractor.get_all_colleges_info()[0])))
+    payload['k'] = payload['k'][:1]
+    token = base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    with pytest.raises(ValueError):
+        query.after_token(token)
@@ -0,0 +1,157 @@
+import sqlite3
+import threading
+
+import pytest
+from mysql.connector import errorcode
+from mysql.connector.errors import ProgrammingError
+
+from catalog_snapshot import STALE_AFTER_INTERVALS, CatalogSnapshotManager, CatalogUnavailable
+from embedded_backend import EmbeddedBackend
+from sql_builder import CATALOG_CHECKSUM_QUERY, DEFAULT_CATALOG_VERSION_QUERY, CatalogQuery, CollegeDataExtractor, DatabaseConfig
+from storage_backend import pool_checkout_limit
+from synthetic_catalog import generate_catalog_rows
+
+def _extractor():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(30))
+    return CollegeDataExtractor(DatabaseConfig(result_cache_size=0), backend=backend)
+
+def test_snapshot_answers_are_flagged_stale_while_refresh_fails(monkeypatch):
+    extractor = _extractor()
+    snapshot = extractor.enable_catalog_snapshot(background=False)
+    results, stale = extractor.get_colleges_with_fallback(CatalogQuery.build())
+    assert len(results) == 30 and not stale
+
+    def unavailable(version_query, timeout=None):
+        raise sqlite3.OperationalError('database is down')
+
+    monkeypatch.setattr(extractor.backend, 'catalog_version', unavailable)
+    with pytest.raises(sqlite3.OperationalError):
+        snapshot.refresh()
+    results, stale = extractor.get_colleges_with_fallback(CatalogQuery.build())
+    assert len(results) == 30 and stale
+
+    monkeypatch.undo()
+    snapshot.refresh()
+    assert not extractor.get_colleges_with_fallback(CatalogQuery.build())[1]
+
+def test_database_errors_propagate_without_a_snapshot(monkeypatch):
+    extractor = _extractor()
+
+    def unavailable(*args, **kwargs):
+        raise sqlite3.OperationalError('database is down')
+
+    monkeypatch.setattr(extractor.backend, 'fetch_all', unavailable)
+    with pytest.raises(sqlite3.OperationalError):
+        extractor.get_colleges_with_fallback(CatalogQuery.build())
+
+@pytest.mark.parametrize('statement_timeout, expected', [(None, 10.0), (5.0, 5.0), (30.0, 10.0)])
+def test_pool_checkout_is_capped_by_statement_timeout(statement_timeout, expected):
+    assert pool_checkout_limit(DatabaseConfig(statement_timeout=statement_timeout)) == expected
+
+def test_version_probe_falls_back_to_checksum_without_the_version_table(monkeypatch):
+    extractor = _extractor()
+    probed = []
+
+    def catalog_version(version_query, timeout=None):
+        probed.append(version_query)
+        if version_query == DEFAULT_CATALOG_VERSION_QUERY:
+            raise ProgrammingError("Table 'CatalogVersion' doesn't exist", errno=errorcode.ER_NO_SUCH_TABLE)
+        return (12345,)
+
+    monkeypatch.setattr(extractor.backend, 'catalog_version', catalog_version)
+    assert extractor.get_catalog_version() == (12345,)
+    assert extractor.get_catalog_version() == (12345,)
+    # The missing table is only tried once
+    assert probed == [DEFAULT_CATALOG_VERSION_QUERY, CATALOG_CHECKSUM_QUERY, CATALOG_CHECKSUM_QUERY]
+
+def test_result_cache_is_only_enabled_with_the_snapshot():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(30))
+    extractor = CollegeDataExtractor(DatabaseConfig(), backend=backend)
+    query = "SELECT MAX(Fee) AS fee FROM Courses"
+    assert extractor.result_cache is None
+
+    snapshot = extractor.enable_catalog_snapshot(background=False)
+    before = extractor.execute_query(query)
+    assert extractor.execute_query(query) == before
+    assert extractor.get_result_cache_stats()['hits'] == 1
+
+    backend.execute_transaction([("UPDATE Courses SET Fee = Fee + 1", None)])
+    snapshot.refresh()
+    assert extractor.execute_query(query)[0]['fee'] == before[0]['fee'] + 1
+
+def test_requests_query_the_database_until_the_background_load_publishes(monkeypatch):
+    extractor = _extractor()
+    load_all = extractor._load_all_colleges_info
+    started, release = threading.Event(), threading.Event()
+    background_timeouts = []
+
+    def slow_load(timeout=None):
+        background_timeouts.append(timeout)
+        started.set()
+        release.wait(5)
+        return load_all(timeout)
+
+    snapshot = extractor.enable_catalog_snapshot(refresh_interval=60, background=False)
+    monkeypatch.setattr(snapshot, '_load', slow_load)
+    snapshot.start()
+    try:
+        assert started.wait(5)
+        with pytest.raises(CatalogUnavailable):
+            snapshot.get()
+        # Answered by bounded SQL queries instead of waiting for (or starting) a load
+        results, stale = extractor.get_colleges_with_fallback(CatalogQuery.build())
+        assert len(results) == 30 and not stale
+        assert len(extractor.get_all_colleges_info()) == 30
+        assert extractor.get_catalog_aggregates() is None
+        assert background_timeouts == [None]
+
+        release.set()
+        while snapshot.current is None:
+            threading.Event().wait(0.01)
+        assert len(extractor.get_all_colleges_info()) == 30
+        assert background_timeouts == [None]
+    finally:
+        release.set()
+        snapshot.stop()
+
+def test_on_demand_loads_use_the_request_timeout():
+    timeouts = []
+    manager = CatalogSnapshotManager(load=lambda timeout: timeouts.append(timeout) or [],
+                                     probe=lambda: len(timeouts), request_timeout=5.0)
+    manager.get()
+    manager.refresh()
+    assert timeouts == [5.0, None]
+
+def test_probes_are_bounded_by_the_statement_timeout(monkeypatch):
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(5))
+    extractor = CollegeDataExtractor(DatabaseConfig(statement_timeout=2.0), backend=backend)
+    timeouts = []
+    monkeypatch.setattr(backend, 'catalog_version', lambda query, timeout=None: timeouts.append(timeout) or (1,))
+    extractor.get_catalog_version()
+    extractor.get_catalog_version(timeout=0.5)
+    assert timeouts == [2.0, 0.5]
+
+def test_snapshot_is_stale_while_a_probe_hangs():
+    release = threading.Event()
+    probes = []
+
+    def probe():
+        probes.append(1)
+        if len(probes) > 1:
+            release.wait(5)
+        return 'v1'
+
+    manager = CatalogSnapshotManager(load=lambda timeout: [], probe=probe, refresh_interval=0.02)
+    manager.start()
+    try:
+        while len(probes) < 2:
+            threading.Event().wait(0.01)
+        threading.Event().wait(STALE_AFTER_INTERVALS * 0.02 + 0.05)
+        assert manager.is_stale and manager.last_error is None
+        release.set()
+        while len(probes) < 3:
+            threading.Event().wait(0.01)
+        assert not manager.is_stale
+    finally:
+        release.set()
+        manager.stop()
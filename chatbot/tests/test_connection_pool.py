@@ -0,0 +1,189 @@
+import threading
+
+import pytest
+from mysql.connector.errors import PoolError
+
+import connection_pool
+from connection_pool import ConnectionPool
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.executed = []
+        self.closed = False
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, tuple(params)))
+
+    def close(self):
+        self.closed = True
+
+class FakeConnection:
+    """Connection double whose liveness the test controls"""
+
+    def __init__(self, number):
+        self.number = number
+        self.alive = True
+        self.closed = False
+        self.cursors = []
+
+    def is_connected(self):
+        return self.alive and not self.closed
+
+    def cursor(self, prepared=False):
+        cursor = FakeCursor(self)
+        self.cursors.append(cursor)
+        return cursor
+
+    def close(self):
+        self.closed = True
+
+class FakeConnector:
+    def __init__(self):
+        self.connections = []
+
+    def __call__(self):
+        connection = FakeConnection(len(self.connections))
+        self.connections.append(connection)
+        return connection
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(connection_pool.time, 'monotonic', clock)
+    return clock
+
+def test_checked_in_connection_is_reused():
+    connector = FakeConnector()
+    pool = ConnectionPool(connector, size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        pass
+    assert first is second
+    assert len(connector.connections) == 1
+    stats = pool.stats()
+    assert (stats['checkouts'], stats['connections_created'], stats['idle_connections']) == (2, 1, 1)
+
+def test_idle_connections_are_reused_most_recent_first():
+    pool = ConnectionPool(FakeConnector(), size=3)
+    with pool.connection() as a, pool.connection() as b:
+        pass
+    # b is checked in first and a last, so a comes back first
+    with pool.connection() as first, pool.connection() as second:
+        assert (first, second) == (a, b)
+
+def test_pool_never_exceeds_its_size():
+    connector = FakeConnector()
+    pool = ConnectionPool(connector, size=2, checkout_timeout=0.05)
+    with pool.connection(), pool.connection():
+        with pytest.raises(PoolError):
+            with pool.connection():
+                pass
+    assert len(connector.connections) == 2
+
+def test_waiting_checkout_gets_the_returned_connection():
+    pool = ConnectionPool(FakeConnector(), size=1, checkout_timeout=5)
+    got = []
+
+    def borrow():
+        with pool.connection() as connection:
+            got.append(connection)
+
+    with pool.connection() as held:
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        thread.join(0.05)
+        assert not got
+    thread.join(5)
+    assert got == [held]
+    assert pool.stats()['max_wait_time'] > 0
+
+def test_idle_timeout_evicts_old_connections(clock):
+    connector = FakeConnector()
+    pool = ConnectionPool(connector, size=1, idle_timeout=60)
+    with pool.connection() as old:
+        pass
+    clock.now += 61
+    with pool.connection() as fresh:
+        pass
+    assert fresh is not old and old.closed
+    assert pool.stats()['idle_expirations'] == 1
+
+def test_dead_connections_are_replaced_on_checkout():
+    connector = FakeConnector()
+    pool = ConnectionPool(connector, size=1)
+    with pool.connection() as dead:
+        pass
+    dead.alive = False
+    with pool.connection() as replacement:
+        pass
+    assert replacement is not dead
+    stats = pool.stats()
+    assert (stats['health_check_failures'], stats['connections_discarded']) == (1, 1)
+
+def test_connection_is_discarded_when_the_block_raises():
+    connector = FakeConnector()
+    pool = ConnectionPool(connector, size=1)
+    with pytest.raises(RuntimeError):
+        with pool.connection() as broken:
+            raise RuntimeError('unread results')
+    assert broken.closed
+    with pool.connection() as next_one:
+        assert next_one is not broken
+
+def test_warm_up_and_close():
+    connector = FakeConnector()
+    pool = ConnectionPool(connector, size=3)
+    assert pool.warm_up() == 3
+    assert pool.stats()['idle_connections'] == 3
+    pool.close()
+    assert all(connection.closed for connection in connector.connections)
+    with pytest.raises(PoolError):
+        with pool.connection():
+            pass
+
+def test_size_must_be_positive():
+    with pytest.raises(ValueError):
+        ConnectionPool(FakeConnector(), size=0)
+
+def _statement_pool(capacity):
+    return ConnectionPool(FakeConnector(), size=1, statement_cache_size=capacity)
+
+def test_statement_cache_counts_hits_misses_and_evictions():
+    pool = _statement_pool(capacity=2)
+    with pool.checkout() as pooled:
+        for key in ['a', 'b', 'a', 'c', 'b']:
+            pooled.statements.execute(key, f"SELECT {key}")
+        assert len(pooled.statements) == 2
+    stats = pool.stats()
+    # a, b miss; a hits; c evicts b (least recently used); b misses again and evicts a
+    assert (stats['statement_hits'], stats['statement_misses'], stats['statement_evictions']) == (1, 4, 2)
+
+def test_statement_cache_closes_evicted_cursors():
+    pool = _statement_pool(capacity=1)
+    with pool.checkout() as pooled:
+        pooled.statements.execute('a', "SELECT a")
+        pooled.statements.execute('b', "SELECT b")
+        first, second = pooled.connection.cursors
+    assert first.closed and not second.closed
+
+def test_statement_cache_reuses_the_prepared_cursor_and_sql_object():
+    pool = _statement_pool(capacity=2)
+    prepared_sql = ''.join(["SELECT * FROM Courses ", "WHERE Fee <= %s"])
+    same_text = ''.join(["SELECT * FROM Courses ", "WHERE Fee <= %s"])
+    assert prepared_sql == same_text and prepared_sql is not same_text
+    with pool.checkout() as pooled:
+        first = pooled.statements.execute('fee', prepared_sql, [100])
+        second = pooled.statements.execute('fee', same_text, [200])
+        assert first is second and len(pooled.connection.cursors) == 1
+    # Connector only skips re-preparing when handed the string it prepared
+    assert [sql is prepared_sql for sql, _ in first.executed] == [True, True]
+    assert [params for _, params in first.executed] == [(100,), (200,)]
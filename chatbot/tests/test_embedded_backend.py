@@ -0,0 +1,70 @@
+import re
+import sqlite3
+import threading
+
+import pytest
+
+import embedded_backend
+from embedded_backend import EmbeddedBackend
+from query_builder import CATALOG_SELECT, CatalogQuery, Condition, Op, OrderBy, Predicate
+from synthetic_catalog import generate_catalog_rows
+
+UPDATE_FEES = ("UPDATE Courses SET Fee = Fee + 1", None)
+
+def _mysql_column_names(sql):
+    """Names MySQL reports for a SELECT list: the alias, else the bare column name"""
+    select_list = sql.split('SELECT', 1)[1].split('FROM', 1)[0]
+    return tuple(re.split(r'\s+AS\s+|\.', item.strip())[-1] for item in select_list.split(','))
+
+def test_catalog_query_returns_the_mysql_columns_and_rows():
+    rows = generate_catalog_rows(40)
+    backend = EmbeddedBackend.from_catalog_rows(rows)
+    sql, params = CatalogQuery.build(order_by=[OrderBy('course_id')]).to_sql()
+    columns, result = backend.fetch_all(sql, params)
+    assert columns == _mysql_column_names(CATALOG_SELECT)
+    expected = sorted((tuple(row[column] for column in columns) for row in rows), key=lambda row: row[11])
+    # Booleans come back as TINYINT 0/1, as from MySQL
+    assert result == expected
+
+def test_filtered_catalog_query_matches_in_memory_evaluation():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(60))
+    query = CatalogQuery.build([
+        Condition.any_of([Predicate('location', Op.CONTAINS, 'kathmandu'), Predicate('location', Op.CONTAINS, '50%_off')]),
+        Condition.any_of([Predicate('fee', Op.LESS_EQUAL, 1200000)]),
+    ], [OrderBy('fee'), OrderBy('course_id')])
+    columns, result = backend.fetch_all(*query.to_sql())
+    records = [dict(zip(columns, row)) for row in result]
+    assert records and all('KATHMANDU' in record['Location'].upper() and record['Fee'] <= 1200000
+                           for record in records)
+    assert [record['Fee'] for record in records] == sorted(record['Fee'] for record in records)
+
+def test_write_waits_for_a_stream_open_on_another_thread():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(50))
+    stream = backend.iter_chunks("SELECT CourseId, Fee FROM Courses ORDER BY CourseId", chunk_size=5)
+    first_fee = next(stream)[1][0][1]
+    done = threading.Event()
+    writer = threading.Thread(target=lambda: (backend.execute_transaction([UPDATE_FEES]), done.set()))
+    writer.start()
+    assert not done.wait(0.05)
+    # The rest of the stream still reads the catalog as it was before the write
+    assert sum(len(rows) for _, rows in stream) == 45
+    writer.join(5)
+    assert done.is_set()
+    assert backend.fetch_all("SELECT Fee FROM Courses ORDER BY CourseId")[1][0][0] == first_fee + 1
+
+def test_write_from_the_streaming_thread_times_out(monkeypatch):
+    monkeypatch.setattr(embedded_backend, 'WRITE_WAIT_TIMEOUT', 0.05)
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(20))
+    stream = backend.iter_chunks("SELECT CourseId FROM Courses", chunk_size=5)
+    next(stream)
+    with pytest.raises(sqlite3.OperationalError, match='open stream'):
+        backend.execute_transaction([UPDATE_FEES])
+    stream.close()
+    backend.execute_transaction([UPDATE_FEES])
+
+def test_stream_is_interrupted_at_its_deadline():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(50))
+    slow = "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT i FROM n"
+    with pytest.raises(sqlite3.OperationalError, match='interrupted'):
+        for _ in backend.iter_chunks(slow, chunk_size=1000, timeout=0.05):
+            pass
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from ngram_index import NgramIndex
+
+LOCATIONS = ['Balkhu, Kathmandu', 'Chyasal, Lalitpur', None, 'Lakeside, Pokhara', 'KATHMANDU',
+             'Pulchowk, Lalitpur', None, 'Bhaktapur', 'Kathmandu', 'Nan Road']
+
+TERMS = ['kathmandu', 'LALIT', 'pur', 'la', 'k', 'Chyasal, Lalitpur', 'nan', 'none', 'dharan', '']
+
+def _substring_rows(values, term):
+    return [i for i, value in enumerate(values) if not pd.isna(value) and term.upper() in str(value).upper()]
+
+@pytest.mark.parametrize('dtype', [object, 'category'])
+def test_rows_match_substring_search(dtype):
+    values = pd.Series(LOCATIONS, dtype=dtype)
+    index = NgramIndex(values)
+    for term in TERMS:
+        assert index.rows(term).tolist() == _substring_rows(LOCATIONS, term), term
+
+def test_missing_values_never_match():
+    # Code -1 of a missing categorical value must not select the last category
+    values = pd.Series([None, 'Pokhara', None, 'Lalitpur'], dtype='category')
+    index = NgramIndex(values)
+    assert index.rows('pokhara').tolist() == [1]
+    assert index.rows('').tolist() == [1, 3]
+
+def test_rows_any_is_the_union():
+    index = NgramIndex(pd.Series(LOCATIONS, dtype='category'))
+    expected = sorted(set(_substring_rows(LOCATIONS, 'pokhara')) | set(_substring_rows(LOCATIONS, 'lalitpur')))
+    assert index.rows_any(['pokhara', 'lalitpur']).tolist() == expected
+    assert index.rows_any([]).tolist() == []
+
+def test_all_missing_column():
+    index = NgramIndex(pd.Series([None, np.nan], dtype='category'))
+    assert len(index) == 0
+    assert index.rows('a').tolist() == []
@@ -0,0 +1,72 @@
+import pytest
+
+from query_builder import CatalogQuery, Condition, Op, OrderBy, Predicate
+
+ORDER = [OrderBy('fee'), OrderBy('course_id')]
+
+def _query(locations=(), courses=(), max_fee=None, hostel=False, order_by=ORDER):
+    """Build a query the way ChatbotIntegrator.build_intent_query does from entities"""
+    conditions = []
+    if locations:
+        conditions.append(Condition.any_of(Predicate('location', Op.CONTAINS, value) for value in locations))
+    if courses:
+        conditions.append(Condition.any_of(Predicate('course_name', Op.CONTAINS, value) for value in courses))
+    if hostel:
+        conditions.append(Condition.any_of([Predicate('hostel_availability', Op.IS_TRUE)]))
+    if max_fee is not None:
+        conditions.append(Condition.any_of([Predicate('fee', Op.LESS_EQUAL, max_fee)]))
+    return CatalogQuery.build(conditions, order_by)
+
+def _keys(query):
+    return query.cache_key, query.shape_key
+
+@pytest.mark.parametrize('variant', [
+    # Letter case and surrounding or repeated whitespace
+    dict(locations=['kathmandu', '  Lalitpur '], courses=['computer   engineering'], max_fee=500000),
+    # Order of values within an entity and duplicate values
+    dict(locations=['LALITPUR', 'Kathmandu', 'kathmandu'], courses=['Computer Engineering'], max_fee=500000),
+    # Integer and float spellings of the same number
+    dict(locations=['Kathmandu', 'Lalitpur'], courses=['Computer Engineering'], max_fee=500000.0),
+])
+def test_equivalent_entity_sets_share_keys(variant):
+    base = _query(locations=['Kathmandu', 'Lalitpur'], courses=['Computer Engineering'], max_fee=500000)
+    query = _query(**variant)
+    assert query == base
+    assert query.to_sql() == base.to_sql()
+    assert _keys(query) == _keys(base)
+
+def test_predicate_order_does_not_change_keys():
+    location = Condition.any_of([Predicate('location', Op.CONTAINS, 'Kathmandu')])
+    fee = Condition.any_of([Predicate('fee', Op.LESS_EQUAL, 500000)])
+    hostel = Condition.any_of([Predicate('hostel_availability', Op.IS_TRUE)])
+    first = CatalogQuery.build([location, fee, hostel], ORDER)
+    second = CatalogQuery.build([hostel, fee, location, fee], ORDER)
+    assert first.to_sql() == second.to_sql()
+    assert _keys(first) == _keys(second)
+
+def test_different_entity_sets_get_different_cache_keys():
+    base = _query(locations=['Kathmandu'], max_fee=500000)
+    variants = [
+        _query(locations=['Lalitpur'], max_fee=500000),
+        _query(locations=['Kathmandu'], max_fee=400000),
+        _query(locations=['Kathmandu', 'Lalitpur'], max_fee=500000),
+        _query(locations=['Kathmandu']),
+        _query(locations=['Kathmandu'], max_fee=500000, hostel=True),
+        _query(locations=['Kathmandu'], max_fee=500000, order_by=[OrderBy('rating', descending=True)]),
+    ]
+    keys = {base.cache_key} | {query.cache_key for query in variants}
+    assert len(keys) == len(variants) + 1
+
+def test_shape_key_ignores_parameter_values_only():
+    kathmandu = _query(locations=['Kathmandu'], max_fee=500000)
+    lalitpur = _query(locations=['Lalitpur'], max_fee=900000)
+    assert kathmandu.shape_key == lalitpur.shape_key
+    assert kathmandu.cache_key != lalitpur.cache_key
+    # Another OR branch adds a placeholder, so the statement shape differs
+    assert _query(locations=['Kathmandu', 'Lalitpur'], max_fee=500000).shape_key != kathmandu.shape_key
+
+def test_rendered_parameters_are_canonical():
+    sql, params = _query(locations=['lalitpur', 'Kathmandu'], max_fee=500000).to_sql()
+    # Conditions sorted by field, OR branches by value
+    assert params == [500000.0, '%KATHMANDU%', '%LALITPUR%']
+    assert sql.count('%s') == len(params)
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+
+from query_cache import QueryResultCache
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args, daemon=True)
+    thread.start()
+    return thread
+
+def test_hit_after_load():
+    cache = QueryResultCache()
+    calls = []
+    assert cache.get_or_load('k', lambda: calls.append(1) or 'v') == 'v'
+    assert cache.get_or_load('k', lambda: calls.append(1) or 'other') == 'v'
+    assert len(calls) == 1
+    stats = cache.stats()
+    assert (stats['misses'], stats['hits'], stats['entries']) == (1, 1, 1)
+
+def test_concurrent_callers_share_one_load():
+    cache = QueryResultCache()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def loader():
+        calls.append(1)
+        release.wait(5)
+        return 'v'
+
+    threads = [_start(lambda: results.append(cache.get_or_load('k', loader))) for _ in range(8)]
+    while cache.stats()['misses'] + cache.stats()['waits'] < 8:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['v'] * 8
+    assert len(calls) == 1
+    assert cache.stats()['waits'] == 7
+
+def test_loader_error_reaches_waiters_and_is_not_cached():
+    cache = QueryResultCache()
+    release = threading.Event()
+    errors = []
+
+    def failing():
+        release.wait(5)
+        raise RuntimeError('down')
+
+    def call():
+        try:
+            cache.get_or_load('k', failing)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [_start(call) for _ in range(3)]
+    while cache.stats()['misses'] + cache.stats()['waits'] < 3:
+        threading.Event().wait(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert len(errors) == 3
+    assert cache.get_or_load('k', lambda: 'v') == 'v'
+
+def test_invalidate_drops_entries():
+    cache = QueryResultCache()
+    cache.get_or_load('k', lambda: 'old')
+    cache.invalidate()
+    assert cache.get_or_load('k', lambda: 'new') == 'new'
+    assert cache.stats()['invalidations'] == 1
+
+def test_caller_after_invalidate_does_not_join_old_load():
+    cache = QueryResultCache()
+    started, release = threading.Event(), threading.Event()
+    old_results = []
+
+    def old_loader():
+        started.set()
+        release.wait(5)
+        return 'old'
+
+    thread = _start(lambda: old_results.append(cache.get_or_load('k', old_loader)))
+    assert started.wait(5)
+    cache.invalidate()
+
+    # Runs its own load instead of waiting for the one started before the invalidation
+    assert cache.get_or_load('k', lambda: 'new') == 'new'
+    release.set()
+    thread.join(5)
+
+    assert old_results == ['old']
+    # The old load finished last but must not replace the newer result
+    assert cache.get_or_load('k', lambda: pytest.fail('should be cached')) == 'new'
+
+def test_lru_eviction():
+    cache = QueryResultCache(max_entries=2)
+    for key in 'abc':
+        cache.get_or_load(key, lambda key=key: key)
+    assert cache.stats()['evictions'] == 1
+    assert cache.get_or_load('a', lambda: 'reloaded') == 'reloaded'
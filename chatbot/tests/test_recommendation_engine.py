@@ -0,0 +1,311 @@
+import contextlib
+import io
+import random
+import threading
+import time
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from catalog_snapshot import CatalogUnavailable
+from embedded_backend import EmbeddedBackend
+from recommendation_engine import SIMILARITY_FEATURES, CollegeRecommendationSystem, Priority, StudentProfile, top_k_indices
+from sql_builder import CollegeDataExtractor, DatabaseConfig
+from synthetic_catalog import generate_catalog_rows
+
+def _engine(rows):
+    extractor = CollegeDataExtractor(DatabaseConfig(), backend=EmbeddedBackend.from_catalog_rows(rows))
+    engine = CollegeRecommendationSystem(extractor)
+    with contextlib.redirect_stdout(io.StringIO()):
+        engine.load_data()
+    return engine
+
+@pytest.fixture(scope='module')
+def engine():
+    return _engine(generate_catalog_rows(400))
+
+def _profiles(engine, count, seed=7):
+    rnd = random.Random(seed)
+    types = sorted(set(engine.df['college_type']))
+    for _ in range(count):
+        yield StudentProfile(
+            entrance_rank=rnd.choice([None, 1, 500, 5000, 100000]),
+            budget_max=rnd.choice([None, 0.0, 200000.0, 1e6]),
+            preferred_locations=rnd.sample(['lalitpur', 'kathmandu', 'pokhara'], rnd.randint(0, 2)),
+            preferred_courses=rnd.sample(['computer', 'civil', 'xyz', 'ENGINEERING'], rnd.randint(0, 2)),
+            preferred_college_type=rnd.choice([None] + types),
+            hostel_required=rnd.random() < 0.5,
+            internship_priority=rnd.choice(list(Priority)),
+            scholarship_priority=rnd.choice(list(Priority)),
+            rating_priority=rnd.choice(list(Priority)),
+            pass_percentage_priority=rnd.choice(list(Priority)),
+            location_proximity=(27.7, 85.3) if rnd.random() < 0.5 else None,
+            max_distance_km=rnd.choice([5, 20]))
+
+def test_full_mode_components_match_scalar_scorers(engine):
+    rows = pd.DataFrame(engine.extractor.get_catalog_columns()).to_dict(orient='records')
+    scorers = {
+        'affordability': engine._calculate_affordability_score,
+        'quality': engine._calculate_quality_score,
+        'accessibility': engine._calculate_accessibility_score,
+        'location': engine._calculate_location_score,
+        'feature': engine._calculate_feature_score,
+    }
+    for profile in _profiles(engine, 25):
+        components = engine._full_components([profile])
+        for name, scorer in scorers.items():
+            expected = []
+            for row in rows:
+                try:
+                    expected.append(scorer(row, profile))
+                except ZeroDivisionError:
+                    expected.append(np.nan)
+            expected = np.array(expected)
+            known = ~np.isnan(expected)
+            np.testing.assert_allclose(components[name][0][known], expected[known], atol=1e-9,
+                                       err_msg=f"{name} for {profile}")
+
+def test_batch_matches_single_profile_recommendations(engine):
+    profiles = list(_profiles(engine, 6, seed=11))
+    batch = engine.recommend_colleges_batch(profiles, top_n=5)
+    for profile, recommendations in zip(profiles, batch):
+        single = engine.recommend_colleges(profile, top_n=5)
+        assert [r.college_info.course_id for r in recommendations] == [r.college_info.course_id for r in single]
+        assert [r.score.overall_score for r in recommendations] == pytest.approx(
+            [r.score.overall_score for r in single])
+
+def test_recommendations_are_ranked_by_overall_score(engine):
+    recommendations = engine.recommend_colleges(StudentProfile(preferred_locations=['lalitpur'], entrance_rank=800), 10)
+    scores = [r.score.overall_score for r in recommendations]
+    assert scores == sorted(scores, reverse=True)
+    assert [r.rank for r in recommendations] == list(range(1, len(recommendations) + 1))
+
+@pytest.mark.parametrize('k', [0, 1, 5, 49, 50, 80])
+def test_top_k_matches_a_stable_descending_sort(k):
+    scores = np.random.default_rng(3).integers(0, 10, 50).astype(np.float64)
+    expected = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+    assert top_k_indices(scores, k).tolist() == expected
+
+def test_top_k_ranks_nan_scores_last():
+    scores = np.array([np.nan, 1.0, 2.0, np.nan, 1.0])
+    assert top_k_indices(scores, 2).tolist() == [2, 1]
+    assert top_k_indices(scores, 4).tolist() == [2, 1, 4, 0]
+    assert top_k_indices(np.array([np.nan, np.nan]), 1).tolist() == [0]
+
+@pytest.mark.parametrize('factors', [['location'], ['fee'], ['pass_rate'], ['location', 'fee', 'pass_rate']])
+def test_compare_colleges_matches_scalar_scoring(engine, factors):
+    rows = pd.DataFrame(engine.extractor.get_catalog_columns()).to_dict(orient='records')
+    fee_max = max(row['fee'] for row in rows)
+    scalar = {
+        'location': engine._calculate_location_score,
+        'fee': lambda row, profile: 1 - row['fee'] / fee_max,
+        'pass_rate': lambda row, profile: row['pass_percentage'] / 100.0,
+    }
+    for profile in _profiles(engine, 8, seed=5):
+        expected = {row['course_id']: sum(scalar[factor](row, profile) for factor in factors) / len(factors)
+                    for row in rows}
+        best = sorted(expected.values(), reverse=True)[:10]
+        recommendations = engine.compare_colleges(profile, factors, top_n=10)
+        assert [r.score.overall_score for r in recommendations] == pytest.approx(best)
+        # Each winner carries its own scalar score (programs may swap only within ties)
+        assert [expected[r.college_info.course_id] for r in recommendations] == pytest.approx(best)
+
+@pytest.mark.parametrize('max_matrix_bytes', [1, 3 * 400 * 8 * 6])
+def test_chunked_batches_match_single_profiles(engine, max_matrix_bytes):
+    profiles = list(_profiles(engine, 7, seed=13))
+    factors = ['location', 'fee']
+    batches = {
+        'compare': (engine.compare_colleges_batch(profiles, factors, 5, max_matrix_bytes),
+                    [engine.compare_colleges(profile, factors, 5) for profile in profiles]),
+        'recommend': (engine.recommend_colleges_batch(profiles, 5, max_matrix_bytes),
+                      [engine.recommend_colleges(profile, 5) for profile in profiles]),
+    }
+    for name, (batch, single) in batches.items():
+        assert len(batch) == len(profiles)
+        for got, expected in zip(batch, single):
+            assert [r.college_info.course_id for r in got] == [r.college_info.course_id for r in expected], name
+            assert [r.rank for r in got] == list(range(1, len(expected) + 1))
+
+def _similarity_distances(engine, course_id):
+    """Brute-force distances over min-max normalized, median-filled similarity features"""
+    features = engine.df[list(SIMILARITY_FEATURES)].astype(np.float64)
+    features = features.fillna(features.median())
+    span = (features.max() - features.min()).replace(0, 1)
+    normalized = ((features - features.min()) / span).to_numpy()
+    position = engine.state.course_positions.get_loc(course_id)
+    distances = np.sqrt(((normalized - normalized[position]) ** 2).sum(axis=1))
+    return dict(zip(engine.df['course_id'], distances))
+
+@pytest.mark.parametrize('k', [1, 5, 12])
+def test_similar_programs_are_the_nearest_in_feature_space(engine, k):
+    for course_id in engine.df['course_id'].iloc[[0, 17, 250]]:
+        distances = _similarity_distances(engine, course_id)
+        results = engine.similar_programs(int(course_id), k=k)
+        expected = sorted(distance for other, distance in distances.items() if other != course_id)[:k]
+        assert len(results) == k
+        assert all(result['course_id'] != course_id for result in results)
+        assert [result['similarity_distance'] for result in results] == pytest.approx(expected, abs=1e-5)
+        # Each result is the program it claims to be, not just one at the same distance
+        assert [distances[result['course_id']] for result in results] == pytest.approx(expected, abs=1e-5)
+
+def test_similar_programs_rejects_unknown_courses(engine):
+    with pytest.raises(ValueError):
+        engine.similar_programs(-1)
+
+def test_empty_catalog_loads():
+    engine = _engine([])
+    assert len(engine.df) == 0
+    assert engine.recommend_colleges(StudentProfile(location_proximity=(27.7, 85.3)), 5) == []
+    assert engine.compare_colleges(StudentProfile(), ['fee', 'rating'], 5) == []
+    assert engine.nearest_colleges(27.7, 85.3, k=3) == []
+    with pytest.raises(ValueError):
+        engine.similar_programs(1)
+
+def test_money_keeps_full_precision():
+    rows = generate_catalog_rows(50)
+    rows[0]['Fee'], rows[1]['Fee'] = 1234567.89, 987654.32
+    engine = _engine(rows)
+    positions = engine.state.course_positions.get_indexer([rows[0]['CourseId'], rows[1]['CourseId']])
+    assert engine.df['fee'].dtype == np.float64
+    assert engine.df['fee'].iloc[positions[0]] == 1234567.89
+    assert engine._college_info_at(positions[1]).fee == 987654.32
+
+def test_floats_are_compacted_only_when_lossless(engine):
+    df = pd.DataFrame({'whole': [520000.0, 1990000.0], 'cents': [1234567.89, 987654.32],
+                       'ratio': [0.25, np.nan], 'fee': [520000.0, 1990000.0]})
+    engine._compact_data(df)
+    assert df.dtypes.to_dict() == {'whole': np.float32, 'cents': np.float64, 'ratio': np.float32, 'fee': np.float64}
+    assert df['cents'].tolist() == [1234567.89, 987654.32]
+
+def test_integer_scored_columns_are_compacted(engine):
+    for name in ('pass_percentage', 'average_cutoff_rank', 'general_scholarship'):
+        assert engine.df[name].dtype == np.int32
+        assert engine.score_columns[name].dtype == np.int32
+    assert engine.df['rating'].dtype == engine.df['latitude'].dtype == np.float64
+
+def test_update_programs_widens_a_compacted_column_instead_of_wrapping():
+    engine = _engine(generate_catalog_rows(50))
+    assert engine.df['total_seats'].dtype == np.int32
+    engine.update_programs([replace(engine._college_info_at(3), total_seats=2**40)])
+    assert engine.df['total_seats'].dtype == np.int64
+    assert engine._college_info_at(3).total_seats == 2**40
+
+def test_update_programs_keeps_money_exact():
+    engine = _engine(generate_catalog_rows(50))
+    engine.update_programs([replace(engine._college_info_at(3), fee=987654.32)])
+    assert engine.df['fee'].iloc[3] == 987654.32
+    assert engine._college_info_at(3).fee == 987654.32
+    assert engine.score_columns['fee'][3] == 987654.32
+
+def test_score_terms_follow_patched_rows():
+    engine = _engine(generate_catalog_rows(50))
+    edited = replace(engine._college_info_at(3), fee=engine.df['fee'].max() * 2, general_scholarship=25)
+    engine.update_programs([edited])
+    columns = engine.score_columns
+    assert columns['fee_score'][3] == 0.0
+    np.testing.assert_allclose(columns['fee_score'], 1 - engine.df['fee'] / edited.fee)
+    assert columns['effective_fee'][3] == edited.fee * 0.75
+    assert columns['default_budget'] == engine.feature_matrix.statistics('fee')['median'] * 1.2
+    assert 'score_columns.fee_score' in engine.memory_report().index
+
+def _assert_matches_full_build(engine):
+    fresh = CollegeRecommendationSystem(CollegeDataExtractor(DatabaseConfig(), backend=engine.extractor.backend))
+    with contextlib.redirect_stdout(io.StringIO()):
+        fresh.load_data()
+    pd.testing.assert_frame_equal(engine.df, fresh.df, check_categorical=False)
+    np.testing.assert_allclose(engine.feature_matrix.values, fresh.feature_matrix.values, atol=1e-6)
+    for name in ('minimum', 'maximum', 'median'):
+        np.testing.assert_array_equal(getattr(engine.feature_matrix, name), getattr(fresh.feature_matrix, name))
+    profile = StudentProfile(preferred_locations=['zanskar', 'lalitpur'], budget_max=900000.0, entrance_rank=700)
+    assert [(r.college_info.course_id, r.score.overall_score) for r in engine.recommend_colleges(profile, 10)] == \
+        [(r.college_info.course_id, r.score.overall_score) for r in fresh.recommend_colleges(profile, 10)]
+
+def test_refresh_patches_a_few_edited_programs():
+    engine = _engine(generate_catalog_rows(200))
+    before = engine.state
+    engine.extractor.backend.execute_transaction([
+        ("UPDATE Courses SET Fee = %s WHERE CourseId = %s", [[3000000.5, 4], [987654.32, 9]])])
+    assert engine.refresh()
+    after = engine.state
+    assert after.version != before.version
+    # Names and coordinates did not change, so their indexes are reused
+    assert after.location_index is before.location_index and after.geo_index is before.geo_index
+    assert after.similarity_index is not before.similarity_index
+    _assert_matches_full_build(engine)
+
+def test_refresh_rebuilds_indexes_for_renamed_programs():
+    engine = _engine(generate_catalog_rows(200))
+    before = engine.state
+    engine.extractor.backend.execute_transaction([
+        ("UPDATE College SET Location = %s WHERE CollegeId = %s", [['ZANSKAR', 1]])])
+    assert engine.refresh()
+    assert engine.state.location_index is not before.location_index
+    assert len(engine.location_index.rows('zanskar')) > 0
+    _assert_matches_full_build(engine)
+
+def test_refresh_without_value_changes_keeps_the_data():
+    engine = _engine(generate_catalog_rows(50))
+    before = engine.state
+    engine.extractor.backend.execute_transaction([("UPDATE Courses SET Fee = Fee WHERE CourseId = %s", [[1]])])
+    assert engine.refresh()
+    assert engine.state.version != before.version and engine.state.df is before.df
+
+def test_refresh_rebuilds_when_many_programs_change():
+    engine = _engine(generate_catalog_rows(50))
+    before = engine.state
+    engine.extractor.backend.execute_transaction([("UPDATE Courses SET Fee = Fee + 1", None)])
+    assert engine.refresh()
+    assert engine.state.course_positions is not before.course_positions
+    _assert_matches_full_build(engine)
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def _no_database_reads(*args, **kwargs):
+    raise AssertionError('the engine read the database instead of the snapshot')
+
+def test_background_refresh_builds_from_the_snapshot(monkeypatch):
+    extractor = CollegeDataExtractor(DatabaseConfig(), backend=EmbeddedBackend.from_catalog_rows(generate_catalog_rows(80)))
+    snapshot = extractor.enable_catalog_snapshot(background=False)
+    monkeypatch.setattr(extractor, 'get_catalog_version', _no_database_reads)
+    monkeypatch.setattr(extractor, 'get_catalog_columns', _no_database_reads)
+    engine = CollegeRecommendationSystem(extractor)
+    engine.start_background_refresh(interval=60)
+    try:
+        _wait_for(lambda: engine.state is not None)
+        assert engine.state.version == snapshot.current.version
+        _assert_matches_full_build(engine)
+
+        extractor.backend.execute_transaction([("UPDATE Courses SET Fee = %s WHERE CourseId = %s", [[987654.32, 5]])])
+        assert snapshot.refresh()
+        _wait_for(lambda: engine.state.version == snapshot.current.version)
+        assert engine.df['fee'].iloc[engine.state.course_positions.get_loc(5)] == 987654.32
+        _assert_matches_full_build(engine)
+        assert engine.last_error is None
+    finally:
+        engine.stop_background_refresh()
+
+def test_requests_never_load_while_the_background_refresher_runs(monkeypatch):
+    extractor = CollegeDataExtractor(DatabaseConfig(), backend=EmbeddedBackend.from_catalog_rows(generate_catalog_rows(30)))
+    snapshot = extractor.enable_catalog_snapshot(background=False)
+    release = threading.Event()
+    load = snapshot._load
+    monkeypatch.setattr(snapshot, '_load', lambda timeout: (release.wait(5), load(timeout))[1])
+    snapshot.start()
+    engine = CollegeRecommendationSystem(extractor)
+    engine.ready_timeout = 0.05
+    engine.start_background_refresh(interval=60)
+    try:
+        with pytest.raises(CatalogUnavailable):
+            engine.recommend_colleges(StudentProfile(), 3)
+        release.set()
+        engine.ready_timeout = 5.0
+        assert len(engine.recommend_colleges(StudentProfile(), 3)) == 3
+    finally:
+        engine.stop_background_refresh()
+        snapshot.stop()
@@ -0,0 +1,148 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from embedded_backend import EmbeddedBackend
+import replica_router
+from replica_router import LEAST_LATENCY, REPLICA_COOL_OFF, ReplicaRouter
+from synthetic_catalog import generate_catalog_rows
+
+class StubBackend:
+    """Backend that answers with its own name, optionally after a delay or with an error"""
+
+    def __init__(self, name, delay=0.0, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.release = threading.Event()
+
+    @contextmanager
+    def connection(self):
+        yield None
+
+    def fetch_all(self, query, params=None, timeout=None):
+        self.calls += 1
+        if self.delay:
+            self.release.wait(self.delay)
+        if self.fail:
+            raise sqlite3.OperationalError(f"{self.name} is down")
+        return ('server',), [(self.name,)]
+
+    def iter_chunks(self, query, params=None, chunk_size=1000, timeout=None):
+        yield self.fetch_all(query, params, timeout)
+
+    def catalog_version(self, version_query, timeout=None):
+        return (self.name,)
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        self.release.set()
+
+def _served_by(router):
+    return router.fetch_all("SELECT 1")[1][0][0]
+
+def test_round_robin_alternates_replicas():
+    router = ReplicaRouter(StubBackend('primary'), [StubBackend('a'), StubBackend('b')])
+    assert [_served_by(router) for _ in range(4)] == ['a', 'b', 'a', 'b']
+    stats = router.stats()
+    assert [replica['reads'] for replica in stats['replicas']] == [2, 2]
+    assert stats['primary_reads'] == 0
+
+def test_writes_and_probes_stay_on_the_primary():
+    primary = StubBackend('primary')
+    router = ReplicaRouter(primary, [StubBackend('a')])
+    assert router.catalog_version("CHECKSUM TABLE College") == ('primary',)
+
+def test_failing_replica_fails_over_to_the_next():
+    router = ReplicaRouter(StubBackend('primary'), [StubBackend('a', fail=True), StubBackend('b')])
+    assert _served_by(router) == 'b'
+    stats = router.stats()
+    assert stats['failovers'] == 1
+    assert stats['replicas'][0]['errors'] == 1
+
+def test_all_replicas_failing_falls_back_to_the_primary():
+    router = ReplicaRouter(StubBackend('primary'), [StubBackend('a', fail=True), StubBackend('b', fail=True)])
+    assert _served_by(router) == 'primary'
+    stats = router.stats()
+    assert (stats['failovers'], stats['primary_reads']) == (2, 1)
+
+def test_hedged_read_falls_back_to_the_primary():
+    router = ReplicaRouter(StubBackend('primary'), [StubBackend('a', fail=True), StubBackend('b', fail=True)],
+                           hedge_after=0.01)
+    try:
+        assert _served_by(router) == 'primary'
+        assert router.stats()['primary_reads'] == 1
+    finally:
+        router.close()
+
+def test_hedge_wins_when_the_first_replica_stalls():
+    stalled, fast = StubBackend('stalled', delay=5.0), StubBackend('fast')
+    router = ReplicaRouter(StubBackend('primary'), [stalled, fast], hedge_after=0.02)
+    try:
+        assert _served_by(router) == 'fast'
+        stats = router.stats()
+        assert (stats['hedges'], stats['hedge_wins']) == (1, 1)
+        assert stalled.calls == 1
+    finally:
+        router.close()
+
+def test_fast_first_replica_is_not_hedged():
+    router = ReplicaRouter(StubBackend('primary'), [StubBackend('a'), StubBackend('b')], hedge_after=1.0)
+    try:
+        assert _served_by(router) == 'a'
+        assert router.stats()['hedges'] == 0
+    finally:
+        router.close()
+
+def test_least_latency_prefers_the_fastest_replica():
+    slow, fast = StubBackend('slow', delay=0.03), StubBackend('fast')
+    router = ReplicaRouter(StubBackend('primary'), [slow, fast], routing=LEAST_LATENCY)
+    # Unmeasured replicas are sampled first, then reads go to the lowest latency
+    assert [_served_by(router) for _ in range(2)] == ['slow', 'fast']
+    assert [_served_by(router) for _ in range(3)] == ['fast'] * 3
+    latencies = [replica['latency_ms'] for replica in router.stats()['replicas']]
+    assert latencies[0] > latencies[1]
+
+def test_unknown_routing_is_rejected():
+    with pytest.raises(ValueError):
+        ReplicaRouter(StubBackend('primary'), [], routing='random')
+
+def test_embedded_replicas_answer_reads():
+    rows = generate_catalog_rows(20)
+    replicas = [EmbeddedBackend.from_catalog_rows(rows) for _ in range(2)]
+    router = ReplicaRouter(EmbeddedBackend.from_catalog_rows(rows), replicas)
+    counts = [router.fetch_all("SELECT COUNT(*) FROM Courses")[1][0][0] for _ in range(2)]
+    assert counts == [20, 20]
+    assert [replica['reads'] for replica in router.stats()['replicas']] == [1, 1]
+
+def test_failing_replica_cools_off_under_least_latency(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(replica_router.time, 'monotonic', lambda: now[0])
+    fast, slow = StubBackend('fast'), StubBackend('slow', delay=0.03)
+    router = ReplicaRouter(StubBackend('primary'), [fast, slow], routing=LEAST_LATENCY)
+    assert [_served_by(router) for _ in range(3)] == ['fast', 'slow', 'fast']
+
+    # Its latency average still says fastest, but after one failure reads avoid it
+    fast.fail = True
+    assert [_served_by(router) for _ in range(3)] == ['slow'] * 3
+    assert fast.calls == 3
+    assert [replica['cooling_off'] for replica in router.stats()['replicas']] == [True, False]
+
+    # Once the cool-off has passed it is tried first again
+    fast.fail = False
+    now[0] += REPLICA_COOL_OFF + 1
+    assert _served_by(router) == 'fast'
+    assert not router.stats()['replicas'][0]['cooling_off']
+
+def test_replica_cooling_off_is_still_tried_before_the_primary(monkeypatch):
+    monkeypatch.setattr(replica_router.time, 'monotonic', lambda: 1000.0)
+    flaky = StubBackend('flaky', fail=True)
+    router = ReplicaRouter(StubBackend('primary'), [flaky])
+    assert _served_by(router) == 'primary'
+    flaky.fail = False
+    assert _served_by(router) == 'flaky'
@@ -0,0 +1,55 @@
+import threading
+
+from embedded_backend import EmbeddedBackend
+from query_builder import Condition, Op, Predicate
+from sql_builder import CatalogQuery, CollegeDataExtractor, DatabaseConfig
+from synthetic_catalog import generate_catalog_rows
+
+def _extractor():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(60))
+    return CollegeDataExtractor(DatabaseConfig(token_search=True, result_cache_size=0), backend=backend)
+
+def _located_in(place):
+    return CatalogQuery.build([Condition.any_of([Predicate('location', Op.CONTAINS, place)])])
+
+def _move_first_college(extractor, place):
+    extractor.backend.execute_transaction([("UPDATE College SET Location = %s WHERE CollegeId = %s", [[place, 1]])])
+
+def _token_rows(extractor):
+    return extractor.backend.fetch_all("SELECT COUNT(*) FROM CatalogSearchToken")[1][0][0]
+
+def test_queries_use_like_filters_without_snapshot():
+    extractor = _extractor()
+    _move_first_college(extractor, 'Zanskar')
+    results = extractor.get_colleges_by_query(_located_in('Zanskar'))
+    assert results and {info.college.college_id for info in results} == {1}
+    # Requests never write the token table
+    assert _token_rows(extractor) == 0
+
+def test_queries_use_like_filters_until_the_snapshot_is_published(monkeypatch):
+    extractor = _extractor()
+    snapshot = extractor.enable_catalog_snapshot(background=False)
+    started, release = threading.Event(), threading.Event()
+    load = snapshot._load
+    monkeypatch.setattr(snapshot, '_load', lambda timeout: (started.set(), release.wait(5), load(timeout))[2])
+    snapshot.start()
+    try:
+        assert started.wait(5)
+        _move_first_college(extractor, 'Zanskar')
+        results = extractor.get_colleges_by_query(_located_in('Zanskar'))
+        assert {info.college.college_id for info in results} == {1}
+        assert _token_rows(extractor) == 0
+    finally:
+        release.set()
+        snapshot.stop()
+
+def test_token_table_rebuilt_on_snapshot_change():
+    extractor = _extractor()
+    extractor.enable_catalog_snapshot(background=False).get()
+    _move_first_college(extractor, 'Zanskar')
+    extractor.snapshot.refresh()
+
+    _, rows = extractor.backend.fetch_all(
+        "SELECT EntityId FROM CatalogSearchToken WHERE Field = 'location' AND Token = 'ZANSKAR'")
+    assert [tuple(row) for row in rows] == [(1,)]
+    assert extractor._search_tokens_current()
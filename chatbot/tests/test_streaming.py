@@ -0,0 +1,104 @@
+import csv
+import json
+
+import pytest
+from mysql.connector.errors import InternalError
+
+from embedded_backend import EmbeddedBackend
+from sql_builder import CollegeDataExtractor, DatabaseConfig
+from storage_backend import MySQLBackend
+from synthetic_catalog import generate_catalog_rows
+
+EXPORT_QUERY = "SELECT CourseId, Name, Fee FROM Courses ORDER BY CourseId"
+
+class StreamingCursor:
+    """Unbuffered cursor double serving rows from a list"""
+
+    def __init__(self, rows):
+        self.column_names = ('n',)
+        self.rows = list(rows)
+
+    def execute(self, query, params=()):
+        self.query = query
+
+    def fetchmany(self, size):
+        chunk, self.rows = self.rows[:size], self.rows[size:]
+        return chunk
+
+    def close(self):
+        pass
+
+class StreamingConnection:
+    def __init__(self, rows):
+        self.cursor_ = StreamingCursor(rows)
+        self.closed = False
+
+    def cursor(self, buffered=True, prepared=False):
+        return self.cursor_
+
+    def is_connected(self):
+        # Like mysql-connector, the ping fails while a result set is still unread
+        if self.cursor_.rows:
+            raise InternalError('Unread result found')
+        return not self.closed
+
+    def close(self):
+        self.closed = True
+
+@pytest.fixture
+def connections(monkeypatch):
+    opened = []
+
+    def connect(self):
+        opened.append(StreamingConnection([(n,) for n in range(10)]))
+        return opened[-1]
+
+    monkeypatch.setattr(MySQLBackend, '_connect', connect)
+    return opened
+
+@pytest.mark.parametrize('pool_size', [0, 1])
+def test_abandoned_mysql_stream_releases_its_connection(connections, pool_size):
+    backend = MySQLBackend(DatabaseConfig(pool_size=pool_size, pool_warmup=False))
+    stream = backend.iter_chunks("SELECT n FROM numbers", chunk_size=3)
+    assert next(stream) == (('n',), [(0,), (1,), (2,)])
+    stream.close()
+    assert len(connections) == 1 and connections[0].closed
+
+def test_fully_read_mysql_stream_closes_its_connection(connections):
+    backend = MySQLBackend(DatabaseConfig(pool_size=0))
+    chunks = list(backend.iter_chunks("SELECT n FROM numbers", chunk_size=4))
+    assert [len(rows) for _, rows in chunks] == [4, 4, 2]
+    assert connections[0].closed
+
+def test_mysql_stream_carries_the_execution_limit(connections):
+    backend = MySQLBackend(DatabaseConfig(pool_size=0))
+    list(backend.iter_chunks("SELECT n FROM numbers", timeout=2.0))
+    assert connections[0].cursor_.query == "SELECT /*+ MAX_EXECUTION_TIME(2000) */ n FROM numbers"
+
+@pytest.fixture
+def extractor():
+    backend = EmbeddedBackend.from_catalog_rows(generate_catalog_rows(25))
+    return CollegeDataExtractor(DatabaseConfig(result_cache_size=0), backend=backend)
+
+def test_stream_to_csv_writes_header_and_every_row(extractor, tmp_path):
+    expected = extractor.backend.fetch_all(EXPORT_QUERY)
+    path = tmp_path / 'courses.csv'
+    assert extractor.stream_to_csv(EXPORT_QUERY, str(path), chunk_size=7) == 25
+    with open(path, newline='', encoding='utf-8') as f:
+        header, *rows = list(csv.reader(f))
+    assert tuple(header) == expected[0]
+    assert rows == [[str(value) for value in row] for row in expected[1]]
+
+def test_stream_to_jsonl_writes_one_object_per_row(extractor, tmp_path):
+    columns, expected = extractor.backend.fetch_all(EXPORT_QUERY)
+    path = tmp_path / 'courses.jsonl'
+    assert extractor.stream_to_jsonl(EXPORT_QUERY, str(path), chunk_size=7) == 25
+    with open(path, encoding='utf-8') as f:
+        records = [json.loads(line) for line in f]
+    assert records == [dict(zip(columns, row)) for row in expected]
+
+def test_empty_export_still_writes_the_csv_header(extractor, tmp_path):
+    path = tmp_path / 'none.csv'
+    assert extractor.stream_to_csv(EXPORT_QUERY.replace('ORDER', 'WHERE Fee < 0 ORDER'), str(path)) == 0
+    with open(path, newline='', encoding='utf-8') as f:
+        assert list(csv.reader(f)) == [['CourseId', 'Name', 'Fee']]